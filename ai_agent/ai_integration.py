@@ -1,18 +1,47 @@
 import os
-import re
+import asyncio
+import threading
 from dotenv import load_dotenv
-from langgraph.graph import StateGraph
-from langchain_groq import ChatGroq
-from langchain_core.messages import HumanMessage, SystemMessage
-import dateparser
-from datetime import datetime, timedelta
-from ai_agent.calendar_setup import find_free_slots, book_meeting
-from typing import TypedDict
-from ai_agent.intent_detect import detect_intent
+from datetime import date, datetime, timedelta
+from ai_agent.calendar_setup import (
+    book_meeting, check_conflict, get_events_for_date, suggest_times, get_calendar_service,
+    get_overlapping_events, find_alternatives,
+)
+from typing import TypedDict, Optional
+from time import perf_counter
+from ai_agent.intent_detect import analyze_message
+from ai_agent import local_responder
+from ai_agent.calendar_io import run_calendar_io
+from ai_agent.response_cache import response_cache
+from ai_agent.metrics import metrics, span, timed
+from ai_agent.llm_gateway import LLMGateway, LLMUnavailable
+from ai_agent.booking_queue import BOOKING_QUEUE, booking_key, booking_queue, submit_booking
+from ai_agent.memory import CHAT_MEMORY, CHAT_HISTORY_TOKENS, compact_history, create_checkpointer, thread_id
 load_dotenv()
 
 api_key = os.getenv("API_KEY")
-llm = ChatGroq(api_key=api_key, model_name="llama3-70b-8192")
+
+# langgraph and langchain_groq take ~2s to import, so the model and graph are
+# built on first use (or by warm_up() at startup) rather than at import time
+llm = None
+_graphs = {}
+_init_lock = threading.Lock()
+
+
+def get_llm():
+    """Return the shared chat model, creating it on first use."""
+    global llm
+    if llm is None:
+        with _init_lock:
+            if llm is None:
+                from langchain_groq import ChatGroq
+                # Retries and timeouts are handled by llm_gateway
+                llm = ChatGroq(api_key=api_key, model_name="llama3-70b-8192", max_retries=0)
+    return llm
+
+
+# Every LLM call goes through here for concurrency limits, pacing and retries
+llm_gateway = LLMGateway(get_llm)
 
 # 🔥 Powerful System Prompt
 system_prompt = """
@@ -28,70 +57,393 @@ You can:
 """
 
 
-# ✅ Extract person's name from message
-def extract_person_name(message):
-    match = re.search(r"with (.+)", message)
-    if match:
-        return match.group(1).strip().title()
-    return "Unnamed Person"
+def _remembering(config):
+    return CHAT_MEMORY != "off" and bool(((config or {}).get("configurable") or {}).get("thread_id"))
 
-# ✅ Main message processor
-def process_message(state):
+
+# ✅ Graph nodes: parse -> route -> book | suggest | fetch | clarify | local | chat -> (remember)
+@timed("node.parse")
+async def parse_node(state, config=None):
+    """Analyse the message once and resolve follow-ups into intent, time, attendee and duration."""
     message = state["input"]
-    intent = detect_intent(message)
-    dt = dateparser.parse(message)
-
-    # 👉 Book meeting if intent is booking
-    if intent == "book" and dt:
-        existing_events = find_free_slots(dt.date())
-        if existing_events:
-            return {
-                "input": message,
-                "output": f"📅 You already have events around {dt.strftime('%I:%M %p, %A')}. Try another time?"
-            }
-
-        end_dt = dt + timedelta(minutes=30)
-        person = extract_person_name(message)
-        event = book_meeting(dt, end_dt, summary=f"Meeting with {person}")
+    remember = _remembering(config)
+    analysis = analyze_message(message)
+    intent, dt, has_time = analysis.intent, analysis.dt, analysis.has_time
+    person, duration = analysis.person, analysis.duration_minutes
+    context = dict(state.get("context") or {}) if remember else {}
+
+    # 👉 Follow-ups: "book it with Rahul" after a suggestion, or a time after "book a meeting"
+    follow_up = False
+    if intent not in ("book", "suggest", "fetch"):
+        if analysis.asks_to_book and not dt and context.get("dt"):
+            intent, dt, has_time, follow_up = "book", datetime.fromisoformat(context["dt"]), True, True
+        elif dt and context.get("pending") and intent == "none":
+            intent, follow_up = "book", True
+            if context.get("date") and has_time and not analysis.has_day:
+                # "4pm" in answer to "What time on Friday?"
+                dt = dt.tzinfo.localize(datetime.combine(date.fromisoformat(context["date"]), dt.time()))
+        elif remember and analysis.asks_to_book and not dt:
+            intent = "clarify"
+            context.update(pending=True, person=person, duration=duration)
+    if follow_up:
+        if person == "Unnamed Person":
+            person = context.get("person", person)
+        duration = context.get("duration", duration)
+
+    # Date/time, greetings and "who are you" need neither the calendar nor the LLM
+    if intent in ("general", "none") and local_responder.match(message):
+        intent = "local"
+
+    return {
+        "intent": intent, "when": dt, "has_time": has_time, "person": person, "duration": duration,
+        "context": context, "remember": remember, "result": None,
+    }
+
+
+def route(state):
+    intent = state["intent"]
+    return intent if intent in ("book", "suggest", "fetch", "clarify", "local") else "chat"
+
+
+def after_reply(state):
+    return "remember" if state.get("remember") else "__end__"
+
+
+def _queued_booking_reply(booking, summary, dt, person, context):
+    """Reply for a booking handed to the queue; the client polls /bookings/{id}."""
+    context.pop("dt", None)
+    context["person"] = person
+    when = dt.strftime('%A, %d %B %Y at %I:%M %p')
+    if booking["status"] == "done":
+        output = f"✅ '{summary}' on {when} is already booked."
+    else:
+        output = f"🕐 Booking '{summary}' on {when}. I'll confirm shortly."
+    return {
+        "output": output,
+        "result": {"type": "booking_pending", "booking_id": booking["id"], "status": booking["status"]},
+        "context": context,
+    }
+
+
+@timed("node.book")
+async def book_node(state):
+    dt, person, duration = state["when"], state["person"], state["duration"]
+    user_id = state.get("user_id")
+    context = dict(state.get("context") or {})
+    context.pop("pending", None)
+    if not state.get("has_time"):
+        # "book a meeting tomorrow": ask rather than book at midnight
+        context.update(pending=True, date=dt.date().isoformat(), person=person, duration=duration)
+        return {"output": f"🕐 What time on {dt.strftime('%A, %d %B')} should I book it?", "context": context}
+    context.pop("date", None)
+    if dt < datetime.now(dt.tzinfo):
         return {
-            "input": message,
-            "output": f"✅ Booked '{event['summary']}' on {dt.strftime('%A, %d %B %Y at %I:%M %p')}"
+            "output": f"⏰ {dt.strftime('%A, %d %B %Y at %I:%M %p')} has already passed. Which time should I book instead?",
+            "context": context,
         }
+    end_dt = dt + timedelta(minutes=duration)
+    summary = f"Meeting with {person}"
+    key = booking_key(user_id, dt, end_dt, person)
 
-    # 👉 Fetch today’s meetings
-    elif intent == "fetch":
-        today = datetime.now().date()
-        events = find_free_slots(today)
-        if not events:
-            return {"input": message, "output": "📭 No meetings found for today."}
-        
-        reply = "📅 Your meetings for today:\n"
-        for event in events:
-            summary = event[0] if isinstance(event, tuple) else event.get('summary', 'No Title')
+    if BOOKING_QUEUE:
+        # A repeated request finds its own booking, which the conflict check would report as taken
+        booking = await run_calendar_io(booking_queue.get, key)
+        if booking is not None and booking["status"] != "failed":
+            return _queued_booking_reply(booking, summary, dt, person, context)
 
-            time = event['start'].get('dateTime', event['start'].get('date'))
-            reply += f"• {summary} at {time}\n"
+    conflict = await run_calendar_io(check_conflict, dt, end_dt, user_id=user_id, details=False)
+    if conflict.get("error"):
+        # Unverified is not free: booking now could double-book the slot
+        return {
+            "output": "⚠️ I couldn't check your calendar for that time, so I haven't booked it. Please try again in a moment.",
+            "result": {"type": "error", "error": conflict["error"]},
+            "context": context,
+        }
+    if conflict["conflict"]:
+        # Independent lookups: what is in the way, and where else there is room
+        events, alternatives = await asyncio.gather(
+            run_calendar_io(get_overlapping_events, dt, end_dt, user_id=user_id),
+            run_calendar_io(find_alternatives, dt, end_dt, user_id=user_id),
+        )
+        titles = ", ".join(event.summary for event in events) or "another event"
+        reply = f"📅 You already have {titles} at {dt.strftime('%I:%M %p, %A')}."
+        if alternatives:
+            reply += " Free nearby:\n"
+            for start, end in alternatives:
+                reply += f"• {start.strftime('%A %I:%M %p')} - {end.strftime('%I:%M %p')}\n"
+            context.update(dt=alternatives[0][0].isoformat(), person=person, duration=duration)
+        else:
+            reply += " Try another time?"
+        slots = [{"start": start.isoformat(), "end": end.isoformat()} for start, end in alternatives]
+        return {
+            "output": reply,
+            "result": {"type": "conflict", "events": [event.to_dict() for event in events], "alternatives": slots},
+            "context": context,
+        }
 
-        return {"input": message, "output": reply}
+    if BOOKING_QUEUE:
+        booking = await submit_booking(dt, end_dt, summary, person, user_id=user_id)
+        return _queued_booking_reply(booking, summary, dt, person, context)
 
-    # 👉 Fallback to LLM for general questions
-    messages = [
-        SystemMessage(content=system_prompt),
-        HumanMessage(content=message)
-    ]
-    response = llm.invoke(messages)
+    # The key as event id turns a retried request into a no-op instead of a duplicate meeting
+    event = await run_calendar_io(
+        book_meeting, dt, end_dt, summary=summary, user_id=user_id, event_id=key
+    )
+    if not event["success"]:
+        return {"output": f"❌ Could not book the meeting: {event['error']}", "context": context}
+    context.pop("dt", None)
+    context["person"] = person
     return {
-        "input": message,
-        "output": response.content
+        "output": f"✅ Booked '{event['summary']}' on {dt.strftime('%A, %d %B %Y at %I:%M %p')}",
+        "result": {"type": "booking", "booking": event},
+        "context": context,
     }
 
+
+@timed("node.suggest")
+async def suggest_node(state):
+    """Suggest free times (from the given day, or today)."""
+    dt, duration = state["when"], state["duration"]
+    start_date = dt.date() if dt else datetime.now().date()
+    slots = await run_calendar_io(suggest_times, start_date, duration_minutes=duration, user_id=state.get("user_id"))
+    if not slots:
+        return {"output": "😕 No free slots found in the next 7 days."}
+
+    reply = "🕐 You're free at:\n"
+    for start, end in slots:
+        reply += f"• {start.strftime('%A, %d %B %I:%M %p')} - {end.strftime('%I:%M %p')}\n"
+    context = dict(state.get("context") or {}, dt=slots[0][0].isoformat(), duration=duration)
+
+    suggestions = [{"start": start.isoformat(), "end": end.isoformat()} for start, end in slots]
+    return {"output": reply, "result": {"type": "suggestions", "slots": suggestions}, "context": context}
+
+
+@timed("node.fetch")
+async def fetch_node(state):
+    """Today's meetings."""
+    today = datetime.now().date()
+    events = await run_calendar_io(get_events_for_date, today, user_id=state.get("user_id"))
+    if not events:
+        return {"output": "📭 No meetings found for today."}
+    
+    reply = "📅 Your meetings for today:\n"
+    for event in events:
+        reply += f"• {event.summary} at {event.start_iso}\n"
+
+    return {"output": reply, "result": {"type": "events", "events": [event.to_dict() for event in events]}}
+
+
+@timed("node.clarify")
+async def clarify_node(state):
+    return {"output": "🕐 Sure, when should I book it?"}
+
+
+@timed("node.local")
+async def local_node(state):
+    return {"output": local_responder.local_reply(state["input"])}
+
+
+@timed("node.chat")
+async def chat_node(state):
+    """LLM for everything else. Cached answers skip the call, but only for a
+    first message: later ones may depend on the conversation."""
+    message = state["input"]
+    history = state.get("history") or []
+    if not history:
+        # The cache may read the SharedCache's SQLite file; keep that off the event loop
+        cached = await run_calendar_io(response_cache.get, message)
+        if cached is not None:
+            return {"output": cached}
+
+    from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
+    prompt = system_prompt
+    if state.get("summary"):
+        prompt += f"\nEarlier in this conversation: {state['summary']}\n"
+    messages = [SystemMessage(content=prompt)]
+    for turn in history:
+        messages.append(HumanMessage(content=turn["content"]) if turn["role"] == "user" else AIMessage(content=turn["content"]))
+    messages.append(HumanMessage(content=message))
+
+    try:
+        with span("llm"):
+            response = await llm_gateway.ainvoke(messages)
+    except LLMUnavailable:
+        return {"output": "⚠️ I'm getting a lot of requests right now. Please try again in a moment."}
+    if not history:
+        await run_calendar_io(response_cache.put, message, response.content)
+    return {"output": response.content}
+
+
+@timed("node.remember")
+async def remember_node(state):
+    """Append this turn to the session history, keeping it within CHAT_HISTORY_TOKENS."""
+    history = (state.get("history") or []) + [
+        {"role": "user", "content": state["input"]},
+        {"role": "assistant", "content": state["output"]},
+    ]
+    history, summary = await compact_history(history, state.get("summary") or "", summarize_turns)
+    return {"history": history, "summary": summary}
+
+
+async def summarize_turns(summary, turns):
+    """Fold turns that no longer fit the history budget into the running summary."""
+    from langchain_core.messages import HumanMessage, SystemMessage
+
+    transcript = "\n".join(f"{turn['role']}: {turn['content']}" for turn in turns)[-CHAT_HISTORY_TOKENS * 4:]
+    messages = [
+        SystemMessage(content=(
+            "Update the running summary of a conversation between a user and their scheduling "
+            "assistant. Keep names, dates, times and unfinished requests. Reply with the summary "
+            "only, in under 60 words."
+        )),
+        HumanMessage(content=f"Summary so far: {summary or '(none)'}\n\nNew turns:\n{transcript}"),
+    ]
+    with span("summarize"):
+        # nostream keeps the summary out of token streams sent to clients
+        response = await llm_gateway.ainvoke(messages, config={"tags": ["nostream"]}, method="summarize")
+    return response.content
+
+
 # ✅ LangGraph setup
 class ChatState(TypedDict):
     input: str
     output: str
+    result: Optional[dict]  # structured booking/fetch data for streaming clients
+    user_id: Optional[str]  # whose calendar; None for the token.json account
+    history: list  # earlier turns as {"role", "content"}, within CHAT_HISTORY_TOKENS
+    summary: str  # summary of turns trimmed from history
+    context: dict  # last date/person/duration discussed, for follow-ups
+    # Set by parse for the branch nodes
+    intent: str
+    when: Optional[datetime]
+    has_time: bool  # when includes a time of day
+    person: str
+    duration: int
+    remember: bool
+
+
+BRANCHES = {
+    "book": book_node,
+    "suggest": suggest_node,
+    "fetch": fetch_node,
+    "clarify": clarify_node,
+    "local": local_node,
+    "chat": chat_node,
+}
+
+
+def build_graph(checkpointer=None):
+    """
+    parse -> one branch chosen by route() -> remember (only for sessions).
+    Each branch does only its own I/O: chat never touches the calendar and
+    calendar branches never call the LLM.
+    """
+    from langgraph.graph import StateGraph, END
+
+    graph = StateGraph(ChatState)
+    graph.add_node("parse", parse_node)
+    graph.add_node("remember", remember_node)
+    graph.set_entry_point("parse")
+    graph.add_conditional_edges("parse", route, {name: name for name in BRANCHES})
+    for name, node in BRANCHES.items():
+        graph.add_node(name, node)
+        graph.add_conditional_edges(name, after_reply, {"remember": "remember", "__end__": END})
+    graph.add_edge("remember", END)
+    return graph.compile(checkpointer=checkpointer)
+
+
+def get_graph(with_memory=False):
+    """
+    Return the compiled chat graph, building it on first use. The memory
+    variant checkpoints state per session (CHAT_MEMORY backend) and must be
+    invoked with chat_config(session_id, user_id).
+    """
+    graph = _graphs.get(with_memory)
+    if graph is None:
+        with _init_lock:
+            graph = _graphs.get(with_memory)
+            if graph is None:
+                graph = _graphs[with_memory] = build_graph(create_checkpointer() if with_memory else None)
+    return graph
+
+
+def chat_config(session_id=None, user_id=None):
+    if session_id is None:
+        return None
+    return {"configurable": {"thread_id": thread_id(session_id, user_id)}}
+
+
+async def run_chat(message, user_id=None, session_id=None):
+    """Run one chat turn; with a session_id earlier turns of that session are remembered."""
+    graph = get_graph(with_memory=session_id is not None)
+    return await graph.ainvoke({"input": message, "user_id": user_id}, chat_config(session_id, user_id))
+
+
+async def stream_chat(message, user_id=None, session_id=None):
+    """
+    Run one chat turn and yield (event, data) pairs as they happen.
+
+    "token" events carry LLM text as it is generated, "result" carries
+    structured booking/fetch data, "reply" the final text and "done" the
+    time to first token, total time and time per graph node in milliseconds.
+    "reset" comes before a reply that replaces the tokens sent so far (the
+    LLM failed part way through).
+    """
+    started = perf_counter()
+    first_output = None
+    streamed = []
+    node_started = started
+    nodes = {}
+
+    graph = get_graph(with_memory=session_id is not None)
+    async for mode, chunk in graph.astream(
+        {"input": message, "user_id": user_id}, chat_config(session_id, user_id),
+        stream_mode=["messages", "updates"]
+    ):
+        if mode == "messages":
+            token, _metadata = chunk
+            if token.content:
+                if first_output is None:
+                    first_output = perf_counter()
+                streamed.append(token.content)
+                yield "token", {"text": token.content}
+            continue
+
+        now = perf_counter()
+        for node, update in chunk.items():
+            nodes[node] = round((now - node_started) * 1000, 1)
+            if not update or "output" not in update:
+                continue
+            if first_output is None:
+                first_output = perf_counter()
+            if update.get("result"):
+                yield "result", update["result"]
+            if streamed and "".join(streamed) != update["output"]:
+                yield "reset", {}
+            streamed = []
+            yield "reply", {"reply": update["output"]}
+        node_started = now
+
+    finished = perf_counter()
+    yield "done", {
+        "ttft_ms": round(((first_output or finished) - started) * 1000, 1),
+        "total_ms": round((finished - started) * 1000, 1),
+        "nodes_ms": nodes,
+    }
+
 
-graph = StateGraph(ChatState)
-graph.add_node("process", process_message)
-graph.set_entry_point("process")
-graph.set_finish_point("process")
-compiled_graph = graph.compile()
+async def warm_up():
+    """
+    Pay one-off startup costs before the first request does: import and build
+    the model and graphs, load dateparser's locale data and build the calendar
+    service. Nothing here calls Groq or sends a Calendar request.
+    """
+    with span("warmup"):
+        get_llm()
+        get_graph()
+        get_graph(with_memory=True)
+        analyze_message("book a meeting tomorrow at 3pm")
+        if response_cache.embed:
+            # Loads the sentence-transformers model (RESPONSE_CACHE_EMBEDDINGS=1)
+            await run_calendar_io(response_cache.embed, "warm up")
+        await run_calendar_io(get_calendar_service)
@@ -0,0 +1,108 @@
+import os
+import time
+import random
+from googleapiclient.errors import HttpError
+from ai_agent.metrics import metrics, span
+
+# Google's batch endpoint accepts at most 50 calls per request
+BATCH_MAX_SIZE = 50
+BATCH_RETRIES = int(os.getenv("CALENDAR_BATCH_RETRIES", "3"))
+
+_RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+_RETRYABLE_REASONS = ("rateLimitExceeded", "userRateLimitExceeded")
+
+
+def _is_retryable(error):
+    if not isinstance(error, HttpError):
+        return False
+    if error.resp.status in _RETRYABLE_STATUS:
+        return True
+    return error.resp.status == 403 and any(reason in str(error) for reason in _RETRYABLE_REASONS)
+
+
+class CalendarBatch:
+    """
+    Collects Calendar API calls and sends them as batch HTTP requests.
+
+    Calls are grouped into new_batch_http_request() batches of up to 50.
+    Items that fail with a rate-limit or server error are retried in a
+    later batch with jittered exponential backoff, so inserts should carry
+    a client-chosen event id: a 5xx can arrive after Google stored the
+    event, and the retry then fails with 409 instead of duplicating it.
+    execute() returns one result per key: {"success": True, "response": ...}
+    or {"success": False, "error": ..., "status": HTTP status or None}.
+    """
+
+    def __init__(self, service, max_size=BATCH_MAX_SIZE, retries=BATCH_RETRIES):
+        self.service = service
+        self.max_size = max_size
+        self.retries = retries
+        self._requests = {}
+
+    def add(self, request, key=None):
+        """Queue an unexecuted API request; returns the key its result will be stored under."""
+        key = str(len(self._requests)) if key is None else str(key)
+        self._requests[key] = request
+        return key
+
+    def insert_event(self, body, calendar_id='primary', key=None):
+        return self.add(self.service.events().insert(calendarId=calendar_id, body=body), key)
+
+    def update_event(self, event_id, body, calendar_id='primary', key=None):
+        return self.add(self.service.events().patch(calendarId=calendar_id, eventId=event_id, body=body), key)
+
+    def delete_event(self, event_id, calendar_id='primary', key=None):
+        return self.add(self.service.events().delete(calendarId=calendar_id, eventId=event_id), key)
+
+    def list_events(self, time_min, time_max, calendar_id='primary', key=None, **kwargs):
+        return self.add(self.service.events().list(
+            calendarId=calendar_id,
+            timeMin=time_min.isoformat(),
+            timeMax=time_max.isoformat(),
+            singleEvents=True,
+            **kwargs
+        ), key)
+
+    def __len__(self):
+        return len(self._requests)
+
+    def execute(self):
+        results = {}
+        pending = dict(self._requests)
+        attempt = 0
+
+        while pending:
+            retry = {}
+            keys = list(pending)
+            for i in range(0, len(keys), self.max_size):
+                chunk = keys[i:i + self.max_size]
+
+                def callback(request_id, response, exception):
+                    if exception is None:
+                        results[request_id] = {"success": True, "response": response}
+                    elif _is_retryable(exception) and attempt < self.retries:
+                        retry[request_id] = pending[request_id]
+                    else:
+                        status = exception.resp.status if isinstance(exception, HttpError) else None
+                        results[request_id] = {"success": False, "error": str(exception), "status": status}
+
+                batch = self.service.new_batch_http_request(callback=callback)
+                for key in chunk:
+                    batch.add(pending[key], request_id=key)
+                try:
+                    metrics.inc("external_calls_total", help_text="Calls to external services",
+                                service="google_calendar", method="batch")
+                    with span("google.batch"):
+                        batch.execute()
+                except Exception as e:
+                    # The whole batch request failed; treat every item in it alike
+                    for key in chunk:
+                        callback(key, None, e)
+
+            pending = retry
+            if pending:
+                attempt += 1
+                time.sleep(min(2 ** attempt, 30) * (0.5 + random.random() / 2))
+
+        self._requests = {}
+        return results
@@ -0,0 +1,269 @@
+import os
+import json
+import time
+import random
+import asyncio
+import hashlib
+import sqlite3
+import logging
+import datetime
+import threading
+import pytz
+from ai_agent.calendar_io import run_calendar_io
+from ai_agent.metrics import metrics
+
+# BOOKING_QUEUE=1 books meetings in the background instead of inside the chat request
+BOOKING_QUEUE = os.getenv("BOOKING_QUEUE", "0") == "1"
+BOOKING_QUEUE_PATH = os.getenv("BOOKING_QUEUE_PATH", "bookings.db")
+BOOKING_WORKERS = int(os.getenv("BOOKING_WORKERS", "4"))
+BOOKING_MAX_ATTEMPTS = int(os.getenv("BOOKING_MAX_ATTEMPTS", "5"))
+BOOKING_RETRY_BASE = float(os.getenv("BOOKING_RETRY_BASE", "2"))
+BOOKING_RETRY_MAX = 300.0
+# A booking running this long is taken to belong to a worker process that died
+BOOKING_STALE_AFTER = float(os.getenv("BOOKING_STALE_AFTER", "120"))
+
+logger = logging.getLogger(__name__)
+
+
+def booking_key(user_id, start, end, person):
+    """
+    Idempotency key for "book user_id a meeting with person over [start, end)".
+
+    Hex digits are valid Calendar event id characters, so the key doubles as
+    the event id and Google itself rejects a second insert.
+    """
+    text = "|".join([user_id or "", start.isoformat(), end.isoformat(), person.strip().lower()])
+    return hashlib.sha256(text.encode()).hexdigest()[:32]
+
+
+def _retryable(result):
+    # No status: the service was unavailable or the call never reached Google
+    status = result.get("status")
+    return status is None or status in (408, 429) or status >= 500
+
+
+class BookingQueue:
+    """
+    Persistent queue of bookings to create, one SQLite row per idempotency key.
+
+    A row moves pending -> running -> done, or back to pending with a later
+    next_attempt after a retryable error, or to failed. Rows left running by
+    a crashed process are claimed again once BOOKING_STALE_AFTER has passed;
+    that is safe because the key is also the event id.
+    """
+
+    def __init__(self, path=BOOKING_QUEUE_PATH, max_attempts=BOOKING_MAX_ATTEMPTS):
+        self.path = path
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS bookings ("
+                " key TEXT PRIMARY KEY,"
+                " user_id TEXT,"
+                " request_json TEXT NOT NULL,"
+                " status TEXT NOT NULL,"
+                " attempts INTEGER NOT NULL DEFAULT 0,"
+                " next_attempt REAL NOT NULL,"
+                " result_json TEXT,"
+                " error TEXT,"
+                " created_at REAL NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS bookings_due ON bookings (status, next_attempt)")
+            self._conn = conn
+        return self._conn
+
+    def enqueue(self, key, user_id, request):
+        """
+        Add a booking unless key is already queued or booked. A failed
+        booking asked for again is queued afresh.
+
+        Args:
+            key: booking_key() of the request
+            user_id: whose calendar
+            request: JSON-able book_meeting keyword arguments
+
+        Returns:
+            (booking dict, True if this call queued it)
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            created = conn.execute(
+                "INSERT INTO bookings (key, user_id, request_json, status, next_attempt, created_at, updated_at) "
+                "VALUES (?, ?, ?, 'pending', ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET status = 'pending', attempts = 0, error = NULL,"
+                " next_attempt = excluded.next_attempt, updated_at = excluded.updated_at "
+                "WHERE bookings.status = 'failed'",
+                (key, user_id, json.dumps(request), now, now, now)
+            ).rowcount == 1
+            row = conn.execute("SELECT * FROM bookings WHERE key = ?", (key,)).fetchone()
+        self._gauge()
+        return self._public(row), created
+
+    def get(self, key):
+        with self._lock:
+            row = self._connection().execute("SELECT * FROM bookings WHERE key = ?", (key,)).fetchone()
+        return self._public(row) if row else None
+
+    def claim(self):
+        """Mark the next due (or abandoned) booking running and return (key, user_id, request), or None."""
+        now = time.time()
+        with self._lock:
+            # One statement, so workers in other processes cannot claim the same row
+            row = self._connection().execute(
+                "UPDATE bookings SET status = 'running', attempts = attempts + 1, updated_at = ? "
+                "WHERE key = (SELECT key FROM bookings "
+                "WHERE (status = 'pending' AND next_attempt <= ?) OR (status = 'running' AND updated_at <= ?) "
+                "ORDER BY next_attempt LIMIT 1) "
+                "RETURNING key, user_id, request_json", (now, now, now - BOOKING_STALE_AFTER)
+            ).fetchone()
+        if row is None:
+            return None
+        return row["key"], row["user_id"], json.loads(row["request_json"])
+
+    def finish(self, key, result):
+        """Record book_meeting's result: done, retried later, or failed for good."""
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            attempts = conn.execute("SELECT attempts FROM bookings WHERE key = ?", (key,)).fetchone()[0]
+            if result.get("success"):
+                status, delay = "done", 0.0
+            elif attempts < self.max_attempts and _retryable(result):
+                status = "pending"
+                delay = min(BOOKING_RETRY_MAX, BOOKING_RETRY_BASE * 2 ** (attempts - 1)) * random.uniform(0.5, 1.5)
+            else:
+                status, delay = "failed", 0.0
+            conn.execute(
+                "UPDATE bookings SET status = ?, next_attempt = ?, result_json = ?, error = ?, updated_at = ? "
+                "WHERE key = ?",
+                (status, now + delay, json.dumps(result) if result.get("success") else None,
+                 result.get("error"), now, key)
+            )
+        metrics.inc("bookings_total", help_text="Queued booking attempts by outcome", status=status)
+        self._gauge()
+        return status
+
+    def pending(self):
+        with self._lock:
+            return self._connection().execute(
+                "SELECT COUNT(*) FROM bookings WHERE status IN ('pending', 'running')"
+            ).fetchone()[0]
+
+    def _gauge(self):
+        metrics.set("booking_queue_depth", self.pending(), "Bookings waiting or in progress")
+
+    @staticmethod
+    def _public(row):
+        return {
+            "id": row["key"],
+            "status": row["status"],
+            "attempts": row["attempts"],
+            "booking": json.loads(row["result_json"]) if row["result_json"] else None,
+            "error": row["error"],
+            "user_id": row["user_id"],
+        }
+
+
+class BookingWorkers:
+    """
+    Pool of asyncio tasks draining a BookingQueue. Each booking is made by
+    book_meeting on the calendar I/O pool, with the key as event id.
+    """
+
+    def __init__(self, queue, workers=BOOKING_WORKERS):
+        self.queue = queue
+        self.workers = workers
+        self._tasks = []
+        self._wake = None
+
+    def start(self):
+        self._wake = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self):
+        """Wake idle workers after an enqueue."""
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _run(self):
+        from ai_agent.calendar_setup import book_meeting
+        from ai_agent.calendar_client import get_calendar_client
+
+        while True:
+            try:
+                job = await run_calendar_io(self.queue.claim)
+                if job is None:
+                    self._wake.clear()
+                    try:
+                        # Retries come due on their own; wake for them every second
+                        await asyncio.wait_for(self._wake.wait(), 1.0)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                key, user_id, request = job
+                result = await run_calendar_io(
+                    book_meeting,
+                    datetime.datetime.fromisoformat(request["start"]),
+                    datetime.datetime.fromisoformat(request["end"]),
+                    summary=request["summary"],
+                    description=request.get("description", ""),
+                    timezone=request.get("timezone", "Asia/Kolkata"),
+                    user_id=user_id,
+                    event_id=key,
+                )
+                status = await run_calendar_io(self.queue.finish, key, result)
+                if status != "pending":
+                    # Holds live in the SharedCache's SQLite file, so keep them off the loop too
+                    await run_calendar_io(
+                        get_calendar_client(user_id).freebusy.release,
+                        datetime.datetime.fromisoformat(request["start"]),
+                        datetime.datetime.fromisoformat(request["end"]),
+                        'primary'
+                    )
+                logger.info("queued booking processed", extra={"booking_id": key, "status": status})
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("booking worker error")
+                await asyncio.sleep(1.0)
+
+
+booking_queue = BookingQueue()
+booking_workers = BookingWorkers(booking_queue)
+
+
+async def submit_booking(start, end, summary, person, user_id=None, timezone='Asia/Kolkata'):
+    """
+    Queue a booking and return its status dict at once. The slot is held
+    busy right away so later conflict checks see it before Google does.
+    """
+    from ai_agent.calendar_client import get_calendar_client
+
+    key = booking_key(user_id, start, end, person)
+    if start.tzinfo is None:
+        tz = pytz.timezone(timezone)
+        start, end = tz.localize(start), tz.localize(end)
+    request = {"start": start.isoformat(), "end": end.isoformat(), "summary": summary, "timezone": timezone}
+    booking, created = await run_calendar_io(booking_queue.enqueue, key, user_id, request)
+    if created:
+        await run_calendar_io(get_calendar_client(user_id).freebusy.hold, start, end, 'primary')
+        booking_workers.notify()
+    metrics.inc("bookings_submitted_total", help_text="Bookings handed to the queue",
+                result="queued" if created else "duplicate")
+    return booking
@@ -0,0 +1,287 @@
+import os
+import json
+import pickle
+import datetime
+import threading
+import logging
+import functools
+from collections import OrderedDict
+from ai_agent.metrics import metrics, span
+from ai_agent.event_store import EventStore, event_store
+from ai_agent.freebusy import FreeBusyEngine, freebusy_engine
+from ai_agent.credential_store import credential_store
+from ai_agent.shared_cache import shared_cache
+
+# Scopes required for calendar access
+SCOPES = ['https://www.googleapis.com/auth/calendar']
+
+# Refresh the access token this long before Google would reject it
+REFRESH_MARGIN = datetime.timedelta(minutes=5)
+
+# Live per-user clients kept in memory (least recently used are dropped)
+CALENDAR_CLIENT_CACHE_SIZE = int(os.getenv("CALENDAR_CLIENT_CACHE_SIZE", "256"))
+
+logger = logging.getLogger(__name__)
+
+
+# The Google client libraries cost ~0.4s to import; they are loaded when the
+# first service is built, not when this module is imported.
+
+@functools.lru_cache(maxsize=1)
+def _instrumented_request_class():
+    from googleapiclient.http import HttpRequest
+
+    class _InstrumentedRequest(HttpRequest):
+        """HttpRequest that counts and times every Calendar API call."""
+
+        def execute(self, http=None, num_retries=0):
+            metrics.inc("external_calls_total", help_text="Calls to external services",
+                        service="google_calendar", method=self.methodId)
+            with span(f"google.{self.methodId}"):
+                return super().execute(http=http, num_retries=num_retries)
+
+    return _InstrumentedRequest
+
+
+@functools.lru_cache(maxsize=1)
+def _discovery_document():
+    """Calendar v3 discovery document bundled with googleapiclient, read from disk once."""
+    from googleapiclient.discovery_cache import get_static_doc
+    # Kept as text: build_from_document adjusts the parsed dict in place
+    return get_static_doc('calendar', 'v3')
+
+
+class CalendarClient:
+    """
+    Long-lived Google Calendar client for one account.
+
+    Credentials and the built service are kept in memory; the access token is
+    refreshed proactively (single-flight, under this client's lock) shortly
+    before it expires. Each thread gets its own authorized HTTP connection
+    because httplib2 connections are not thread-safe. The client also owns the
+    account's event and free/busy caches.
+    """
+
+    def __init__(self, token_path='token.json', pickle_path='token.pkl', refresh_margin=REFRESH_MARGIN,
+                 events=None, freebusy=None):
+        self.token_path = token_path
+        self.pickle_path = pickle_path
+        self.refresh_margin = refresh_margin
+        self.event_store = events or EventStore()
+        self.freebusy = freebusy or FreeBusyEngine()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._creds = None
+        self._service = None
+
+    def service(self):
+        """Return the shared calendar service, loading or refreshing credentials if needed."""
+        if self._service is not None and not self._needs_refresh():
+            return self._service
+
+        with self._lock:
+            # Another thread may have done the work while we waited
+            if self._creds is None:
+                self._creds = self._load_credentials()
+                if self._creds is None:
+                    return None
+
+            if self._needs_refresh() and not self._refresh():
+                return None
+
+            if self._service is None:
+                try:
+                    self._service = self._build_service()
+                    logger.info("calendar service ready")
+                except Exception as e:
+                    logger.error("failed to build calendar service", extra={"error": str(e)})
+                    return None
+            return self._service
+
+    def reset(self):
+        """Drop cached credentials and service so the next call reloads them from disk."""
+        with self._lock:
+            self._creds = None
+            self._service = None
+            self._local = threading.local()
+
+    def _needs_refresh(self):
+        creds = self._creds
+        if creds is None:
+            return True
+        if not creds.token:
+            return True
+        if creds.expiry is None:
+            return False
+        # google-auth stores expiry as naive UTC
+        now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+        return creds.expiry - now <= self.refresh_margin
+
+    def _load_credentials(self):
+        """Load credentials from token.json, falling back to the pickled token.pkl."""
+        if os.path.exists(self.token_path):
+            try:
+                with open(self.token_path, 'r') as token_file:
+                    token_data = json.load(token_file)
+
+                if 'installed' in token_data:
+                    logger.error("token.json contains client credentials; run generate_token_from_credentials() first")
+                else:
+                    from google.oauth2.credentials import Credentials
+                    creds = Credentials.from_authorized_user_info(token_data, SCOPES)
+                    logger.info("loaded credentials", extra={"source": self.token_path})
+                    return creds
+            except Exception as e:
+                logger.error("error loading credentials", extra={"source": self.token_path, "error": str(e)})
+
+        if os.path.exists(self.pickle_path):
+            try:
+                with open(self.pickle_path, 'rb') as token_file:
+                    creds = pickle.load(token_file)
+                logger.info("loaded credentials", extra={"source": self.pickle_path})
+                return creds
+            except Exception as e:
+                logger.error("error loading credentials", extra={"source": self.pickle_path, "error": str(e)})
+
+        logger.error("no usable calendar credentials found")
+        return None
+
+    def _refresh(self):
+        creds = self._creds
+        if not creds.refresh_token:
+            logger.error("credentials expiring and no refresh token available; regenerate token.json")
+            return False
+
+        from google.auth.transport.requests import Request
+        try:
+            creds.refresh(Request())
+            logger.info("calendar credentials refreshed", extra={"expiry": creds.expiry})
+        except Exception as e:
+            logger.error("error refreshing credentials", extra={"error": str(e)})
+            return False
+
+        self._save_credentials()
+        return True
+
+    def _save_credentials(self):
+        if not os.path.exists(self.token_path):
+            return
+        try:
+            with open(self.token_path, 'w') as token_file:
+                token_file.write(self._creds.to_json())
+        except Exception as e:
+            logger.warning("could not update token.json", extra={"error": str(e)})
+
+    def _authorized_http(self):
+        # One connection per thread; credentials object is shared
+        http = getattr(self._local, 'http', None)
+        if http is None or http.credentials is not self._creds:
+            import httplib2
+            import google_auth_httplib2
+            http = google_auth_httplib2.AuthorizedHttp(self._creds, http=httplib2.Http())
+            self._local.http = http
+        return http
+
+    def _build_service(self):
+        from googleapiclient.discovery import build_from_document
+
+        request_class = _instrumented_request_class()
+
+        def request_builder(_http, *args, **kwargs):
+            return request_class(self._authorized_http(), *args, **kwargs)
+
+        # Static discovery: no network fetch of the API description at startup
+        return build_from_document(
+            _discovery_document(),
+            http=self._authorized_http(),
+            requestBuilder=request_builder,
+        )
+
+
+class StoredCalendarClient(CalendarClient):
+    """CalendarClient whose token lives in the credential store under user_id."""
+
+    def __init__(self, user_id, store=credential_store, refresh_margin=REFRESH_MARGIN):
+        # Caches are shared with other worker processes under the user's namespace
+        super().__init__(
+            token_path=None, pickle_path=None, refresh_margin=refresh_margin,
+            events=EventStore(shared=shared_cache, namespace=f"user:{user_id}"),
+            freebusy=FreeBusyEngine(shared=shared_cache, namespace=f"user:{user_id}"),
+        )
+        self.user_id = user_id
+        self.store = store
+
+    def _load_credentials(self):
+        try:
+            token_data = self.store.load(self.user_id)
+        except Exception as e:
+            logger.error("error loading credentials", extra={"user_id": self.user_id, "error": str(e)})
+            return None
+        if token_data is None:
+            logger.warning("no calendar credentials for user", extra={"user_id": self.user_id})
+            return None
+
+        from google.oauth2.credentials import Credentials
+        return Credentials.from_authorized_user_info(token_data, SCOPES)
+
+    def _save_credentials(self):
+        try:
+            self.store.save(self.user_id, self._creds.to_json())
+        except Exception as e:
+            logger.warning("could not store refreshed credentials", extra={"user_id": self.user_id, "error": str(e)})
+
+
+class CalendarClientPool:
+    """
+    LRU of live per-user clients, so each request reuses its user's built
+    service, warm HTTP connections and caches. A user_id of None means the
+    single-tenant account from token.json.
+    """
+
+    def __init__(self, default, store=credential_store, max_size=CALENDAR_CLIENT_CACHE_SIZE):
+        self.default = default
+        self.store = store
+        self.max_size = max_size
+        self._clients = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id=None):
+        if user_id is None:
+            return self.default
+
+        with self._lock:
+            client = self._clients.get(user_id)
+            if client is not None:
+                self._clients.move_to_end(user_id)
+                return client
+
+            client = StoredCalendarClient(user_id, self.store)
+            self._clients[user_id] = client
+            if len(self._clients) > self.max_size:
+                self._clients.popitem(last=False)
+            metrics.set("calendar_clients", len(self._clients), "Live per-user calendar clients")
+            return client
+
+    def user_ids(self):
+        """Users with a live client, most recently used last."""
+        with self._lock:
+            return list(self._clients)
+
+    def discard(self, user_id):
+        """Forget a user's client, e.g. after their credentials were replaced or revoked."""
+        with self._lock:
+            self._clients.pop(user_id, None)
+
+
+# Single-tenant client (token.json) and the per-user clients
+default_client = CalendarClient(events=event_store, freebusy=freebusy_engine)
+calendar_clients = CalendarClientPool(default_client)
+
+
+def get_calendar_client(user_id=None):
+    return calendar_clients.get(user_id)
+
+
+def get_calendar_service(user_id=None):
+    """Return the user's authenticated calendar service (or None if unavailable)."""
+    return calendar_clients.get(user_id).service()
@@ -0,0 +1,22 @@
+import os
+import asyncio
+import functools
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+# googleapiclient is blocking; calendar calls run on this bounded pool so they
+# never tie up the event loop or the default executor shared with FastAPI.
+CALENDAR_IO_WORKERS = int(os.getenv("CALENDAR_IO_WORKERS", "16"))
+
+calendar_executor = ThreadPoolExecutor(
+    max_workers=CALENDAR_IO_WORKERS,
+    thread_name_prefix="calendar-io",
+)
+
+
+async def run_calendar_io(func, *args, **kwargs):
+    """Run a blocking calendar function on the calendar I/O pool and await its result."""
+    loop = asyncio.get_running_loop()
+    # Carry the request context (e.g. Server-Timing spans) into the worker thread
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(calendar_executor, ctx.run, functools.partial(func, *args, **kwargs))
@@ -1,84 +1,30 @@
 import os
 import json
 import datetime
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
+import logging
 from googleapiclient.errors import HttpError
 import pytz
+from ai_agent.calendar_client import SCOPES, get_calendar_client
+from ai_agent.event_store import EVENT_FIELDS
+from ai_agent.event_model import Event
+from ai_agent.batch import CalendarBatch
+from ai_agent.booking_queue import booking_key
+from ai_agent.metrics import timed
 
-# Scopes required for calendar access
-SCOPES = ['https://www.googleapis.com/auth/calendar']
+logger = logging.getLogger(__name__)
 
-def authenticate_google_calendar():
+def authenticate_google_calendar(user_id=None):
     """
-    Authenticate and return Google Calendar service object.
-    Uses token.json for production authentication without UI flow.
+    Return the Google Calendar service object for user_id.
+    Credentials come from the credential store (or token.json / token.pkl
+    when user_id is None) and are loaded once, kept in memory and refreshed
+    before they expire by CalendarClient.
     """
-    creds = None
-    
-    # Load credentials from token.json
-    if os.path.exists('token.json'):
-        try:
-            with open('token.json', 'r') as token_file:
-                token_data = json.load(token_file)
-                
-                # Check if it's the credentials.json format (with "installed" key)
-                if 'installed' in token_data:
-                    print("❌ token.json contains credentials.json format")
-                    print("📝 You need an actual access token, not client credentials")
-                    print("💡 Run generate_token_from_credentials() first to create proper token.json")
-                    return None
-                
-                # Load as authorized user credentials
-                creds = Credentials.from_authorized_user_info(token_data, SCOPES)
-                print("✅ Loaded credentials from token.json")
-        except Exception as e:
-            print(f"❌ Error loading token.json: {e}")
-            return None
-    else:
-        print("❌ token.json file not found!")
-        print("📝 Please ensure token.json contains valid OAuth2 credentials")
-        return None
-    
-    # Check if credentials are valid and refresh if needed
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            try:
-                print("🔄 Refreshing expired credentials...")
-                creds.refresh(Request())
-                print("✅ Credentials refreshed successfully")
-                
-                # Save refreshed credentials back to token.json
-                try:
-                    with open('token.json', 'w') as token_file:
-                        json.dump(creds.to_json(), token_file, indent=2)
-                        print("✅ Updated token.json with refreshed credentials")
-                except Exception as e:
-                    print(f"⚠️ Could not update token.json: {e}")
-                    
-            except Exception as e:
-                print(f"❌ Error refreshing credentials: {e}")
-                print("📝 Please regenerate token.json with valid credentials")
-                return None
-        else:
-            print("❌ Invalid credentials and no refresh token available")
-            print("📝 Please regenerate token.json with valid credentials")
-            return None
-    
-    try:
-        service = build('calendar', 'v3', credentials=creds)
-        # Test the connection
-        service.calendarList().list().execute()
-        print("✅ Google Calendar service connected successfully")
-        return service
-    except Exception as e:
-        print(f"❌ Failed to build calendar service: {e}")
-        return None
+    return get_calendar_client(user_id).service()
 
-def get_calendar_service():
+def get_calendar_service(user_id=None):
     """Get authenticated calendar service with better error handling."""
-    return authenticate_google_calendar()
+    return authenticate_google_calendar(user_id)
 
 def test_calendar_connection():
     """Test if calendar connection is working."""
@@ -105,20 +51,23 @@ def test_calendar_connection():
         print(f"❌ Unexpected error: {e}")
         return False
 
-def get_events_for_date(date, timezone='Asia/Kolkata'):
+@timed("calendar.get_events_for_date")
+def get_events_for_date(date, timezone='Asia/Kolkata', user_id=None):
     """
     Get all events for a specific date with improved error handling.
     
     Args:
         date: datetime.date object
         timezone: timezone string (default: Asia/Kolkata)
+        user_id: whose calendar (None for the token.json account)
     
     Returns:
-        List of events or empty list if error
+        List of Event objects or empty list if error
     """
-    service = get_calendar_service()
+    client = get_calendar_client(user_id)
+    service = client.service()
     if not service:
-        print("❌ Calendar service not available")
+        logger.error("calendar service not available")
         return []
     
     try:
@@ -129,34 +78,27 @@ def get_events_for_date(date, timezone='Asia/Kolkata'):
         start_dt = tz.localize(datetime.datetime.combine(date, datetime.time.min))
         end_dt = tz.localize(datetime.datetime.combine(date, datetime.time.max))
         
-        print(f"🔍 Fetching events for {date} ({timezone})")
+        # Served from the local event store; Google is only asked for changes
+        events = client.event_store.get_events(service, start_dt, end_dt)
+        logger.info("events for date", extra={"date": date.isoformat(), "events": len(events)})
         
-        events_result = service.events().list(
-            calendarId='primary',
-            timeMin=start_dt.isoformat(),
-            timeMax=end_dt.isoformat(),
-            singleEvents=True,
-            orderBy='startTime'
-        ).execute()
-        
-        events = events_result.get('items', [])
-        print(f"✅ Found {len(events)} events for {date}")
-        
-        # Print event details for debugging
-        for event in events:
-            start = event['start'].get('dateTime', event['start'].get('date'))
-            print(f"   📋 {event.get('summary', 'No title')}: {start}")
+        # Per-event detail only when debugging (and sampled)
+        if logger.isEnabledFor(logging.DEBUG):
+            for event in events:
+                logger.debug("event", extra={"summary": event.summary, "start": event.start_iso})
         
         return events
         
     except HttpError as e:
-        print(f"❌ Calendar API error: {e}")
+        logger.error("calendar API error", extra={"error": str(e)})
         return []
     except Exception as e:
-        print(f"❌ Error fetching events: {e}")
+        logger.exception("error fetching events")
         return []
 
-def find_free_slots(date, slot_duration_minutes=60, work_start_hour=9, work_end_hour=17, timezone='Asia/Kolkata'):
+@timed("calendar.find_free_slots")
+def find_free_slots(date, slot_duration_minutes=60, work_start_hour=9, work_end_hour=17, timezone='Asia/Kolkata',
+                    user_id=None):
     """
     Find free time slots on a given date.
     
@@ -166,65 +108,210 @@ def find_free_slots(date, slot_duration_minutes=60, work_start_hour=9, work_end_
         work_start_hour: start of work day (24-hour format)
         work_end_hour: end of work day (24-hour format)
         timezone: timezone string
+        user_id: whose calendar (None for the token.json account)
     
     Returns:
         List of free time slots as (start_datetime, end_datetime) tuples
     """
-    events = get_events_for_date(date, timezone)
-    if events is None:
+    client = get_calendar_client(user_id)
+    service = client.service()
+    if not service:
+        logger.error("calendar service not available")
         return []
     
     tz = pytz.timezone(timezone)
-    work_start = tz.localize(datetime.datetime.combine(date, datetime.time(work_start_hour, 0)))
-    work_end = tz.localize(datetime.datetime.combine(date, datetime.time(work_end_hour, 0)))
-    
-    # Get busy periods
-    busy_periods = []
-    for event in events:
-        start_str = event['start'].get('dateTime')
-        end_str = event['end'].get('dateTime')
-        
-        if start_str and end_str:  # Skip all-day events
-            start_dt = datetime.datetime.fromisoformat(start_str.replace('Z', '+00:00'))
-            end_dt = datetime.datetime.fromisoformat(end_str.replace('Z', '+00:00'))
-            
-            # Convert to local timezone
-            start_dt = start_dt.astimezone(tz)
-            end_dt = end_dt.astimezone(tz)
-            
-            busy_periods.append((start_dt, end_dt))
-    
-    # Sort busy periods by start time
-    busy_periods.sort(key=lambda x: x[0])
-    
-    # Find free slots
-    free_slots = []
-    current_time = work_start
-    
-    for busy_start, busy_end in busy_periods:
-        # Check if there's a free slot before this busy period
-        if current_time < busy_start:
-            slot_duration = busy_start - current_time
-            if slot_duration.total_seconds() >= slot_duration_minutes * 60:
-                free_slots.append((current_time, busy_start))
-        
-        # Move current time to end of busy period
-        current_time = max(current_time, busy_end)
+    day_start = tz.localize(datetime.datetime.combine(date, datetime.time.min))
+    day_end = tz.localize(datetime.datetime.combine(date + datetime.timedelta(days=1), datetime.time.min))
     
-    # Check for free slot after last busy period
-    if current_time < work_end:
-        slot_duration = work_end - current_time
-        if slot_duration.total_seconds() >= slot_duration_minutes * 60:
-            free_slots.append((current_time, work_end))
+    try:
+        # Busy intervals come from the freebusy API, cached per calendar
+        free_slots = client.freebusy.free_slots(
+            service, day_start, day_end, slot_duration_minutes,
+            work_start_hour=work_start_hour, work_end_hour=work_end_hour, timezone=timezone
+        )
+    except HttpError as e:
+        logger.error("calendar API error", extra={"error": str(e)})
+        return []
+    except Exception:
+        logger.exception("error fetching free/busy")
+        return []
     
-    print(f"✅ Found {len(free_slots)} free slots of {slot_duration_minutes}+ minutes")
-    for i, (start, end) in enumerate(free_slots, 1):
-        duration = (end - start).total_seconds() / 60
-        print(f"   🆓 Slot {i}: {start.strftime('%H:%M')} - {end.strftime('%H:%M')} ({duration:.0f} mins)")
+    logger.info("free slots", extra={
+        "date": date.isoformat(), "slots": len(free_slots), "min_minutes": slot_duration_minutes
+    })
+    if logger.isEnabledFor(logging.DEBUG):
+        for start, end in free_slots:
+            logger.debug("free slot", extra={"start": start.isoformat(), "end": end.isoformat()})
     
     return free_slots
 
-def book_meeting(start_datetime, end_datetime, summary="Meeting", description="", timezone='Asia/Kolkata'):
+@timed("calendar.suggest_times")
+def suggest_times(start_date, days=7, duration_minutes=30, calendar_ids=('primary',), limit=3,
+                  work_start_hour=9, work_end_hour=17, timezone='Asia/Kolkata', user_id=None):
+    """
+    Suggest meeting times free on every calendar in calendar_ids.
+    
+    Args:
+        start_date: datetime.date to start searching from
+        days: number of days to search
+        duration_minutes: meeting length in minutes
+        calendar_ids: calendars that all have to be free
+        limit: maximum number of suggestions
+        work_start_hour: start of work day (24-hour format)
+        work_end_hour: end of work day (24-hour format)
+        timezone: timezone string
+        user_id: whose calendar (None for the token.json account)
+    
+    Returns:
+        List of (start_datetime, end_datetime) tuples, earliest first
+    """
+    client = get_calendar_client(user_id)
+    service = client.service()
+    if not service:
+        logger.error("calendar service not available")
+        return []
+    
+    tz = pytz.timezone(timezone)
+    range_start = max(
+        tz.localize(datetime.datetime.combine(start_date, datetime.time.min)),
+        datetime.datetime.now(tz)
+    )
+    range_end = tz.localize(datetime.datetime.combine(start_date + datetime.timedelta(days=days), datetime.time.min))
+    
+    try:
+        return client.freebusy.suggest_times(
+            service, range_start, range_end, duration_minutes, list(calendar_ids), limit=limit,
+            work_start_hour=work_start_hour, work_end_hour=work_end_hour, timezone=timezone
+        )
+    except HttpError as e:
+        logger.error("calendar API error", extra={"error": str(e)})
+        return []
+    except Exception:
+        logger.exception("error fetching free/busy")
+        return []
+
+@timed("calendar.check_conflict")
+def check_conflict(start_datetime, end_datetime, calendar_id='primary', alternatives=3, timezone='Asia/Kolkata',
+                   user_id=None, details=True):
+    """
+    Check whether [start_datetime, end_datetime) is free before booking it.
+    
+    Only the requested interval is queried; alternatives are looked up
+    only when it is taken.
+    
+    Args:
+        start_datetime: datetime object for meeting start
+        end_datetime: datetime object for meeting end
+        calendar_id: calendar to check
+        alternatives: number of nearby free slots to offer on conflict
+        timezone: timezone string
+        user_id: whose calendar (None for the token.json account)
+        details: look up overlapping events and alternatives on conflict;
+            callers that fetch them concurrently pass False
+    
+    Returns:
+        Dict with conflict flag, overlapping events and alternative (start, end) tuples.
+        When the calendar could not be checked, conflict is None and error says why;
+        callers must not treat that as free.
+    """
+    client = get_calendar_client(user_id)
+    service = client.service()
+    if not service:
+        return {"conflict": None, "events": [], "alternatives": [], "error": "Calendar service not available"}
+    
+    tz = pytz.timezone(timezone)
+    if start_datetime.tzinfo is None:
+        start_datetime = tz.localize(start_datetime)
+    if end_datetime.tzinfo is None:
+        end_datetime = tz.localize(end_datetime)
+    
+    try:
+        busy = client.freebusy.busy(service, start_datetime, end_datetime, [calendar_id])
+    except HttpError as e:
+        logger.error("calendar API error", extra={"error": str(e)})
+        return {"conflict": None, "events": [], "alternatives": [], "error": str(e)}
+    except Exception as e:
+        # Timeouts, DNS and token refresh failures leave the slot just as unknown
+        logger.exception("error fetching free/busy")
+        return {"conflict": None, "events": [], "alternatives": [], "error": str(e)}
+    
+    if not busy or not details:
+        return {"conflict": bool(busy), "events": [], "alternatives": []}
+    
+    overlapping = get_overlapping_events(start_datetime, end_datetime, calendar_id, timezone, user_id=user_id)
+    candidates = find_alternatives(start_datetime, end_datetime, calendar_id, alternatives, timezone, user_id=user_id)
+    logger.info("booking conflict", extra={"start": start_datetime.isoformat(), "overlapping": len(overlapping)})
+    return {"conflict": True, "events": [event.to_dict() for event in overlapping], "alternatives": candidates}
+
+@timed("calendar.get_overlapping_events")
+def get_overlapping_events(start_datetime, end_datetime, calendar_id='primary', timezone='Asia/Kolkata', user_id=None):
+    """Events overlapping [start_datetime, end_datetime) as Event objects, or [] on error."""
+    service = get_calendar_service(user_id)
+    if not service:
+        return []
+    
+    tz = pytz.timezone(timezone)
+    if start_datetime.tzinfo is None:
+        start_datetime = tz.localize(start_datetime)
+    if end_datetime.tzinfo is None:
+        end_datetime = tz.localize(end_datetime)
+    
+    try:
+        items = service.events().list(
+            calendarId=calendar_id,
+            timeMin=start_datetime.isoformat(),
+            timeMax=end_datetime.isoformat(),
+            singleEvents=True,
+            orderBy='startTime',
+            fields=EVENT_FIELDS
+        ).execute().get('items', [])
+        return [Event.from_google(item) for item in items if item.get('status') != 'cancelled']
+    except HttpError as e:
+        logger.error("calendar API error", extra={"error": str(e)})
+        return []
+    except Exception:
+        logger.exception("error fetching events")
+        return []
+
+@timed("calendar.find_alternatives")
+def find_alternatives(start_datetime, end_datetime, calendar_id='primary', count=3, timezone='Asia/Kolkata',
+                      user_id=None):
+    """
+    Free slots of the same length as [start_datetime, end_datetime) within
+    the next few days, nearest to start_datetime first.
+    """
+    client = get_calendar_client(user_id)
+    service = client.service()
+    if not service or not count:
+        return []
+    
+    tz = pytz.timezone(timezone)
+    if start_datetime.tzinfo is None:
+        start_datetime = tz.localize(start_datetime)
+    if end_datetime.tzinfo is None:
+        end_datetime = tz.localize(end_datetime)
+    duration = end_datetime - start_datetime
+    search_start = max(
+        tz.localize(datetime.datetime.combine(start_datetime.astimezone(tz).date(), datetime.time.min)),
+        datetime.datetime.now(tz)
+    )
+    try:
+        candidates = client.freebusy.suggest_times(
+            service, search_start, search_start + datetime.timedelta(days=3),
+            int(duration.total_seconds() // 60), [calendar_id], limit=48, timezone=timezone
+        )
+    except HttpError as e:
+        logger.error("calendar API error", extra={"error": str(e)})
+        return []
+    except Exception:
+        logger.exception("error fetching free/busy")
+        return []
+    candidates.sort(key=lambda slot: abs((slot[0] - start_datetime).total_seconds()))
+    return candidates[:count]
+
+@timed("calendar.book_meeting")
+def book_meeting(start_datetime, end_datetime, summary="Meeting", description="", timezone='Asia/Kolkata',
+                 user_id=None, event_id=None):
     """
     Book a meeting in the calendar with comprehensive error handling.
     
@@ -234,11 +321,16 @@ def book_meeting(start_datetime, end_datetime, summary="Meeting", description=""
         summary: meeting title
         description: meeting description
         timezone: timezone string
+        user_id: whose calendar (None for the token.json account)
+        event_id: client-chosen event id (base32hex, e.g. a booking key);
+            makes retries safe, as a second insert finds the first event
     
     Returns:
         Dict with success status and event details or error message
+        (with the HTTP status when Google answered with an error)
     """
-    service = get_calendar_service()
+    client = get_calendar_client(user_id)
+    service = client.service()
     if not service:
         return {
             "success": False,
@@ -265,12 +357,29 @@ def book_meeting(start_datetime, end_datetime, summary="Meeting", description=""
                 'timeZone': timezone,
             },
         }
+        if event_id:
+            event['id'] = event_id
         
-        print(f"📅 Booking meeting: {summary}")
-        print(f"   🕐 Start: {start_datetime.strftime('%Y-%m-%d %H:%M %Z')}")
-        print(f"   🕐 End: {end_datetime.strftime('%Y-%m-%d %H:%M %Z')}")
-        
-        created_event = service.events().insert(calendarId='primary', body=event).execute()
+        try:
+            created_event = service.events().insert(calendarId='primary', body=event).execute()
+        except HttpError as e:
+            if not (event_id and e.resp.status == 409):
+                raise
+            # Already created by an earlier attempt
+            created_event = service.events().get(calendarId='primary', eventId=event_id).execute()
+            if created_event.get('status') == 'cancelled':
+                # ...and deleted since; ids stay taken, so book it afresh
+                del event['id']
+                created_event = service.events().insert(calendarId='primary', body=event).execute()
+            else:
+                logger.info("meeting already booked", extra={"event_id": event_id})
+        logger.info("meeting booked", extra={
+            "event_id": created_event.get('id'),
+            "start": start_datetime.isoformat(),
+            "end": end_datetime.isoformat(),
+        })
+        client.event_store.invalidate('primary')
+        client.freebusy.mark_busy(start_datetime, end_datetime, 'primary')
         
         return {
             "success": True,
@@ -283,13 +392,154 @@ def book_meeting(start_datetime, end_datetime, summary="Meeting", description=""
         
     except HttpError as e:
         error_msg = f"Calendar API error: {e}"
-        print(f"❌ {error_msg}")
-        return {"success": False, "error": error_msg}
+        logger.error("booking failed", extra={"error": error_msg})
+        return {"success": False, "error": error_msg, "status": e.resp.status}
     except Exception as e:
         error_msg = f"Unexpected error: {e}"
-        print(f"❌ {error_msg}")
+        logger.error("booking failed", extra={"error": error_msg})
         return {"success": False, "error": error_msg}
 
+@timed("calendar.get_events_for_dates")
+def get_events_for_dates(dates, timezone='Asia/Kolkata', user_id=None):
+    """
+    Get events for several dates, listing uncached days in batch requests.
+    
+    Args:
+        dates: iterable of datetime.date objects
+        timezone: timezone string (default: Asia/Kolkata)
+        user_id: whose calendar (None for the token.json account)
+    
+    Returns:
+        Dict mapping each date to its list of Event objects
+    """
+    client = get_calendar_client(user_id)
+    service = client.service()
+    if not service:
+        logger.error("calendar service not available")
+        return {date: [] for date in dates}
+    
+    tz = pytz.timezone(timezone)
+    results = {}
+    ranges = {}
+    batch = CalendarBatch(service)
+    for date in dates:
+        start_dt = tz.localize(datetime.datetime.combine(date, datetime.time.min))
+        end_dt = tz.localize(datetime.datetime.combine(date + datetime.timedelta(days=1), datetime.time.min))
+        cached = client.event_store.cached_events(start_dt, end_dt)
+        if cached is not None:
+            results[date] = cached
+        else:
+            ranges[batch.list_events(start_dt, end_dt, key=date.isoformat(), maxResults=2500, fields=EVENT_FIELDS)] = (
+                date, start_dt, end_dt
+            )
+    
+    if batch:
+        logger.info("batch listing events", extra={"days": len(batch)})
+    for key, result in batch.execute().items():
+        date, start_dt, end_dt = ranges[key]
+        if not result["success"]:
+            logger.error("error fetching events", extra={"date": date.isoformat(), "error": result['error']})
+            results[date] = []
+            continue
+        
+        response = result["response"]
+        events = response.get('items', [])
+        # Rare for a single day, but follow any remaining pages directly
+        while response.get('nextPageToken'):
+            response = service.events().list(
+                calendarId='primary',
+                timeMin=start_dt.isoformat(),
+                timeMax=end_dt.isoformat(),
+                singleEvents=True,
+                maxResults=2500,
+                fields=EVENT_FIELDS,
+                pageToken=response['nextPageToken']
+            ).execute()
+            events.extend(response.get('items', []))
+        
+        client.event_store.seed(start_dt, end_dt, events, response.get('nextSyncToken'))
+        results[date] = client.event_store.cached_events(start_dt, end_dt) or [
+            Event.from_google(e) for e in events if e.get('status') != 'cancelled'
+        ]
+    
+    return results
+
+@timed("calendar.book_meetings")
+def book_meetings(meetings, timezone='Asia/Kolkata', user_id=None):
+    """
+    Book several meetings using batch requests of up to 50 inserts.
+    
+    Each insert gets a deterministic event id (the meeting's booking key
+    unless event_id is given), so a batch retry after a 5xx that Google
+    had already committed finds the event instead of duplicating it.
+    
+    Args:
+        meetings: list of dicts with start_datetime, end_datetime and
+            optional summary, description and event_id (same as book_meeting)
+        timezone: timezone string
+        user_id: whose calendar (None for the token.json account)
+    
+    Returns:
+        List of result dicts in the same order and shape as book_meeting
+    """
+    client = get_calendar_client(user_id)
+    service = client.service()
+    if not service:
+        return [{"success": False, "error": "Calendar service not available"} for _ in meetings]
+    
+    tz = pytz.timezone(timezone)
+    batch = CalendarBatch(service)
+    prepared = []
+    for meeting in meetings:
+        start_datetime = meeting['start_datetime']
+        end_datetime = meeting['end_datetime']
+        if start_datetime.tzinfo is None:
+            start_datetime = tz.localize(start_datetime)
+        if end_datetime.tzinfo is None:
+            end_datetime = tz.localize(end_datetime)
+        summary = meeting.get('summary', 'Meeting')
+        description = meeting.get('description', '')
+        event_id = meeting.get('event_id') or booking_key(user_id, start_datetime, end_datetime, summary)
+        
+        batch.insert_event({
+            'id': event_id,
+            'summary': summary,
+            'description': description,
+            'start': {'dateTime': start_datetime.isoformat(), 'timeZone': timezone},
+            'end': {'dateTime': end_datetime.isoformat(), 'timeZone': timezone},
+        })
+        prepared.append((summary, description, event_id, start_datetime, end_datetime))
+    
+    logger.info("batch booking meetings", extra={"meetings": len(prepared)})
+    results = batch.execute()
+    client.event_store.invalidate('primary')
+    
+    booked = []
+    for i, (summary, description, event_id, start_datetime, end_datetime) in enumerate(prepared):
+        result = results[str(i)]
+        if not result["success"] and result.get("status") == 409:
+            # Stored by an earlier attempt; book_meeting fetches it (or rebooks it if since deleted)
+            booked.append(book_meeting(start_datetime, end_datetime, summary, description, timezone,
+                                       user_id=user_id, event_id=event_id))
+            continue
+        if not result["success"]:
+            logger.error("booking failed", extra={"summary": summary, "error": result['error']})
+            booked.append({"success": False, "error": f"Calendar API error: {result['error']}"})
+            continue
+        
+        client.freebusy.mark_busy(start_datetime, end_datetime, 'primary')
+        created_event = result["response"]
+        booked.append({
+            "success": True,
+            "event_id": created_event.get('id'),
+            "html_link": created_event.get('htmlLink'),
+            "summary": summary,
+            "start": start_datetime.isoformat(),
+            "end": end_datetime.isoformat()
+        })
+    
+    return booked
+
 # 🧪 Testing functions
 def run_diagnostics():
     """Run comprehensive diagnostics to identify issues."""
@@ -417,6 +667,9 @@ def create_token_json_template():
 
 # Example usage
 if __name__ == "__main__":
+    from ai_agent.logging_setup import configure_logging
+    configure_logging(fmt="text")
+    
     # Check if we need to convert credentials format
     if os.path.exists('token.json'):
         with open('token.json', 'r') as f:
@@ -0,0 +1,123 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import secrets
+import threading
+
+# SQLite file holding one OAuth token per user and the API keys that act as them
+CREDENTIALS_DB_PATH = os.getenv("CREDENTIALS_DB_PATH", "credentials.db")
+
+logger = logging.getLogger(__name__)
+
+
+class CredentialStore:
+    """
+    Per-user Google OAuth tokens in SQLite.
+
+    Tokens are stored as the JSON produced by Credentials.to_json(), one row
+    per user, so a refresh for one user rewrites only that user's row.
+
+    API keys are how a caller proves which user it is; only their SHA-256
+    is stored, so the file alone does not let anyone act as a user.
+    """
+
+    def __init__(self, path=CREDENTIALS_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS credentials ("
+                " user_id TEXT PRIMARY KEY,"
+                " token_json TEXT NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS api_keys ("
+                " key_hash TEXT PRIMARY KEY,"
+                " user_id TEXT NOT NULL,"
+                " created_at REAL NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def load(self, user_id):
+        """Return the user's token as a dict, or None if they have not connected a calendar."""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT token_json FROM credentials WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, user_id, token_json):
+        """Insert or replace the user's token (a JSON string or dict)."""
+        if not isinstance(token_json, str):
+            token_json = json.dumps(token_json)
+        with self._lock:
+            self._connection().execute(
+                "INSERT INTO credentials (user_id, token_json, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET token_json = excluded.token_json, updated_at = excluded.updated_at",
+                (user_id, token_json, time.time())
+            )
+
+    def delete(self, user_id):
+        with self._lock:
+            self._connection().execute("DELETE FROM credentials WHERE user_id = ?", (user_id,))
+            self._connection().execute("DELETE FROM api_keys WHERE user_id = ?", (user_id,))
+
+    def issue_api_key(self, user_id):
+        """Create an API key for user_id and return it; it cannot be read back later."""
+        api_key = secrets.token_urlsafe(32)
+        with self._lock:
+            self._connection().execute(
+                "INSERT INTO api_keys (key_hash, user_id, created_at) VALUES (?, ?, ?)",
+                (_hash_key(api_key), user_id, time.time())
+            )
+        return api_key
+
+    def user_for_api_key(self, api_key):
+        """Return the user an API key belongs to, or None for an unknown key."""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT user_id FROM api_keys WHERE key_hash = ?", (_hash_key(api_key),)
+            ).fetchone()
+        return row[0] if row else None
+
+    def revoke_api_keys(self, user_id):
+        with self._lock:
+            self._connection().execute("DELETE FROM api_keys WHERE user_id = ?", (user_id,))
+
+    def users(self):
+        with self._lock:
+            return [row[0] for row in self._connection().execute("SELECT user_id FROM credentials ORDER BY user_id")]
+
+
+def _hash_key(api_key):
+    return hashlib.sha256(api_key.encode()).hexdigest()
+
+
+credential_store = CredentialStore()
+
+
+if __name__ == "__main__":
+    # python -m ai_agent.credential_store <user_id> <token.json>
+    if len(sys.argv) != 3:
+        print("Usage: python -m ai_agent.credential_store <user_id> <token.json>")
+        sys.exit(1)
+    with open(sys.argv[2]) as token_file:
+        token = json.load(token_file)
+    if 'installed' in token:
+        print("❌ That file contains client credentials, not a user token")
+        sys.exit(1)
+    credential_store.save(sys.argv[1], token)
+    print(f"✅ Stored credentials for {sys.argv[1]} in {credential_store.path}")
+    print(f"🔑 API key (send as 'Authorization: Bearer <key>'; shown only once): "
+          f"{credential_store.issue_api_key(sys.argv[1])}")
@@ -0,0 +1,98 @@
+import sys
+import datetime
+from dataclasses import dataclass
+
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+_offsets = {}
+
+
+def _fixed_zone(seconds):
+    zone = _offsets.get(seconds)
+    if zone is None:
+        zone = _offsets[seconds] = datetime.timezone(datetime.timedelta(seconds=seconds))
+    return zone
+
+
+def epoch_seconds(dt):
+    return int((dt - _EPOCH).total_seconds())
+
+
+@dataclass(slots=True, frozen=True)
+class Event:
+    """
+    A calendar event reduced to what the app uses.
+
+    Times are epoch seconds. Timed events keep the UTC offset Google gave
+    them so they render in the same local time. All-day events have no
+    instant of their own: start/end are midnight UTC of their dates and
+    span() places them in the caller's timezone. Summaries are interned,
+    since recurring events repeat the same few titles many times.
+    """
+    id: str
+    summary: str
+    start: int
+    end: int
+    all_day: bool = False
+    utc_offset: int = 0  # seconds
+
+    @classmethod
+    def from_google(cls, item):
+        """Build from a Calendar API event resource."""
+        start, end = item['start'], item['end']
+        all_day = 'dateTime' not in start
+        if all_day:
+            start_dt = datetime.datetime.fromisoformat(start['date']).replace(tzinfo=datetime.timezone.utc)
+            end_dt = datetime.datetime.fromisoformat(end['date']).replace(tzinfo=datetime.timezone.utc)
+        else:
+            start_dt = datetime.datetime.fromisoformat(start['dateTime'].replace('Z', '+00:00'))
+            end_dt = datetime.datetime.fromisoformat(end['dateTime'].replace('Z', '+00:00'))
+        return cls(
+            id=item['id'],
+            summary=sys.intern(item.get('summary') or 'No Title'),
+            start=epoch_seconds(start_dt),
+            end=epoch_seconds(end_dt),
+            all_day=all_day,
+            utc_offset=0 if all_day else int(start_dt.utcoffset().total_seconds()),
+        )
+
+    def span(self, tz=None):
+        """(start, end) epoch seconds; all-day events are taken as local days in tz."""
+        if not self.all_day or tz is None:
+            return self.start, self.end
+        local_midnight = (_EPOCH + datetime.timedelta(seconds=self.start)).replace(tzinfo=None)
+        if hasattr(tz, 'localize'):
+            offset = tz.localize(local_midnight).utcoffset()
+        else:
+            offset = tz.utcoffset(local_midnight)
+        shift = int(offset.total_seconds()) if offset else 0
+        return self.start - shift, self.end - shift
+
+    def start_datetime(self, tz=None):
+        return datetime.datetime.fromtimestamp(self.span(tz)[0], tz or _fixed_zone(self.utc_offset))
+
+    def end_datetime(self, tz=None):
+        return datetime.datetime.fromtimestamp(self.span(tz)[1], tz or _fixed_zone(self.utc_offset))
+
+    def _iso(self, seconds):
+        if self.all_day:
+            return (_EPOCH + datetime.timedelta(seconds=seconds)).date().isoformat()
+        return datetime.datetime.fromtimestamp(seconds, _fixed_zone(self.utc_offset)).isoformat()
+
+    @property
+    def start_iso(self):
+        """Google-style start: RFC 3339 dateTime, or YYYY-MM-DD for all-day events."""
+        return self._iso(self.start)
+
+    @property
+    def end_iso(self):
+        return self._iso(self.end)
+
+    def to_dict(self):
+        """The compact JSON shape served to the frontends."""
+        return {
+            "id": self.id,
+            "summary": self.summary,
+            "start": self.start_iso,
+            "end": self.end_iso,
+            "all_day": self.all_day,
+        }
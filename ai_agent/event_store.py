@@ -0,0 +1,342 @@
+import os
+import time
+import datetime
+import threading
+import logging
+from collections import OrderedDict
+from googleapiclient.errors import HttpError
+from ai_agent.metrics import metrics
+from ai_agent.event_model import Event, epoch_seconds
+from ai_agent.shared_cache import shared_cache
+
+# Seconds a synced window is served without asking Google for changes
+EVENT_CACHE_TTL = float(os.getenv("EVENT_CACHE_TTL", "60"))
+# Same, for calendars with a push channel; changes arrive as notifications,
+# so this is only a safety net against lost ones
+EVENT_CACHE_WATCHED_TTL = float(os.getenv("EVENT_CACHE_WATCHED_TTL", "900"))
+# Number of (calendar, time range) windows kept in memory
+EVENT_CACHE_WINDOWS = int(os.getenv("EVENT_CACHE_WINDOWS", "32"))
+# Only the event fields we use are requested from Google
+EVENT_FIELDS = "items(id,status,summary,start,end),nextPageToken,nextSyncToken"
+
+logger = logging.getLogger(__name__)
+
+
+def iter_event_pages(service, **params):
+    """Yield events().list result pages one at a time, following nextPageToken."""
+    page_token = None
+    while True:
+        result = service.events().list(fields=EVENT_FIELDS, pageToken=page_token, **params).execute()
+        yield result
+        page_token = result.get('nextPageToken')
+        if not page_token:
+            return
+
+
+def _day_floor(dt):
+    return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _day_ceil(dt):
+    floor = _day_floor(dt)
+    return floor if floor == dt else floor + datetime.timedelta(days=1)
+
+
+class _Window:
+    """Events of one calendar for one time range, plus the sync token that keeps it current."""
+
+    def __init__(self, calendar_id, time_min, time_max):
+        self.calendar_id = calendar_id
+        self.time_min = time_min
+        self.time_max = time_max
+        self.events = {}
+        self.sync_token = None
+        self.synced_at = 0.0
+        self.stale = True
+        self.generation = 0  # shared invalidation count this window reflects
+        self.lock = threading.Lock()
+
+    def covers(self, calendar_id, time_min, time_max):
+        return (
+            self.calendar_id == calendar_id
+            and self.time_min <= time_min
+            and time_max <= self.time_max
+        )
+
+    def overlaps(self, event):
+        start, end = event.span(self.time_min.tzinfo)
+        return start < epoch_seconds(self.time_max) and end > epoch_seconds(self.time_min)
+
+
+class EventStore:
+    """
+    Local cache of calendar events keyed by calendar and time range.
+    Events are kept and returned as compact Event objects.
+
+    A window is populated with one full listing, then kept current with
+    Calendar API syncToken incremental syncs once it is older than the TTL
+    or has been invalidated by one of our own writes or a push
+    notification. Watched calendars use the longer watched_ttl. Any cached
+    window that covers a requested range answers it without a new listing.
+
+    With a SharedCache, synced windows are also published for the other
+    worker processes, which load them instead of listing the calendar
+    themselves, and invalidations reach every process through a shared
+    generation counter per calendar.
+    """
+
+    def __init__(self, ttl=EVENT_CACHE_TTL, max_windows=EVENT_CACHE_WINDOWS, watched_ttl=EVENT_CACHE_WATCHED_TTL,
+                 shared=None, namespace="default"):
+        self.ttl = ttl
+        self.watched_ttl = watched_ttl
+        self.max_windows = max_windows
+        self.shared = shared
+        self.namespace = namespace
+        self._windows = OrderedDict()
+        self._watched = set()
+        self._lock = threading.Lock()
+
+    def get_events(self, service, time_min, time_max, calendar_id='primary'):
+        """
+        Return events of calendar_id overlapping [time_min, time_max), sorted by start.
+
+        Args:
+            service: calendar service used when the store needs to sync
+            time_min: timezone-aware datetime
+            time_max: timezone-aware datetime
+            calendar_id: calendar to read (default: primary)
+        """
+        window = self._window_for(calendar_id, time_min, time_max)
+        with window.lock:
+            if window.sync_token is not None and not self._expired(window):
+                result = "hit"
+            elif self._load_shared(window):
+                result = "shared"
+            elif window.sync_token is None:
+                result = "miss"
+                self._full_sync(service, window)
+            else:
+                result = "sync"
+                self._incremental_sync(service, window)
+            metrics.inc("cache_requests_total", help_text="Cache lookups by result",
+                        cache="event_store", result=result)
+            return self._select(window, time_min, time_max)
+
+    def cached_events(self, time_min, time_max, calendar_id='primary'):
+        """Return events for the range if a fresh cached window covers it, else None."""
+        with self._lock:
+            window = next(
+                (w for w in self._windows.values() if w.covers(calendar_id, time_min, time_max)),
+                None
+            )
+        if window is None or self._expired(window):
+            return None
+        return self._select(window, time_min, time_max)
+
+    def seed(self, time_min, time_max, events, sync_token, calendar_id='primary'):
+        """Store a complete listing of [time_min, time_max) fetched elsewhere (e.g. in a batch)."""
+        window = self._window_for(calendar_id, time_min, time_max)
+        with window.lock:
+            if window.time_min != time_min or window.time_max != time_max:
+                return  # an existing, wider window already covers this range
+            window.generation = self._generation(calendar_id)
+            window.events = {e['id']: Event.from_google(e) for e in events if e.get('status') != 'cancelled'}
+            window.sync_token = sync_token
+            window.synced_at = time.monotonic()
+            window.stale = False
+            self._save_shared(window)
+
+    def invalidate(self, calendar_id='primary'):
+        """Mark every window of calendar_id as needing a sync on next read."""
+        with self._lock:
+            for window in self._windows.values():
+                if window.calendar_id == calendar_id:
+                    window.stale = True
+        if self.shared is not None:
+            self.shared.bump(self._shared_name(calendar_id))
+
+    def watch(self, calendar_id='primary'):
+        """calendar_id has a push channel: trust its windows until notified (or watched_ttl)."""
+        with self._lock:
+            self._watched.add(calendar_id)
+        if self.shared is not None:
+            # Other processes do not hold the channel; tell them it exists
+            self.shared.set(self._shared_name(calendar_id) + ":watched", True, self.watched_ttl)
+
+    def unwatch(self, calendar_id='primary'):
+        with self._lock:
+            self._watched.discard(calendar_id)
+        if self.shared is not None:
+            self.shared.delete(self._shared_name(calendar_id) + ":watched")
+
+    def refresh(self, service, calendar_id='primary'):
+        """
+        Incrementally sync every cached window of calendar_id now, e.g. on a
+        change notification, so the next read is already current.
+
+        Returns:
+            Number of windows synced
+        """
+        with self._lock:
+            windows = [w for w in self._windows.values() if w.calendar_id == calendar_id]
+        synced = 0
+        for window in windows:
+            with window.lock:
+                if window.sync_token is not None:
+                    self._incremental_sync(service, window)
+                    synced += 1
+        return synced
+
+    def clear(self):
+        with self._lock:
+            self._windows.clear()
+
+    def _expired(self, window):
+        if window.stale:
+            return True
+        if time.monotonic() - window.synced_at >= self._ttl_for(window.calendar_id):
+            return True
+        # Another process changed or was told about a change to this calendar
+        return window.generation != self._generation(window.calendar_id)
+
+    def _ttl_for(self, calendar_id):
+        if calendar_id in self._watched:
+            return self.watched_ttl
+        if self.shared is not None and self.shared.get(self._shared_name(calendar_id) + ":watched"):
+            return self.watched_ttl
+        return self.ttl
+
+    def _shared_name(self, calendar_id):
+        return f"events:{self.namespace}:{calendar_id}"
+
+    def _generation(self, calendar_id):
+        return self.shared.generation(self._shared_name(calendar_id)) if self.shared is not None else 0
+
+    def _snapshot_key(self, window):
+        return f"{self._shared_name(window.calendar_id)}:{window.time_min.isoformat()}:{window.time_max.isoformat()}"
+
+    def _save_shared(self, window):
+        if self.shared is None or window.sync_token is None:
+            return
+        snapshot = {
+            "generation": window.generation,
+            "synced_at": time.time() - (time.monotonic() - window.synced_at),
+            "sync_token": window.sync_token,
+            "events": [
+                [e.id, e.summary, e.start, e.end, e.all_day, e.utc_offset] for e in window.events.values()
+            ],
+        }
+        self.shared.set(self._snapshot_key(window), snapshot, self._ttl_for(window.calendar_id))
+
+    def _load_shared(self, window):
+        """Adopt a window another process synced, if it is current. Called with window.lock held."""
+        if self.shared is None:
+            return False
+        snapshot = self.shared.get(self._snapshot_key(window))
+        if not snapshot or snapshot["generation"] != self._generation(window.calendar_id):
+            return False
+        age = time.time() - snapshot["synced_at"]
+        if age >= self._ttl_for(window.calendar_id):
+            return False
+        window.events = {row[0]: Event(*row) for row in snapshot["events"]}
+        window.sync_token = snapshot["sync_token"]
+        window.synced_at = time.monotonic() - age
+        window.generation = snapshot["generation"]
+        window.stale = False
+        return True
+
+    def _window_for(self, calendar_id, time_min, time_max):
+        with self._lock:
+            for key, window in self._windows.items():
+                if window.covers(calendar_id, time_min, time_max):
+                    self._windows.move_to_end(key)
+                    return window
+
+            # Align to whole days so repeated "from now" queries share a window
+            window = _Window(calendar_id, _day_floor(time_min), _day_ceil(time_max))
+            key = (calendar_id, window.time_min.isoformat(), window.time_max.isoformat())
+            self._windows[key] = window
+            while len(self._windows) > self.max_windows:
+                self._windows.popitem(last=False)
+            return window
+
+    def _select(self, window, time_min, time_max):
+        events = list(window.events.values())
+        tz = time_min.tzinfo
+        lo, hi = epoch_seconds(time_min), epoch_seconds(time_max)
+        selected = []
+        for event in events:
+            start, end = event.span(tz)
+            if start < hi and end > lo:
+                selected.append((start, event))
+        selected.sort(key=lambda item: item[0])
+        return [event for _, event in selected]
+
+    def _full_sync(self, service, window):
+        # Taken first: a change reported while listing must leave this window stale elsewhere
+        generation = self._generation(window.calendar_id)
+        # The sync token only comes with the last page, so a window is read to the end
+        events = {}
+        for result in iter_event_pages(
+            service,
+            calendarId=window.calendar_id,
+            timeMin=window.time_min.isoformat(),
+            timeMax=window.time_max.isoformat(),
+            singleEvents=True,
+            maxResults=2500
+        ):
+            for event in result.get('items', []):
+                if event.get('status') != 'cancelled':
+                    events[event['id']] = Event.from_google(event)
+
+        window.events = events
+        window.sync_token = result.get('nextSyncToken')
+        window.synced_at = time.monotonic()
+        window.stale = False
+        window.generation = generation
+        self._save_shared(window)
+        logger.info("event window cached", extra={
+            "calendar_id": window.calendar_id,
+            "events": len(events),
+            "time_min": window.time_min.isoformat(),
+            "time_max": window.time_max.isoformat(),
+        })
+
+    def _incremental_sync(self, service, window):
+        generation = self._generation(window.calendar_id)
+        changed = 0
+        try:
+            for result in iter_event_pages(
+                service,
+                calendarId=window.calendar_id,
+                syncToken=window.sync_token,
+                singleEvents=True
+            ):
+                for event in result.get('items', []):
+                    changed += 1
+                    if event.get('status') == 'cancelled':
+                        window.events.pop(event['id'], None)
+                        continue
+                    event = Event.from_google(event)
+                    if window.overlaps(event):
+                        window.events[event.id] = event
+                    else:
+                        window.events.pop(event.id, None)
+        except HttpError as e:
+            # 410 Gone: sync token expired, start over with a full listing
+            if e.resp.status == 410:
+                self._full_sync(service, window)
+                return
+            raise
+
+        window.sync_token = result.get('nextSyncToken', window.sync_token)
+        window.synced_at = time.monotonic()
+        window.stale = False
+        window.generation = generation
+        self._save_shared(window)
+        if changed:
+            logger.info("event window synced", extra={"calendar_id": window.calendar_id, "changed": changed})
+
+
+# Process-wide store used by the calendar read paths
+event_store = EventStore(shared=shared_cache)
@@ -1,28 +1,74 @@
 
+import os
 import datetime
-from ai_agent.calendar_setup import get_calendar_service
+import pytz
+from ai_agent.calendar_client import get_calendar_client
+from ai_agent.intent_detect import LOCAL_TIMEZONE
+from ai_agent.metrics import timed
 
+DEFAULT_EVENTS_LIMIT = 250
+MAX_EVENTS_LIMIT = 2500
+# Longest range one listing may cover; the whole range is synced into the event store
+MAX_EVENTS_RANGE = datetime.timedelta(days=int(os.getenv("MAX_EVENTS_RANGE_DAYS", "366")))
 
-def get_all_events():
-    service = get_calendar_service()
+
+def event_range(start=None, end=None, timezone=LOCAL_TIMEZONE):
+    """
+    Resolve the bounds of an events listing.
+
+    Naive and date-only values are in timezone (the calendar's, not UTC);
+    start defaults to now and end to a year after start.
+
+    Raises:
+        ValueError: end is not after start, or the range is longer than MAX_EVENTS_RANGE
+    """
+    tz = pytz.timezone(timezone)
+    start = start or datetime.datetime.now(tz)
+    if start.tzinfo is None:
+        start = tz.localize(start)
+    end = end or start + datetime.timedelta(days=365)
+    if end.tzinfo is None:
+        end = tz.localize(end)
+    if end <= start:
+        raise ValueError("end must be after start")
+    if end - start > MAX_EVENTS_RANGE:
+        raise ValueError(f"range must be at most {MAX_EVENTS_RANGE.days} days")
+    return start, end
+
+
+@timed("calendar.get_all_events")
+def get_all_events(start=None, end=None, limit=DEFAULT_EVENTS_LIMIT, cursor=None, user_id=None):
+    """
+    List events between start and end, one page at a time.
+
+    Args:
+        start: datetime, beginning of the range (default: now; see event_range)
+        end: datetime, end of the range (default: one year after start)
+        limit: maximum events per page
+        cursor: next_cursor from the previous page
+        user_id: whose calendar (None for the token.json account)
+
+    Returns:
+        Dict with compact "events" and "next_cursor" (None on the last page)
+    """
+    client = get_calendar_client(user_id)
+    service = client.service()
     if not service:
         return {"error": "❌ Calendar service unavailable."}
 
     try:
-        now = datetime.datetime.utcnow().isoformat() + 'Z'
-        one_year_later = (datetime.datetime.utcnow() + datetime.timedelta(days=365)).isoformat() + 'Z'
-
-        events_result = service.events().list(
-            calendarId='primary',
-            timeMin=now,
-            timeMax=one_year_later,
-            maxResults=2500,
-            singleEvents=True,
-            orderBy='startTime'
-        ).execute()
-
-        events = events_result.get('items', [])
-        return events
+        start, end = event_range(start, end)
+        limit = max(1, min(limit, MAX_EVENTS_LIMIT))
+        offset = int(cursor) if cursor else 0
+
+        # Served from the local event store; repeat views cost no API calls
+        events = client.event_store.get_events(service, start, end)
+        page = events[offset:offset + limit]
+        next_offset = offset + len(page)
+        return {
+            "events": [event.to_dict() for event in page],
+            "next_cursor": str(next_offset) if next_offset < len(events) else None,
+        }
 
     except Exception as e:
         return {"error": f"❌ Could not fetch calendar: {str(e)}"}
@@ -1,19 +1,12 @@
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
-import datetime
-import pickle
+import logging
+from ai_agent.calendar_client import get_calendar_service
+from ai_agent.metrics import timed
 
-def get_calendar_service():
-    try:
-        with open('token.pkl', 'rb') as token:
-            creds = pickle.load(token)
-        return build('calendar', 'v3', credentials=creds)
-    except Exception as e:
-        print(f"❌ Error loading calendar credentials: {e}")
-        return None
+logger = logging.getLogger(__name__)
 
-def get_all_calendars():
-    service = get_calendar_service()
+@timed("calendar.get_all_calendars")
+def get_all_calendars(user_id=None):
+    service = get_calendar_service(user_id)
     if not service:
         return {"error": "❌ Calendar service unavailable."}
 
@@ -23,5 +16,5 @@ def get_all_calendars():
         return calendars
 
     except Exception as e:
-        print(f"❌ Error fetching calendars: {e}")
+        logger.error("error fetching calendars", extra={"error": str(e)})
         return {"error": "❌ Could not fetch calendar list."}
@@ -0,0 +1,337 @@
+import os
+import time
+import heapq
+import datetime
+import threading
+import logging
+from bisect import bisect_left, bisect_right
+import pytz
+from ai_agent.metrics import metrics
+from ai_agent.shared_cache import shared_cache
+
+# Seconds busy data for a range is trusted before asking Google again
+FREEBUSY_CACHE_TTL = float(os.getenv("FREEBUSY_CACHE_TTL", "60"))
+# Shared holds left behind by a process that died lapse after this many seconds
+FREEBUSY_HOLD_TTL = 3600
+# Google rejects freebusy ranges longer than roughly two months
+FREEBUSY_MAX_RANGE = datetime.timedelta(days=60)
+# Google accepts at most 50 calendars per freebusy query
+FREEBUSY_MAX_CALENDARS = 50
+
+logger = logging.getLogger(__name__)
+
+
+def _epoch(dt):
+    return dt.timestamp()
+
+
+def _parse(value):
+    return datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+class FreeBusyUnavailable(Exception):
+    """Google returned errors for some calendars, so their busy time is unknown."""
+
+    def __init__(self, errors):
+        super().__init__(f"free/busy unavailable for {', '.join(sorted(errors))}")
+        self.errors = errors
+
+
+class BusyIndex:
+    """
+    Busy intervals of one calendar, kept sorted and merged.
+
+    Intervals are stored as parallel lists of epoch seconds so overlap
+    lookups are two binary searches.
+    """
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+
+    def add(self, start, end):
+        """Insert [start, end), merging with any interval it touches."""
+        if end <= start:
+            return
+        lo = bisect_left(self.ends, start)
+        hi = bisect_right(self.starts, end)
+        if lo < hi:
+            start = min(start, self.starts[lo])
+            end = max(end, self.ends[hi - 1])
+        self.starts[lo:hi] = [start]
+        self.ends[lo:hi] = [end]
+
+    def clear_range(self, start, end):
+        """Forget busy time inside [start, end) before it is replaced by fresh data."""
+        lo = bisect_right(self.ends, start)
+        hi = bisect_left(self.starts, end)
+        kept = []
+        for s, e in zip(self.starts[lo:hi], self.ends[lo:hi]):
+            if s < start:
+                kept.append((s, start))
+            if e > end:
+                kept.append((end, e))
+        self.starts[lo:hi] = [s for s, _ in kept]
+        self.ends[lo:hi] = [e for _, e in kept]
+
+    def overlapping(self, start, end):
+        """Return busy intervals intersecting [start, end)."""
+        lo = bisect_right(self.ends, start)
+        hi = bisect_left(self.starts, end)
+        return list(zip(self.starts[lo:hi], self.ends[lo:hi]))
+
+
+class _Coverage:
+    def __init__(self):
+        self.start = None
+        self.end = None
+        self.fetched_at = 0.0
+        self.generation = 0
+
+    def covers(self, start, end, ttl):
+        return (
+            self.start is not None
+            and self.start <= start and end <= self.end
+            and time.monotonic() - self.fetched_at < ttl
+        )
+
+
+class FreeBusyEngine:
+    """
+    Free/busy answers across calendars backed by the Calendar freebusy API.
+
+    Busy intervals are fetched for many calendars in one freebusy().query
+    call (chunked by the API's range and calendar limits), kept per
+    calendar in a BusyIndex, and reused until the TTL expires or a
+    calendar is invalidated. With a SharedCache, invalidations and our own
+    bookings reach the other worker processes too.
+    """
+
+    def __init__(self, ttl=FREEBUSY_CACHE_TTL, shared=None, namespace="default"):
+        self.ttl = ttl
+        self.shared = shared
+        self.namespace = namespace
+        self._indexes = {}
+        self._coverage = {}
+        self._holds = {}  # calendar id -> [(start, end)] of bookings not yet in Google; SharedCache keys instead when shared
+        self._lock = threading.Lock()
+
+    def busy(self, service, start, end, calendar_ids=('primary',)):
+        """
+        Return merged busy (start, end) epoch intervals across calendar_ids within [start, end).
+
+        Raises FreeBusyUnavailable when Google could not report on one of
+        the calendars; an unknown calendar is never treated as free.
+        """
+        start_ts, end_ts = _epoch(start), _epoch(end)
+        self._ensure(service, start_ts, end_ts, calendar_ids)
+
+        with self._lock:
+            per_calendar = [self._indexes[cid].overlapping(start_ts, end_ts) for cid in calendar_ids]
+
+        merged = []
+        for s, e in heapq.merge(*per_calendar):
+            if merged and s <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], e)
+            else:
+                merged.append([s, e])
+        return [(s, e) for s, e in merged]
+
+    def free_slots(self, service, start, end, duration_minutes=60, calendar_ids=('primary',),
+                   work_start_hour=9, work_end_hour=17, timezone='Asia/Kolkata'):
+        """
+        Find free slots of at least duration_minutes inside working hours.
+
+        Args:
+            service: calendar service
+            start: timezone-aware datetime, beginning of the search range
+            end: timezone-aware datetime, end of the search range
+            duration_minutes: minimum slot length
+            calendar_ids: calendars that all have to be free
+            work_start_hour: start of work day (24-hour format)
+            work_end_hour: end of work day (24-hour format)
+            timezone: timezone string
+
+        Returns:
+            List of (start_datetime, end_datetime) tuples in timezone
+        """
+        tz = pytz.timezone(timezone)
+        busy = self.busy(service, start, end, calendar_ids)
+        min_length = duration_minutes * 60
+        range_start, range_end = _epoch(start), _epoch(end)
+
+        slots = []
+        day = start.astimezone(tz).date()
+        last_day = end.astimezone(tz).date()
+        i = 0
+        while day <= last_day:
+            window_start = max(range_start, _epoch(tz.localize(
+                datetime.datetime.combine(day, datetime.time(work_start_hour, 0)))))
+            window_end = min(range_end, _epoch(tz.localize(
+                datetime.datetime.combine(day, datetime.time(work_end_hour, 0)))))
+            day += datetime.timedelta(days=1)
+            if window_end <= window_start:
+                continue
+
+            while i < len(busy) and busy[i][1] <= window_start:
+                i += 1
+            current = window_start
+            j = i
+            while j < len(busy) and busy[j][0] < window_end:
+                if busy[j][0] - current >= min_length:
+                    slots.append((current, busy[j][0]))
+                current = max(current, busy[j][1])
+                j += 1
+            if window_end - current >= min_length:
+                slots.append((current, window_end))
+
+        return [
+            (datetime.datetime.fromtimestamp(s, tz), datetime.datetime.fromtimestamp(e, tz))
+            for s, e in slots
+        ]
+
+    def suggest_times(self, service, start, end, duration_minutes=30, calendar_ids=('primary',),
+                      limit=3, step_minutes=30, **kwargs):
+        """Return up to limit (start, end) meeting proposals of duration_minutes, earliest first."""
+        duration = datetime.timedelta(minutes=duration_minutes)
+        step = datetime.timedelta(minutes=step_minutes)
+        suggestions = []
+        for slot_start, slot_end in self.free_slots(service, start, end, duration_minutes,
+                                                    calendar_ids, **kwargs):
+            candidate = slot_start
+            while candidate + duration <= slot_end and len(suggestions) < limit:
+                suggestions.append((candidate, candidate + duration))
+                candidate += step
+            if len(suggestions) >= limit:
+                break
+        return suggestions
+
+    def mark_busy(self, start, end, calendar_id='primary'):
+        """Record a meeting we just created so later checks see it without a refetch."""
+        with self._lock:
+            self._indexes.setdefault(calendar_id, BusyIndex()).add(_epoch(start), _epoch(end))
+        self._announce(calendar_id)
+
+    def hold(self, start, end, calendar_id='primary'):
+        """Keep [start, end) busy, even across refetches, until release(); for queued bookings."""
+        with self._lock:
+            if self.shared is None:
+                self._holds.setdefault(calendar_id, []).append((_epoch(start), _epoch(end)))
+            self._indexes.setdefault(calendar_id, BusyIndex()).add(_epoch(start), _epoch(end))
+        if self.shared is not None:
+            # The booking may be made, and released, by a worker in another process
+            self.shared.set(self._hold_key(calendar_id, start, end), [_epoch(start), _epoch(end)], FREEBUSY_HOLD_TTL)
+            self._announce(calendar_id)
+
+    def release(self, start, end, calendar_id='primary'):
+        """Drop a hold once the booking is made (or has failed) and refetch what Google has."""
+        with self._lock:
+            holds = self._holds.get(calendar_id, [])
+            if (_epoch(start), _epoch(end)) in holds:
+                holds.remove((_epoch(start), _epoch(end)))
+        if self.shared is not None:
+            self.shared.delete(self._hold_key(calendar_id, start, end))
+        self.invalidate(calendar_id)
+
+    def invalidate(self, calendar_id=None):
+        with self._lock:
+            calendar_ids = [cid for cid in self._coverage if calendar_id is None or cid == calendar_id]
+            for cid in calendar_ids:
+                self._coverage[cid].fetched_at = 0.0
+        if self.shared is not None:
+            for cid in calendar_ids if calendar_id is None else [calendar_id]:
+                self.shared.bump(self._shared_name(cid))
+
+    def _shared_name(self, calendar_id):
+        return f"freebusy:{self.namespace}:{calendar_id}"
+
+    def _hold_key(self, calendar_id, start, end):
+        return f"{self._shared_name(calendar_id)}:hold:{_epoch(start)}:{_epoch(end)}"
+
+    def _holds_for(self, calendar_id):
+        holds = list(self._holds.get(calendar_id, []))
+        if self.shared is not None:
+            holds.extend(tuple(h) for h in self.shared.values(self._shared_name(calendar_id) + ":hold:"))
+        return holds
+
+    def _announce(self, calendar_id):
+        """Make other processes refetch calendar_id; this one is already up to date."""
+        if self.shared is None:
+            return
+        generation = self.shared.bump(self._shared_name(calendar_id))
+        with self._lock:
+            coverage = self._coverage.get(calendar_id)
+            if coverage is not None and coverage.generation == generation - 1:
+                coverage.generation = generation
+
+    def _generation(self, calendar_id):
+        return self.shared.generation(self._shared_name(calendar_id)) if self.shared is not None else 0
+
+    def _ensure(self, service, start_ts, end_ts, calendar_ids):
+        generations = {cid: self._generation(cid) for cid in calendar_ids}
+        with self._lock:
+            missing = [
+                cid for cid in calendar_ids
+                if not self._coverage.get(cid, _Coverage()).covers(start_ts, end_ts, self.ttl)
+                or self._coverage[cid].generation != generations[cid]
+            ]
+        metrics.inc("cache_requests_total", help_text="Cache lookups by result",
+                    cache="freebusy", result="miss" if missing else "hit")
+        if not missing:
+            return
+
+        busy, errors = self._query(service, start_ts, end_ts, missing)
+        fetched = [cid for cid in missing if cid not in errors]
+        holds = {cid: self._holds_for(cid) for cid in fetched}
+
+        with self._lock:
+            now = time.monotonic()
+            for cid in fetched:
+                index = self._indexes.setdefault(cid, BusyIndex())
+                index.clear_range(start_ts, end_ts)
+                for s, e in busy.get(cid, []) + holds[cid]:
+                    index.add(s, e)
+
+                coverage = self._coverage.setdefault(cid, _Coverage())
+                if coverage.start is not None and now - coverage.fetched_at < self.ttl \
+                        and coverage.generation == generations[cid] \
+                        and coverage.start <= end_ts and start_ts <= coverage.end:
+                    coverage.start = min(coverage.start, start_ts)
+                    coverage.end = max(coverage.end, end_ts)
+                else:
+                    coverage.start, coverage.end = start_ts, end_ts
+                    coverage.fetched_at = now
+                    coverage.generation = generations[cid]
+
+        if errors:
+            # No coverage is recorded for these, so the next call asks again
+            raise FreeBusyUnavailable(errors)
+
+    def _query(self, service, start_ts, end_ts, calendar_ids):
+        busy = {cid: [] for cid in calendar_ids}
+        errors = {}
+        chunk = FREEBUSY_MAX_RANGE.total_seconds()
+        chunk_start = start_ts
+        while chunk_start < end_ts:
+            chunk_end = min(chunk_start + chunk, end_ts)
+            for i in range(0, len(calendar_ids), FREEBUSY_MAX_CALENDARS):
+                batch = calendar_ids[i:i + FREEBUSY_MAX_CALENDARS]
+                result = service.freebusy().query(body={
+                    "timeMin": datetime.datetime.fromtimestamp(chunk_start, pytz.utc).isoformat(),
+                    "timeMax": datetime.datetime.fromtimestamp(chunk_end, pytz.utc).isoformat(),
+                    "items": [{"id": cid} for cid in batch],
+                }).execute()
+                for cid, data in result.get("calendars", {}).items():
+                    if data.get("errors"):
+                        logger.warning("free/busy unavailable", extra={"calendar_id": cid, "errors": data["errors"]})
+                        errors[cid] = data["errors"]
+                    for interval in data.get("busy", []):
+                        busy.setdefault(cid, []).append(
+                            (_epoch(_parse(interval["start"])), _epoch(_parse(interval["end"])))
+                        )
+            chunk_start = chunk_end
+        return busy, errors
+
+
+# Process-wide engine used by the calendar helpers
+freebusy_engine = FreeBusyEngine(shared=shared_cache)
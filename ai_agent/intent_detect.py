@@ -1,37 +1,222 @@
-import dateparser
+import os
+import re
+import json
+from datetime import datetime
+from functools import lru_cache
+from typing import NamedTuple, Optional
+import pytz
 
-def detect_intent(message: str) -> str:
-    message = message.lower().strip()
+# Only the languages our keywords cover; skips dateparser's detection across all locales
+DATE_LANGUAGES = ['en', 'hi']
+DEFAULT_DURATION_MINUTES = 30
+# Timezone the user's dates and times are read in (and "what time is it" answered in)
+LOCAL_TIMEZONE = os.getenv("LOCAL_TIMEZONE", "Asia/Kolkata")
+# "friday" is the coming Friday; period tells a day ("tomorrow") from a time ("tomorrow 4pm").
+# Results are aware in LOCAL_TIMEZONE, so "in 2 hours" and past-time checks do not depend on the host's zone
+DATE_SETTINGS = {
+    'PREFER_DATES_FROM': 'future', 'RETURN_TIME_AS_PERIOD': True,
+    'TIMEZONE': LOCAL_TIMEZONE, 'RETURN_AS_TIMEZONE_AWARE': True,
+}
+
+# Latin words plus Devanagari (whose vowel signs are not matched by \w)
+_word_re = re.compile(r"[\w'\u0900-\u097F]+")
+
+_duration_re = re.compile(
+    r"(?<!in )\b(?:for\s+)?(?:(\d+(?:\.\d+)?)|(an?|half an?))\s*"
+    r"(hours?|hrs?|ghante|ghanta|minutes?|mins?)\b"
+)
+# "in 2 hours" is a time even though dateparser reports it as a day
+_relative_time_re = re.compile(r"\bin\s+(?:\d+(?:\.\d+)?|an?|half an?)\s*(?:hours?|hrs?|minutes?|mins?)\b")
+# A bare time of day ("4pm", "at 10:30"); dateparser dates it today or tomorrow, but no day was named
+_time_only_re = re.compile(r"(?:at\s+)?(?:\d{1,2}(?::\d{2})?\s*(?:am|pm|a\.m\.|p\.m\.|baje)?|noon|midnight)")
+
+
+class MessageAnalysis(NamedTuple):
+    intent: str
+    dt: Optional[datetime]
+    duration_minutes: int
+    person: str
+    asks_to_book: bool = False  # a booking request, even without a time ("book it with rahul")
+    has_time: bool = False  # dt includes a time of day; otherwise it is midnight of the day mentioned
+    has_day: bool = False  # the message names a day; "4pm" alone does not, and dt is then just the next 4pm
+
+
+def normalize_message(message: str) -> str:
+    return " ".join(message.lower().split())
+
+
+def extract_person_name(message):
+    match = re.search(r"with (.+)", message)
+    if match:
+        return match.group(1).strip().title()
+    return "Unnamed Person"
+
+
+def extract_duration(text):
+    """Return (minutes, text with the duration phrase removed)."""
+    match = _duration_re.search(text)
+    if not match:
+        return DEFAULT_DURATION_MINUTES, text
+
+    number, article, unit = match.groups()
+    if number:
+        amount = float(number)
+    else:
+        amount = 0.5 if article.startswith("half") else 1
+    minutes = amount * 60 if unit.startswith(("h", "g")) else amount
+    remaining = (text[:match.start()] + text[match.end():]).strip()
+    return max(int(minutes), 1), remaining
+
+
+@lru_cache(maxsize=1)
+def _date_parser():
+    # dateparser loads its timezone and locale data on import (~0.5s); defer it
+    from dateparser.date import DateDataParser
+    return DateDataParser(languages=DATE_LANGUAGES, settings=DATE_SETTINGS)
+
+
+@lru_cache(maxsize=1024)
+def _parse_datetime(text, minute, search=False):
+    """
+    Parse the datetime mentioned in text.
+
+    With search, a date phrase inside a longer sentence is found too
+    ("book a meeting friday 4pm with rahul"); without it only a text that
+    is all date counts, so questions like "do i have a meeting tomorrow"
+    do not turn into bookings.
+
+    minute is only part of the cache key: relative phrases ("tomorrow",
+    "in 2 hours") must not be served from a result computed earlier.
+
+    Returns:
+        (datetime aware in LOCAL_TIMEZONE, substring it came from, has_time, has_day),
+        or (None, None, False, False)
+    """
+    matched = text
+    data = _date_parser().get_date_data(text)
+    if not data.date_obj and search:
+        from dateparser.search import search_dates
+        found = search_dates(text, languages=DATE_LANGUAGES, settings=DATE_SETTINGS)
+        if found:
+            # search_dates misreads some phrases ("on monday at 10am"); parse the phrase on its own
+            matched = found[0][0]
+            data = _date_parser().get_date_data(matched)
+    dt = data.date_obj
+    if not dt:
+        return None, None, False, False
+    if _relative_time_re.search(matched):
+        return dt, matched, True, True
+    if data.period == 'time':
+        return dt, matched, True, not _time_only_re.fullmatch(matched.strip())
+    # Only a day: dateparser fills in the current time of day, which nobody asked for
+    midnight = datetime.combine(dt.date(), datetime.min.time())
+    return pytz.timezone(LOCAL_TIMEZONE).localize(midnight), matched, False, True
 
-    # Detect if datetime is mentioned
-    dt = dateparser.parse(message)
 
-    # Booking intent keywords
-    booking_keywords = [
-        "book", "schedule", "set meeting", "add event", "fix", "arrange",
-        "meeting", "appointment", "call", "zoom", "google meet", "baithak", "milna", "nirdharit", "karna"
-    ]
+class KeywordMatcher:
+    """
+    Word-boundary-aware phrase matcher for the intent vocabulary.
 
-    # Fetching/viewing schedule
-    fetch_keywords = [
-        "list", "show", "view", "check", "what meetings", "aaj ki meetings", "kal ki meetings",
-        "today's schedule", "upcoming events", "meri meeting", "meeting list", "kya meeting", "kaun si meeting"
-    ]
+    Phrases are stored in a word-level trie built once, so a message is
+    scanned in a single pass whose cost depends on its length, not on the
+    size of the vocabulary. Overlapping phrases ("meeting", "meeting list")
+    are all reported.
+    """
 
-    # General questions (date/day/bot)
-    general_keywords = [
-        "aaj kya hai", "what day", "what date", "aaj kaun sa din", "today's date", "kal kya hai",
-        "are you a bot", "who are you", "hello", "hi", "namaste"
-    ]
+    _terminal = object()
 
+    def __init__(self, vocabulary):
+        self._trie = {}
+        for category, phrases in vocabulary.items():
+            for phrase in phrases:
+                node = self._trie
+                for word in tokenize(phrase):
+                    node = node.setdefault(word, {})
+                node.setdefault(self._terminal, set()).add(category)
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def match(self, message):
+        """Return {category: score}; score is the number of matched words per category."""
+        words = tokenize(message)
+        scores = {}
+        for i in range(len(words)):
+            node = self._trie
+            for j in range(i, len(words)):
+                node = node.get(words[j])
+                if node is None:
+                    break
+                for category in node.get(self._terminal, ()):
+                    scores[category] = scores.get(category, 0) + (j - i + 1)
+        return scores
+
+
+def tokenize(text):
+    return _word_re.findall(text.lower())
+
+
+# Vocabulary can be grown (e.g. Hinglish terms) without code changes
+INTENT_KEYWORDS_PATH = os.getenv(
+    "INTENT_KEYWORDS_PATH",
+    os.path.join(os.path.dirname(__file__), "intent_keywords.json"),
+)
+keyword_matcher = KeywordMatcher.from_file(INTENT_KEYWORDS_PATH)
+
+
+def _classify(scores, dt):
     # Match against categories
-    if any(kw in message for kw in booking_keywords) and dt:
+    if "suggest" in scores:
+        return "suggest"
+
+    if "book" in scores and dt:
         return "book"
 
-    if any(kw in message for kw in fetch_keywords):
+    if "fetch" in scores:
         return "fetch"
 
-    if any(kw in message for kw in general_keywords):
+    if "general" in scores:
         return "general"
 
     return "none"  # fallback to LLM or default logic
+
+
+def analyze_message(message: str) -> MessageAnalysis:
+    """
+    Single pass over a chat message: intent, datetime, duration and attendee.
+
+    dateparser runs at most once per distinct text per minute; everything
+    else reuses its result.
+    """
+    text = normalize_message(message)
+    duration, date_text = extract_duration(text)
+
+    scores = keyword_matcher.match(text)
+    asks_to_book = "book_request" in scores
+    minute = datetime.now().replace(second=0, microsecond=0)
+    # Only booking and slot requests look for a date inside the sentence
+    search = asks_to_book or "suggest" in scores
+    dt, matched, has_time, has_day = (
+        _parse_datetime(date_text, minute, search) if date_text else (None, None, False, False)
+    )
+
+    # Keep the date and duration phrases out of the attendee name ("with rahul tomorrow 3pm")
+    person_text = date_text
+    if matched and matched != date_text:
+        person_text = " ".join(date_text.replace(matched, "", 1).split())
+
+    return MessageAnalysis(
+        intent=_classify(scores, dt),
+        dt=dt,
+        duration_minutes=duration,
+        person=extract_person_name(person_text),
+        asks_to_book=asks_to_book,
+        has_time=has_time,
+        has_day=has_day,
+    )
+
+
+def detect_intent(message: str) -> str:
+    return analyze_message(message).intent
@@ -0,0 +1,236 @@
+import os
+import time
+import random
+import asyncio
+import logging
+import datetime
+from email.utils import parsedate_to_datetime
+from ai_agent.memory import estimate_tokens
+from ai_agent.metrics import metrics
+
+# Worker processes sharing the account (uvicorn's WEB_CONCURRENCY, set by the production entry point)
+LLM_WORKERS = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+# Concurrent Groq calls across all workers, and callers allowed to wait for a slot per process
+LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", "8"))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "64"))
+# Pacing to stay under the account's limits (0 disables); each worker gets an equal share
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "30"))
+LLM_TOKENS_PER_MINUTE = float(os.getenv("LLM_TOKENS_PER_MINUTE", "6000"))
+# Output tokens assumed per call until the response reports real usage
+LLM_EXPECTED_OUTPUT_TOKENS = int(os.getenv("LLM_EXPECTED_OUTPUT_TOKENS", "256"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+# Longest a call waits for a slot, pacing or a retry in total; past it the caller gets LLMUnavailable
+LLM_MAX_WAIT = float(os.getenv("LLM_MAX_WAIT", "15"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_BASE = 0.5
+LLM_BACKOFF_MAX = 20.0
+
+logger = logging.getLogger(__name__)
+
+
+class LLMUnavailable(Exception):
+    """The LLM could not answer: queue full, timed out or still failing after retries."""
+
+
+class TokenBucket:
+    """
+    Refills at rate_per_minute up to one minute's worth. reserve() takes
+    from the bucket immediately (it may go negative) and returns how long
+    the caller should wait, so waiters are served in arrival order without
+    a lock. Callers share one event loop.
+
+    An amount larger than the whole bucket waits only until the bucket is
+    full and leaves the rest as debt for later callers; otherwise it could
+    never go at all.
+    """
+
+    def __init__(self, rate_per_minute):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = rate_per_minute
+        self.level = rate_per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount):
+        if not self.rate:
+            return 0.0
+        self._refill()
+        wait = max(0.0, (min(amount, self.capacity) - self.level) / self.rate)
+        self.level -= amount
+        return wait
+
+    def refund(self, amount):
+        """Give back (or, if negative, take more) once the real cost is known."""
+        if self.rate:
+            self._refill()
+            self.level = min(self.capacity, self.level + amount)
+
+
+def _retry_after(error):
+    """Seconds from a Retry-After header on a provider error, if present."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        try:
+            when = parsedate_to_datetime(value)
+            return max(0.0, (when - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            return None
+
+
+def _retryable(error):
+    if isinstance(error, asyncio.TimeoutError):
+        return True
+    import groq
+    if isinstance(error, (groq.APIConnectionError, groq.APITimeoutError)):
+        return True
+    status = getattr(error, "status_code", None)
+    return status in (408, 409, 429) or (status is not None and status >= 500)
+
+
+class LLMGateway:
+    """
+    Single way to call the chat model, shared by every request in the process.
+    The account-wide limits are split evenly between LLM_WORKERS processes.
+
+    - at most max_in_flight calls run at once; up to max_queue more wait,
+      anything beyond that fails fast with LLMUnavailable
+    - requests and tokens per minute are paced with token buckets
+    - each attempt has a timeout; timeouts, 429s and 5xx are retried with
+      jittered exponential backoff, or after Retry-After when the provider
+      sends one (which also pauses every other caller)
+    - waiting for a slot, pacing and retry backoff together stay within
+      max_wait, so callers fail fast instead of outliving their HTTP timeout
+    - an attempt that already streamed tokens to the client is not retried,
+      since the retry would send the text again
+    - identical prompts already in flight share one call
+    """
+
+    def __init__(self, model, max_in_flight=max(1, LLM_MAX_IN_FLIGHT // LLM_WORKERS), max_queue=LLM_MAX_QUEUE,
+                 requests_per_minute=LLM_REQUESTS_PER_MINUTE / LLM_WORKERS,
+                 tokens_per_minute=LLM_TOKENS_PER_MINUTE / LLM_WORKERS,
+                 timeout=LLM_TIMEOUT, max_retries=LLM_MAX_RETRIES, max_wait=LLM_MAX_WAIT):
+        self.model = model  # callable returning the chat model
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_wait = max_wait
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self._waiting = 0
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._pending = {}
+
+    async def ainvoke(self, messages, config=None, method="chat"):
+        """Call the model with messages; returns its AIMessage or raises LLMUnavailable."""
+        key = (method, tuple((message.type, message.content) for message in messages))
+        task = self._pending.get(key)
+        if task is not None:
+            metrics.inc("llm_coalesced_total", help_text="LLM calls answered by an identical call in flight")
+        else:
+            task = asyncio.ensure_future(self._call(messages, config, method))
+            self._pending[key] = task
+            task.add_done_callback(lambda _: self._pending.pop(key, None))
+        # A cancelled caller must not cancel a call others are waiting on
+        return await asyncio.shield(task)
+
+    def _gauges(self):
+        metrics.set("llm_queue_depth", self._waiting, "Callers waiting for an LLM slot")
+        metrics.set("llm_in_flight", self._in_flight, "LLM calls in progress")
+
+    async def _call(self, messages, config, method):
+        if self._waiting >= self.max_queue:
+            self._reject("queue_full")
+            raise LLMUnavailable("LLM queue is full")
+
+        started = time.monotonic()
+        deadline = started + self.max_wait
+        self._waiting += 1
+        self._gauges()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.max_wait)
+        except asyncio.TimeoutError:
+            self._reject("slot")
+            raise LLMUnavailable("no LLM slot became free in time") from None
+        finally:
+            self._waiting -= 1
+
+        self._in_flight += 1
+        self._gauges()
+        try:
+            estimated = sum(estimate_tokens(str(message.content)) for message in messages) + LLM_EXPECTED_OUTPUT_TOKENS
+            delay = max(self.requests.reserve(1), self.tokens.reserve(estimated),
+                        self._paused_until - time.monotonic())
+            if time.monotonic() + delay > deadline:
+                # Give the budget back: this call is not going to be made
+                self.requests.refund(1)
+                self.tokens.refund(estimated)
+                self._reject("rate_limit")
+                raise LLMUnavailable(f"LLM rate limit would delay this call {delay:.0f}s")
+            if delay > 0:
+                await asyncio.sleep(delay)
+            metrics.observe("llm_queue_wait_seconds", time.monotonic() - started, "Time waiting for an LLM slot and rate limit")
+            return await self._attempts(messages, config, method, estimated, deadline)
+        finally:
+            self._in_flight -= 1
+            self._semaphore.release()
+            self._gauges()
+
+    def _reject(self, reason):
+        metrics.inc("llm_rejected_total", help_text="LLM calls refused without calling the provider", reason=reason)
+
+    async def _generate(self, messages, config, progress):
+        """
+        Stream the reply and join the chunks. Tokens reach streaming clients
+        through the callbacks as they arrive; progress records that they did.
+        """
+        response = None
+        async for chunk in self.model().astream(messages, config=config):
+            if chunk.content:
+                progress["streamed"] = True
+            response = chunk if response is None else response + chunk
+        return response
+
+    async def _attempts(self, messages, config, method, estimated, deadline):
+        for attempt in range(self.max_retries + 1):
+            metrics.inc("external_calls_total", help_text="Calls to external services", service="groq", method=method)
+            progress = {"streamed": False}
+            try:
+                response = await asyncio.wait_for(self._generate(messages, config, progress), self.timeout)
+            except Exception as e:
+                retry_after = _retry_after(e)
+                if retry_after is not None:
+                    # The provider is telling every caller to back off, not just this one
+                    delay = retry_after
+                    self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+                else:
+                    delay = min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** attempt) * random.uniform(0.5, 1.5)
+
+                if attempt >= self.max_retries or not _retryable(e) or progress["streamed"] \
+                        or time.monotonic() + delay > deadline:
+                    metrics.inc("llm_failures_total", help_text="LLM calls that failed after retries",
+                                error=type(e).__name__)
+                    raise LLMUnavailable(str(e) or type(e).__name__) from e
+
+                metrics.inc("llm_retries_total", help_text="LLM call retries", error=type(e).__name__)
+                logger.warning("LLM call failed; retrying", extra={
+                    "attempt": attempt + 1, "delay": round(delay, 2), "error": type(e).__name__
+                })
+                await asyncio.sleep(delay)
+                self.requests.reserve(1)
+                continue
+
+            usage = getattr(response, "usage_metadata", None) or {}
+            if usage.get("total_tokens"):
+                self.tokens.refund(estimated - usage["total_tokens"])
+            return response
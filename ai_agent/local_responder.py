@@ -0,0 +1,172 @@
+import re
+import datetime
+from typing import Optional
+import pytz
+from ai_agent.intent_detect import LOCAL_TIMEZONE, tokenize
+from ai_agent.metrics import metrics
+
+# Words that may surround a question without changing it ("hey, what time is it please")
+FILLER = {
+    "please", "pls", "plz", "hey", "hi", "hello", "ok", "okay", "so", "tell", "me", "can", "you", "could",
+    "would", "bro", "bhai", "ji", "zara", "batao", "bataiye", "bata", "do", "sir", "now", "right", "the",
+    "kripya", "बताओ", "बताइए", "ज़रा", "जरा", "भाई", "जी", "अभी",
+}
+
+# Romanized Hindi markers; Devanagari is detected by script
+HINGLISH = {
+    "aaj", "kal", "kya", "kaun", "konsa", "kaunsa", "din", "tarikh", "baje", "kitne", "samay", "abhi",
+    "hai", "hain", "ho", "tum", "aap", "namaste", "namaskar", "naam", "batao", "bataiye",
+}
+
+_devanagari_re = re.compile(r"[\u0900-\u097F]")
+
+
+def _phrases(*patterns):
+    # Joined tokens are matched, so word edges are spaces (\b is unreliable for Devanagari)
+    return re.compile(r"(?:^| )(?:" + "|".join(patterns) + r")(?= |$)")
+
+
+PATTERNS = {
+    "identity": _phrases(
+        r"who are you", r"what are you", r"are you an? (?:bot|robot|human|ai)", r"what can you do",
+        r"what(?: is|'s) your name", r"(?:tum|aap) kaun (?:ho|hain|hai)", r"(?:tumhara|aapka) naam kya hai",
+        r"kya (?:tum|aap) bot (?:ho|hain)", r"(?:tum|aap) kya kar sakte (?:ho|hain)",
+        r"(?:तुम|आप) कौन (?:हो|हैं)", r"(?:तुम्हारा|आपका) नाम क्या है",
+    ),
+    "time": _phrases(
+        r"what(?: is|'s)? (?:the )?(?:current )?time(?: is it)?(?: now)?", r"current time", r"time now",
+        r"(?:abhi )?(?:kitne|kitna) baje(?: hai| hain| h)?", r"(?:abhi )?(?:kya )?(?:time|samay) kya (?:hai|hua|ho gaya)",
+        r"(?:abhi )?kya time hai", r"(?:अभी )?कितने बजे(?: हैं| है)?", r"(?:अभी )?(?:समय|टाइम) क्या (?:है|हुआ)",
+    ),
+    "date": _phrases(
+        r"(?:what|which)(?: is|'s)? (?:the )?(?:day|date)(?: is it| it is| was it| will it be| will be| is| was)?"
+        r"(?: (?:today|tomorrow|yesterday))?",
+        r"(?:what(?: is|'s) )?(?:today|tomorrow|yesterday)'?s (?:date|day)",
+        r"(?:what|which) (?:day|date) (?:is|was|will be) (?:today|tomorrow|yesterday)",
+        r"(?:aaj|kal)(?: ka| ki)? (?:kya|kaun sa|konsa|kaunsa) (?:din|tarikh|date|day)(?: hai| h)?",
+        r"(?:aaj|kal) kya hai", r"(?:aaj|kal) ki (?:tarikh|date)(?: kya hai)?",
+        r"(?:आज|कल) (?:कौन सा|कौनसा|क्या) (?:दिन|तारीख)(?: है)?", r"(?:आज|कल) की तारीख(?: क्या है)?", r"(?:आज|कल) क्या है",
+    ),
+    "greeting": _phrases(
+        r"hello", r"hi+", r"hey", r"namaste", r"namaskar", r"good (?:morning|afternoon|evening)", r"नमस्ते", r"नमस्कार",
+    ),
+}
+
+WEEKDAYS = {
+    "hi": ["सोमवार", "मंगलवार", "बुधवार", "गुरुवार", "शुक्रवार", "शनिवार", "रविवार"],
+    "hinglish": ["Somvaar", "Mangalvaar", "Budhvaar", "Guruvaar", "Shukravaar", "Shanivaar", "Ravivaar"],
+}
+MONTHS_HI = ["जनवरी", "फ़रवरी", "मार्च", "अप्रैल", "मई", "जून", "जुलाई", "अगस्त", "सितंबर", "अक्टूबर", "नवंबर", "दिसंबर"]
+
+TEMPLATES = {
+    "en": {
+        "date": {0: "📅 Today is {date}.", 1: "📅 Tomorrow is {date}.", -1: "📅 Yesterday was {date}."},
+        "time": "🕐 It's {time} ({tz}).",
+        "greeting": "👋 Hello! I can book meetings, show your schedule and suggest free times. What would you like to do?",
+        "identity": "🤖 I'm your AI appointment scheduler, connected to your Google Calendar. "
+                    "I can book meetings, show your schedule and suggest free times.",
+    },
+    "hinglish": {
+        "date": {0: "📅 Aaj {date} hai.", 1: "📅 Kal {date} hai.", -1: "📅 Kal {date} tha."},
+        "time": "🕐 Abhi {period} ke {time} baje hain ({tz}).",
+        "greeting": "👋 Namaste! Meeting book karni ho, schedule dekhna ho ya free time jaanna ho, bataiye!",
+        "identity": "🤖 Main aapka AI appointment scheduler hoon. Meetings book karna, schedule dikhana "
+                    "aur free time batana mera kaam hai.",
+    },
+    "hi": {
+        "date": {0: "📅 आज {date} है।", 1: "📅 कल {date} है।", -1: "📅 कल {date} था।"},
+        "time": "🕐 अभी {period} के {time} बजे हैं ({tz})।",
+        "greeting": "👋 नमस्ते! मीटिंग बुक करनी हो, शेड्यूल देखना हो या खाली समय जानना हो, बताइए!",
+        "identity": "🤖 मैं आपका AI अपॉइंटमेंट शेड्यूलर हूँ। मीटिंग बुक करना, शेड्यूल दिखाना और खाली समय बताना मेरा काम है।",
+    },
+}
+
+PERIODS = {
+    "hinglish": [(4, "subah"), (12, "dopahar"), (16, "shaam"), (20, "raat")],
+    "hi": [(4, "सुबह"), (12, "दोपहर"), (16, "शाम"), (20, "रात")],
+}
+
+
+def detect_language(tokens):
+    """"hi" for Devanagari, "hinglish" for romanized Hindi, otherwise "en"."""
+    if any(_devanagari_re.search(token) for token in tokens):
+        return "hi"
+    if HINGLISH.intersection(tokens):
+        return "hinglish"
+    return "en"
+
+
+def _day_offset(tokens, kind_text):
+    # Prefix, so the possessive "tomorrow's date" counts too
+    if any(token.startswith("tomorrow") for token in tokens):
+        return 1
+    if any(token.startswith("yesterday") for token in tokens):
+        return -1
+    # "kal" is both tomorrow and yesterday; in a question about the day it nearly always means tomorrow
+    if kind_text.startswith(("kal", "कल")):
+        return 1
+    return 0
+
+
+def _format_date(day, language):
+    if language == "hi":
+        return f"{WEEKDAYS['hi'][day.weekday()]}, {day.day} {MONTHS_HI[day.month - 1]} {day.year}"
+    if language == "hinglish":
+        return f"{WEEKDAYS['hinglish'][day.weekday()]}, {day.day} {day.strftime('%B %Y')}"
+    return day.strftime("%A, %d %B %Y")
+
+
+def _period(hour, language):
+    name = PERIODS[language][-1][1]
+    for start, label in PERIODS[language]:
+        if hour >= start:
+            name = label
+    return name
+
+
+def match(message):
+    """Return (kind, matched text, tokens) when message is only a date/time/identity/greeting question."""
+    tokens = tokenize(message)
+    if not tokens or len(tokens) > 12:
+        return None
+    text = " ".join(tokens)
+
+    for kind, pattern in PATTERNS.items():
+        found = pattern.search(text)
+        if not found:
+            continue
+        # Confident only if nothing but filler surrounds the question
+        rest = (text[:found.start()] + " " + text[found.end():]).split()
+        if all(word in FILLER or PATTERNS["greeting"].fullmatch(word) for word in rest):
+            return kind, found.group().strip(), tokens
+    return None
+
+
+def local_reply(message, now=None, timezone=LOCAL_TIMEZONE) -> Optional[str]:
+    """
+    Answer date/day/time questions, greetings and "who are you" from
+    templates, in English, Hinglish or Hindi to match the message. Returns
+    None when the message is anything more than that, so the caller can
+    fall back to the LLM.
+    """
+    found = match(message)
+    if found is None:
+        return None
+    kind, matched, tokens = found
+    language = detect_language(tokens)
+    templates = TEMPLATES[language]
+    metrics.inc("local_replies_total", help_text="Chat replies answered without the LLM", kind=kind, language=language)
+
+    if kind in ("greeting", "identity"):
+        return templates[kind]
+
+    tz = pytz.timezone(timezone)
+    now = now.astimezone(tz) if now else datetime.datetime.now(tz)
+    if kind == "time":
+        time_format = "%I:%M %p" if language == "en" else "%I:%M"
+        period = _period(now.hour, language) if language != "en" else ""
+        return templates["time"].format(time=now.strftime(time_format).lstrip("0"), period=period, tz=now.tzname())
+
+    offset = _day_offset(tokens, matched)
+    day = (now + datetime.timedelta(days=offset)).date()
+    return templates["date"][offset].format(date=_format_date(day, language))
@@ -0,0 +1,166 @@
+import os
+import logging
+import functools
+import threading
+from collections import OrderedDict
+
+# Where conversation state lives between turns: "memory", "sqlite" or "off"
+CHAT_MEMORY = os.getenv("CHAT_MEMORY", "memory")
+CHAT_MEMORY_PATH = os.getenv("CHAT_MEMORY_PATH", "chat_memory.db")
+# Sessions kept by the in-process backend before the least recently used is dropped
+CHAT_MEMORY_SESSIONS = int(os.getenv("CHAT_MEMORY_SESSIONS", "1000"))
+# Prompt budget for earlier turns; older turns are folded into the summary
+CHAT_HISTORY_TOKENS = int(os.getenv("CHAT_HISTORY_TOKENS", "1200"))
+CHAT_SUMMARY_TOKENS = int(os.getenv("CHAT_SUMMARY_TOKENS", "150"))
+CHAT_SUMMARIZE = os.getenv("CHAT_SUMMARIZE", "1") == "1"
+
+logger = logging.getLogger(__name__)
+
+# aiosqlite connections handed to checkpointers; each runs a non-daemon thread until closed
+_connections = []
+
+
+def estimate_tokens(text):
+    # ~4 characters per token for English/Hinglish; close enough for budgeting
+    return len(text) // 4 + 1
+
+
+def history_tokens(history):
+    return sum(estimate_tokens(turn["content"]) for turn in history)
+
+
+def split_history(history, budget=CHAT_HISTORY_TOKENS):
+    """
+    Split history into (older, recent) where recent is the newest turns that
+    fit in budget, always starting at a user message. Nothing is split off
+    until the whole history exceeds budget; then recent is cut to half of it
+    so summarizing happens every few turns rather than on every one.
+    """
+    if history_tokens(history) <= budget:
+        return [], history
+
+    target = budget // 2
+    used = 0
+    cut = len(history)
+    while cut > 0 and used + estimate_tokens(history[cut - 1]["content"]) <= target:
+        cut -= 1
+        used += estimate_tokens(history[cut]["content"])
+    while cut < len(history) and history[cut]["role"] != "user":
+        cut += 1
+    return history[:cut], history[cut:]
+
+
+def truncate_summary(summary, max_tokens=CHAT_SUMMARY_TOKENS):
+    limit = max_tokens * 4
+    return summary if len(summary) <= limit else "…" + summary[-limit:]
+
+
+async def compact_history(history, summary, summarize=None, budget=CHAT_HISTORY_TOKENS):
+    """
+    Keep history within budget. Turns that no longer fit are passed to
+    summarize(summary, older) -> new summary when given (and CHAT_SUMMARIZE
+    is on); otherwise, or if summarizing fails, they are simply dropped.
+
+    Returns:
+        (history, summary)
+    """
+    older, recent = split_history(history, budget)
+    if not older:
+        return history, summary
+
+    if summarize and CHAT_SUMMARIZE:
+        try:
+            summary = truncate_summary(await summarize(summary, older))
+        except Exception as e:
+            logger.warning("could not summarize conversation; trimming instead", extra={"error": str(e)})
+    return recent, summary
+
+
+def thread_id(session_id, user_id=None):
+    """Checkpoint thread for a session, scoped to its user so ids cannot collide across tenants."""
+    return f"{user_id or ''}:{session_id}"
+
+
+@functools.lru_cache(maxsize=1)
+def _bounded_memory_saver_class():
+    from langgraph.checkpoint.memory import InMemorySaver
+
+    class BoundedMemorySaver(InMemorySaver):
+        """
+        InMemorySaver that keeps only the latest checkpoint of each session
+        and at most max_sessions sessions, so memory stays flat however long
+        conversations run or however many sessions arrive.
+        """
+
+        def __init__(self, max_sessions=CHAT_MEMORY_SESSIONS):
+            super().__init__()
+            self.max_sessions = max_sessions
+            self._sessions = OrderedDict()  # thread_id -> {(ns, channel): version}
+            self._latest = {}  # (thread_id, ns) -> checkpoint id
+            self._prune_lock = threading.Lock()
+
+        def put(self, config, checkpoint, metadata, new_versions):
+            saved = super().put(config, checkpoint, metadata, new_versions)
+            thread = config["configurable"]["thread_id"]
+            ns = config["configurable"]["checkpoint_ns"]
+
+            with self._prune_lock:
+                # Older checkpoints, their pending writes and superseded channel values
+                previous = self._latest.get((thread, ns))
+                if previous is not None and previous != checkpoint["id"]:
+                    self.storage[thread][ns].pop(previous, None)
+                    self.writes.pop((thread, ns, previous), None)
+                self._latest[(thread, ns)] = checkpoint["id"]
+
+                versions = self._sessions.setdefault(thread, {})
+                self._sessions.move_to_end(thread)
+                for channel, version in new_versions.items():
+                    old = versions.get((ns, channel))
+                    if old is not None and old != version:
+                        self.blobs.pop((thread, ns, channel, old), None)
+                    versions[(ns, channel)] = version
+
+                while len(self._sessions) > self.max_sessions:
+                    self._forget(*self._sessions.popitem(last=False))
+            return saved
+
+        def _forget(self, thread, versions):
+            self.storage.pop(thread, None)
+            for (ns, channel), version in versions.items():
+                self.blobs.pop((thread, ns, channel, version), None)
+                checkpoint_id = self._latest.pop((thread, ns), None)
+                if checkpoint_id is not None:
+                    self.writes.pop((thread, ns, checkpoint_id), None)
+
+    return BoundedMemorySaver
+
+
+def create_checkpointer(backend=CHAT_MEMORY):
+    """
+    Checkpointer for conversation state, or None when memory is off.
+
+    "sqlite" needs the langgraph-checkpoint-sqlite package; without it the
+    in-process backend is used. Call close_checkpointers() on shutdown.
+    """
+    if backend == "off":
+        return None
+
+    if backend == "sqlite":
+        try:
+            import aiosqlite
+            from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+        except ImportError:
+            logger.warning("langgraph-checkpoint-sqlite not installed; keeping chat memory in process")
+        else:
+            # The connection is opened by the saver on first use
+            connection = aiosqlite.connect(CHAT_MEMORY_PATH)
+            _connections.append(connection)
+            return AsyncSqliteSaver(connection)
+
+    return _bounded_memory_saver_class()(max_sessions=CHAT_MEMORY_SESSIONS)
+
+
+async def close_checkpointers():
+    """Close the SQLite connections of checkpointers; their threads would keep the process from exiting."""
+    while _connections:
+        await _connections.pop().close()
@@ -0,0 +1,180 @@
+import os
+import time
+import bisect
+import inspect
+import functools
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+
+# Add a Server-Timing header with per-stage durations to HTTP responses
+SERVER_TIMING = os.getenv("SERVER_TIMING", "0") == "1"
+
+METRIC_PREFIX = "tailortalk_"
+# Histogram buckets in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUANTILES = (0.5, 0.95, 0.99)
+# Recent samples kept per series for quantiles
+RESERVOIR_SIZE = 2048
+
+# Spans recorded during the current request, for Server-Timing
+_request_spans = contextvars.ContextVar("request_spans", default=None)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key, **extra):
+    pairs = list(key) + sorted(extra.items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+class Histogram:
+    """Cumulative bucket counts plus a reservoir of recent samples for p50/p95/p99."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.recent = deque(maxlen=RESERVOIR_SIZE)
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+        self.recent.append(value)
+
+    def quantiles(self):
+        ordered = sorted(self.recent)
+        if not ordered:
+            return {q: 0.0 for q in QUANTILES}
+        return {q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] for q in QUANTILES}
+
+
+class Metrics:
+    """In-process registry of labelled histograms, counters and gauges rendered in Prometheus text format."""
+
+    def __init__(self):
+        self._histograms = {}
+        self._counters = {}
+        self._gauges = {}
+        self._help = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds, help_text="", **labels):
+        with self._lock:
+            self._help.setdefault(name, help_text)
+            series = self._histograms.setdefault(name, {})
+            key = _label_key(labels)
+            if key not in series:
+                series[key] = Histogram()
+            series[key].observe(seconds)
+
+    def inc(self, name, amount=1, help_text="", **labels):
+        with self._lock:
+            self._help.setdefault(name, help_text)
+            series = self._counters.setdefault(name, {})
+            key = _label_key(labels)
+            series[key] = series.get(key, 0) + amount
+
+    def set(self, name, value, help_text="", **labels):
+        with self._lock:
+            self._help.setdefault(name, help_text)
+            self._gauges.setdefault(name, {})[_label_key(labels)] = value
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                full = METRIC_PREFIX + name
+                lines.append(f"# HELP {full} {self._help.get(name) or name}")
+                lines.append(f"# TYPE {full} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{full}{_format_labels(key)} {value}")
+
+            for name, series in sorted(self._gauges.items()):
+                full = METRIC_PREFIX + name
+                lines.append(f"# HELP {full} {self._help.get(name) or name}")
+                lines.append(f"# TYPE {full} gauge")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{full}{_format_labels(key)} {value}")
+
+            for name, series in sorted(self._histograms.items()):
+                full = METRIC_PREFIX + name
+                lines.append(f"# HELP {full} {self._help.get(name) or name}")
+                lines.append(f"# TYPE {full} histogram")
+                for key, hist in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(BUCKETS + (float("inf"),), hist.counts):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else repr(bound)
+                        lines.append(f"{full}_bucket{_format_labels(key, le=le)} {cumulative}")
+                    lines.append(f"{full}_sum{_format_labels(key)} {hist.total}")
+                    lines.append(f"{full}_count{_format_labels(key)} {hist.count}")
+
+                # Percentiles over recent samples, as a separate gauge family
+                lines.append(f"# TYPE {full}_quantile gauge")
+                for key, hist in sorted(series.items()):
+                    for q, value in hist.quantiles().items():
+                        lines.append(f"{full}_quantile{_format_labels(key, quantile=q)} {value}")
+
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._gauges.clear()
+
+
+metrics = Metrics()
+
+
+@contextmanager
+def span(stage):
+    """Time a block as stage_duration_seconds{stage=...} and add it to the request's Server-Timing."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        metrics.observe("stage_duration_seconds", elapsed, "Time spent per processing stage", stage=stage)
+        spans = _request_spans.get()
+        if spans is not None:
+            spans.append((stage, elapsed))
+
+
+def timed(stage):
+    """Decorator form of span() for sync and async functions."""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(stage):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def start_request_spans():
+    """Begin collecting spans for the current request; returns the list to read afterwards."""
+    spans = []
+    _request_spans.set(spans)
+    return spans
+
+
+def server_timing_header(spans):
+    # Same stage can run more than once per request; Server-Timing allows repeats
+    return ", ".join(
+        f'{stage.replace(".", "-")};dur={elapsed * 1000:.1f}' for stage, elapsed in spans
+    )
@@ -0,0 +1,189 @@
+import os
+import re
+import time
+import datetime
+import logging
+import threading
+import importlib.util
+from collections import OrderedDict
+from functools import lru_cache
+from ai_agent.metrics import metrics
+from ai_agent.shared_cache import shared_cache
+
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "2048"))
+# Semantic tier is opt-in: needs sentence-transformers installed
+RESPONSE_CACHE_EMBEDDINGS = os.getenv("RESPONSE_CACHE_EMBEDDINGS", "0") == "1"
+RESPONSE_CACHE_EMBED_MODEL = os.getenv("RESPONSE_CACHE_EMBED_MODEL", "all-MiniLM-L6-v2")
+RESPONSE_CACHE_SIMILARITY = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.92"))
+
+# Answers to these depend on the current time, not just the date
+_time_sensitive_re = re.compile(r"\b(time|now|abhi|samay|baje|minutes? ago)\b")
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text):
+    return " ".join(re.sub(r"[^\w\s']", " ", text.lower()).split())
+
+
+_model_lock = threading.Lock()
+
+
+@lru_cache(maxsize=4)
+def _sentence_model(model_name):
+    # torch and the model weights take seconds to load; only on first use
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
+
+
+def load_local_embedder(model_name=RESPONSE_CACHE_EMBED_MODEL):
+    """
+    Return a text -> unit vector function backed by sentence-transformers, or
+    None when it is not installed. The model is loaded by the first call, not
+    here. Encoding is CPU-bound: call it off the event loop.
+    """
+    if importlib.util.find_spec("sentence_transformers") is None:
+        logger.warning("sentence-transformers not installed; semantic response cache disabled")
+        return None
+
+    def embed(text):
+        # Cache calls arrive on several pool threads; load the model once
+        with _model_lock:
+            model = _sentence_model(model_name)
+        return model.encode(text, normalize_embeddings=True)
+
+    return embed
+
+
+class ResponseCache:
+    """
+    Cache of LLM answers for general questions.
+
+    Lookup is exact on normalised text first, then (if an embedder is
+    configured) by cosine similarity against answers cached the same day.
+    Keys include today's date so "what day is today" is never answered
+    from yesterday, entries expire after ttl seconds and the least
+    recently used entry is evicted once max_entries is reached. With a
+    SharedCache, exact answers are also shared between worker processes.
+
+    get() and put() may block (SharedCache SQLite, embedding), so async
+    callers run them in an executor.
+    """
+
+    def __init__(self, ttl=RESPONSE_CACHE_TTL, max_entries=RESPONSE_CACHE_SIZE,
+                 embed=None, similarity=RESPONSE_CACHE_SIMILARITY, shared=None):
+        self.ttl = ttl
+        self.shared = shared
+        self.max_entries = max_entries
+        self.embed = embed
+        self.similarity = similarity
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, text):
+        """Return a cached answer for text, or None."""
+        normalized = normalize_text(text)
+        if not self._cacheable(normalized):
+            return None
+
+        key = self._key(normalized)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                metrics.inc("cache_requests_total", help_text="Cache lookups by result",
+                            cache="response", result="hit")
+                return entry[0]
+            if entry:
+                del self._entries[key]
+
+        if self.shared is not None:
+            answer = self.shared.get("response:" + key)
+            if answer is not None:
+                # Answered by another worker; keep a local copy for next time
+                with self._lock:
+                    self._entries[key] = (answer, now + self.ttl, None)
+                    self.hits += 1
+                metrics.inc("cache_requests_total", help_text="Cache lookups by result",
+                            cache="response", result="shared")
+                return answer
+
+        answer = self._semantic_get(normalized, now) if self.embed else None
+        with self._lock:
+            if answer is None:
+                self.misses += 1
+            else:
+                self.semantic_hits += 1
+        metrics.inc("cache_requests_total", help_text="Cache lookups by result",
+                    cache="response", result="miss" if answer is None else "semantic_hit")
+        return answer
+
+    def put(self, text, answer):
+        normalized = normalize_text(text)
+        if not self._cacheable(normalized):
+            return
+
+        vector = self.embed(normalized) if self.embed else None
+        with self._lock:
+            key = self._key(normalized)
+            self._entries[key] = (answer, time.monotonic() + self.ttl, vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        if self.shared is not None:
+            self.shared.set("response:" + key, answer, self.ttl)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _cacheable(self, normalized):
+        return bool(normalized) and not _time_sensitive_re.search(normalized)
+
+    def _key(self, normalized):
+        return f"{datetime.date.today().isoformat()}|{normalized}"
+
+    def _semantic_get(self, normalized, now):
+        import numpy as np
+
+        prefix = f"{datetime.date.today().isoformat()}|"
+        with self._lock:
+            candidates = [
+                (key, entry) for key, entry in self._entries.items()
+                if key.startswith(prefix) and entry[1] > now and entry[2] is not None
+            ]
+        if not candidates:
+            return None
+
+        query = self.embed(normalized)
+        scores = np.stack([entry[2] for _, entry in candidates]) @ query
+        best = int(np.argmax(scores))
+        if scores[best] < self.similarity:
+            return None
+
+        key, entry = candidates[best]
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+        return entry[0]
+
+
+# Process-wide cache used by the LLM fallback
+response_cache = ResponseCache(
+    embed=load_local_embedder() if RESPONSE_CACHE_EMBEDDINGS else None, shared=shared_cache
+)
@@ -0,0 +1,125 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+
+# SQLite file shared by every worker process on the machine; unset keeps caches per process
+SHARED_CACHE_PATH = os.getenv("SHARED_CACHE_PATH", "")
+# Bytes of the file read through mmap instead of read() calls
+SHARED_CACHE_MMAP_SIZE = int(os.getenv("SHARED_CACHE_MMAP_SIZE", str(256 * 1024 * 1024)))
+# Expired entries are purged after this many writes
+_PURGE_EVERY = 500
+
+logger = logging.getLogger(__name__)
+
+
+class SharedCache:
+    """
+    Cross-process cache in one SQLite file (WAL, memory-mapped reads).
+
+    - get/set/values/delete: JSON values with a TTL
+    - generation/bump: counters that let one process tell the others a
+      cached thing changed (readers compare against what they last saw)
+    - acquire_lease: one process at a time does a job, e.g. channel renewal
+
+    Each process opens its own connection; WAL lets readers proceed while
+    another process writes.
+    """
+
+    def __init__(self, path=SHARED_CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._writes = 0
+
+    def _connection(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA mmap_size={SHARED_CACHE_MMAP_SIZE}")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS generations (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS leases ("
+                " name TEXT PRIMARY KEY,"
+                " owner TEXT NOT NULL,"
+                " expires_at REAL NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def get(self, key):
+        """Return the value stored under key, or None if missing or expired."""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT value FROM entries WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key, value, ttl):
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT INTO entries (key, value, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at",
+                (key, json.dumps(value, separators=(",", ":")), now + ttl)
+            )
+            self._writes += 1
+            if self._writes % _PURGE_EVERY == 0:
+                conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+
+    def values(self, prefix):
+        """Values of every live key starting with prefix."""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT value FROM entries WHERE key >= ? AND key < ? AND expires_at > ?",
+                (prefix, prefix + "\uffff", time.time())
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def delete(self, key):
+        with self._lock:
+            self._connection().execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def generation(self, name):
+        """Current value of counter name (0 if never bumped)."""
+        with self._lock:
+            row = self._connection().execute("SELECT value FROM generations WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0
+
+    def bump(self, name):
+        """Increment counter name and return the new value."""
+        with self._lock:
+            return self._connection().execute(
+                "INSERT INTO generations (name, value) VALUES (?, 1) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + 1 RETURNING value", (name,)
+            ).fetchone()[0]
+
+    def acquire_lease(self, name, owner, ttl):
+        """Take or extend lease name for owner; False while another owner holds it."""
+        now = time.time()
+        with self._lock:
+            row = self._connection().execute(
+                "INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE leases.owner = excluded.owner OR leases.expires_at <= ? "
+                "RETURNING owner", (name, owner, now + ttl, now)
+            ).fetchone()
+        return row is not None
+
+    def release_lease(self, name, owner):
+        with self._lock:
+            self._connection().execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner))
+
+
+# None unless SHARED_CACHE_PATH is set (the production entry point sets it)
+shared_cache = SharedCache(SHARED_CACHE_PATH) if SHARED_CACHE_PATH else None
@@ -0,0 +1,245 @@
+import os
+import time
+import uuid
+import socket
+import secrets
+import logging
+import threading
+from dataclasses import dataclass, asdict
+from typing import Optional
+from googleapiclient.errors import HttpError
+from ai_agent.calendar_client import calendar_clients
+from ai_agent.metrics import metrics
+from ai_agent.shared_cache import shared_cache
+
+# Public HTTPS address of POST /calendar/notifications; push is off when unset
+WATCH_WEBHOOK_URL = os.getenv("WATCH_WEBHOOK_URL", "")
+# Requested channel lifetime (Google caps events channels at about a week)
+WATCH_TTL = int(os.getenv("WATCH_TTL", str(7 * 24 * 3600)))
+# Channels are replaced this long before they expire
+WATCH_RENEW_BEFORE = int(os.getenv("WATCH_RENEW_BEFORE", "3600"))
+# How often the renewal loop runs
+WATCH_CHECK_INTERVAL = float(os.getenv("WATCH_CHECK_INTERVAL", "300"))
+# Only the worker process holding this lease registers and renews channels
+_MAINTAINER_LEASE = "watch-maintainer"
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class Channel:
+    """A registered events().watch channel."""
+    id: str
+    token: str
+    resource_id: str
+    calendar_id: str
+    user_id: Optional[str]
+    expiration: float  # epoch seconds
+
+
+class WatchManager:
+    """
+    Calendar push notifications in place of polling.
+
+    Registers an events().watch channel per (user, calendar), so Google
+    POSTs to the webhook whenever that calendar changes. A notification
+    marks the user's cached events and free/busy stale and runs one
+    incremental sync, so later reads are served locally. maintain()
+    replaces channels before they expire and watches newly active users.
+
+    With several worker processes, channels are recorded in the SharedCache
+    so whichever worker receives a notification can validate it, and a
+    lease makes a single worker responsible for maintain().
+    """
+
+    def __init__(self, address=WATCH_WEBHOOK_URL, clients=calendar_clients, ttl=WATCH_TTL,
+                 renew_before=WATCH_RENEW_BEFORE, shared=shared_cache):
+        self.address = address
+        self.clients = clients
+        self.ttl = ttl
+        self.renew_before = renew_before
+        self.shared = shared
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._channels = {}  # channel id -> Channel
+        self._targets = {}  # (user_id, calendar_id) -> Channel
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return bool(self.address)
+
+    def watch(self, user_id=None, calendar_id='primary'):
+        """Make sure (user_id, calendar_id) has a channel that is not about to expire. Blocking."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            current = self._targets.get((user_id, calendar_id))
+        if current is None:
+            current = self._shared_channel(self._shared_target(user_id, calendar_id))
+            if current is not None:
+                # Registered by the previous maintainer process; this one renews it from now on
+                with self._lock:
+                    self._channels[current.id] = current
+                    self._targets[(user_id, calendar_id)] = current
+                    metrics.set("watch_channels", len(self._channels), "Active calendar watch channels")
+        if current is not None and current.expiration - time.time() > self.renew_before:
+            if self.shared is not None:
+                # Keeps the other processes' shared "watched" mark from lapsing
+                self.clients.get(user_id).event_store.watch(calendar_id)
+            return current
+
+        client = self.clients.get(user_id)
+        service = client.service()
+        if not service:
+            return None
+
+        channel = Channel(
+            id=uuid.uuid4().hex, token=secrets.token_urlsafe(24), resource_id="",
+            calendar_id=calendar_id, user_id=user_id, expiration=0.0
+        )
+        try:
+            response = service.events().watch(calendarId=calendar_id, body={
+                "id": channel.id,
+                "type": "web_hook",
+                "address": self.address,
+                "token": channel.token,
+                "params": {"ttl": str(self.ttl)},
+            }).execute()
+        except HttpError as e:
+            logger.error("could not register watch channel", extra={"calendar_id": calendar_id, "error": str(e)})
+            metrics.inc("watch_channels_total", help_text="Watch channel registrations", result="error")
+            return None
+
+        channel.resource_id = response.get("resourceId", "")
+        channel.expiration = int(response.get("expiration") or (time.time() + self.ttl) * 1000) / 1000
+        with self._lock:
+            self._channels[channel.id] = channel
+            self._targets[(user_id, calendar_id)] = channel
+            metrics.set("watch_channels", len(self._channels), "Active calendar watch channels")
+        if self.shared is not None:
+            ttl = channel.expiration - time.time()
+            self.shared.set(f"watch:channel:{channel.id}", asdict(channel), ttl)
+            self.shared.set(self._shared_target(user_id, calendar_id), channel.id, ttl)
+        client.event_store.watch(calendar_id)
+        metrics.inc("watch_channels_total", help_text="Watch channel registrations",
+                    result="renewed" if current else "created")
+        logger.info("watching calendar", extra={"calendar_id": calendar_id, "expires_in": round(channel.expiration - time.time())})
+
+        if current is not None:
+            # The new channel is live before the old one goes away, so no change is missed
+            self._stop(current)
+        return channel
+
+    def maintain(self):
+        """Renew channels close to expiry and watch users that have become active. Blocking."""
+        if not self.enabled:
+            return
+        if self.shared is not None and not self.shared.acquire_lease(
+                _MAINTAINER_LEASE, self.owner, WATCH_CHECK_INTERVAL * 2):
+            return  # another worker process maintains the channels
+        now = time.time()
+        with self._lock:
+            targets = set(self._targets)
+            expired = [c for c in self._channels.values() if c.expiration <= now]
+        for channel in expired:
+            self._forget(channel)
+        targets.add((None, 'primary'))
+        targets.update((user_id, 'primary') for user_id in self.clients.user_ids())
+        for user_id, calendar_id in targets:
+            self.watch(user_id, calendar_id)
+
+    def stop_all(self):
+        """Stop every channel, e.g. on shutdown. Blocking."""
+        with self._lock:
+            channels = list(self._channels.values())
+        for channel in channels:
+            self._stop(channel)
+        if self.shared is not None:
+            # Let the next process to start take over right away
+            self.shared.release_lease(_MAINTAINER_LEASE, self.owner)
+
+    def notification(self, headers):
+        """
+        Validate a push notification's X-Goog-* headers and mark the watched
+        calendar stale. The sync itself is apply(); this only reads and bumps
+        the SharedCache, but that is SQLite, so async callers use an executor.
+
+        Returns:
+            The Channel to sync, or None for sync handshakes and unknown or forged channels
+        """
+        channel_id = headers.get("x-goog-channel-id")
+        state = headers.get("x-goog-resource-state")
+        with self._lock:
+            channel = self._channels.get(channel_id)
+        if channel is None and channel_id:
+            # Registered by another worker process
+            channel = self._shared_channel(f"watch:channel:{channel_id}")
+        if channel is None or not secrets.compare_digest(headers.get("x-goog-channel-token") or "", channel.token):
+            metrics.inc("watch_notifications_total", help_text="Calendar push notifications", result="unknown")
+            return None
+        if state == "sync":
+            # Sent once when a channel is created
+            metrics.inc("watch_notifications_total", help_text="Calendar push notifications", result="sync")
+            return None
+
+        metrics.inc("watch_notifications_total", help_text="Calendar push notifications", result="changed")
+        client = self.clients.get(channel.user_id)
+        client.event_store.invalidate(channel.calendar_id)
+        client.freebusy.invalidate(channel.calendar_id)
+        return channel
+
+    def apply(self, channel):
+        """Pull the changes behind a notification into the local store. Blocking."""
+        client = self.clients.get(channel.user_id)
+        service = client.service()
+        if not service:
+            return 0
+        try:
+            synced = client.event_store.refresh(service, channel.calendar_id)
+        except HttpError as e:
+            # The window stays stale, so the next read syncs instead
+            logger.error("sync after notification failed", extra={"calendar_id": channel.calendar_id, "error": str(e)})
+            return 0
+        logger.info("synced after notification", extra={"calendar_id": channel.calendar_id, "windows": synced})
+        return synced
+
+    def _shared_target(self, user_id, calendar_id):
+        return f"watch:target:{user_id or ''}:{calendar_id}"
+
+    def _shared_channel(self, key):
+        """Channel stored under key (a target key resolves to its channel id first)."""
+        if self.shared is None:
+            return None
+        value = self.shared.get(key)
+        if isinstance(value, str):
+            value = self.shared.get(f"watch:channel:{value}")
+        return Channel(**value) if value else None
+
+    def _stop(self, channel):
+        self._forget(channel)
+        service = self.clients.get(channel.user_id).service()
+        if not service:
+            return
+        try:
+            service.channels().stop(body={"id": channel.id, "resourceId": channel.resource_id}).execute()
+        except HttpError as e:
+            # Already expired or stopped; it will lapse on its own
+            logger.warning("could not stop watch channel", extra={"channel_id": channel.id, "error": str(e)})
+
+    def _forget(self, channel):
+        with self._lock:
+            self._channels.pop(channel.id, None)
+            target = (channel.user_id, channel.calendar_id)
+            replaced = self._targets.get(target) is not channel
+            if not replaced:
+                self._targets.pop(target, None)
+            metrics.set("watch_channels", len(self._channels), "Active calendar watch channels")
+        if self.shared is not None:
+            self.shared.delete(f"watch:channel:{channel.id}")
+            if self.shared.get(self._shared_target(*target)) == channel.id:
+                self.shared.delete(self._shared_target(*target))
+        if not replaced:
+            self.clients.get(channel.user_id).event_store.unwatch(channel.calendar_id)
+
+
+watch_manager = WatchManager()
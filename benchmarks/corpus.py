@@ -0,0 +1,42 @@
+"""Representative /chat messages by intent, including Hinglish phrasing."""
+
+BOOKING = [
+    "book a meeting tomorrow at 3pm with rahul",
+    "schedule a call with priya next friday at 11am",
+    "arrange an appointment tomorrow 5pm for 45 minutes",
+    "set meeting with the design team tomorrow at 10am",
+    "kal 4pm baithak book karna with amit",
+]
+
+FETCH = [
+    "show my meetings",
+    "what meetings do I have today",
+    "aaj ki meetings dikhao",
+    "list upcoming events",
+    "meri meeting list",
+]
+
+SUGGEST = [
+    "when am i free tomorrow",
+    "suggest a time for a 30 minute call",
+    "kal khali samay batao",
+]
+
+GENERAL = [
+    "who are you",
+    "what day is today",
+    "aaj kaun sa din hai",
+    "hello",
+    "namaste",
+    "can you explain what a stand-up meeting is",
+    "tell me a fun fact about calendars",
+]
+
+CORPUS = {
+    "booking": BOOKING,
+    "fetch": FETCH,
+    "suggest": SUGGEST,
+    "general": GENERAL,
+}
+
+ALL_MESSAGES = [message for messages in CORPUS.values() for message in messages]
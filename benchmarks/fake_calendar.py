@@ -0,0 +1,307 @@
+"""
+In-process stand-in for the googleapiclient Calendar v3 service.
+
+Implements the parts of the API this project calls (events list/get/
+insert/patch/delete with pagination and sync tokens, events watch and channel
+stop, freebusy query, calendar list and batch requests) over generated
+data, with optional injected latency per HTTP round trip. Changes to a
+watched calendar queue push notifications for LocalNotifier
+(benchmarks/fake_notifier.py) to deliver.
+"""
+import time
+import random
+import bisect
+import datetime
+import itertools
+import threading
+import httplib2
+from googleapiclient.errors import HttpError
+
+
+def _parse(value):
+    return datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def _start_ts(event):
+    start = event['start']
+    if 'dateTime' in start:
+        return _parse(start['dateTime']).timestamp()
+    return datetime.datetime.fromisoformat(start['date']).replace(tzinfo=datetime.timezone.utc).timestamp()
+
+
+def _end_ts(event):
+    end = event['end']
+    if 'dateTime' in end:
+        return _parse(end['dateTime']).timestamp()
+    return datetime.datetime.fromisoformat(end['date']).replace(tzinfo=datetime.timezone.utc).timestamp()
+
+
+def _http_error(status, message):
+    return HttpError(httplib2.Response({'status': status}), f'{{"error": {{"message": "{message}"}}}}'.encode())
+
+
+class FakeRequest:
+    """Deferred call with the same execute() shape as googleapiclient's HttpRequest."""
+
+    def __init__(self, service, func):
+        self.service = service
+        self.func = func
+
+    def execute(self, http=None, num_retries=0):
+        self.service.round_trip()
+        return self.func()
+
+
+class FakeBatch:
+    def __init__(self, service, callback):
+        self.service = service
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id=None, callback=None):
+        self.requests.append((request_id or str(len(self.requests)), request, callback))
+
+    def execute(self, http=None):
+        # One round trip for the whole batch
+        self.service.round_trip()
+        for request_id, request, callback in self.requests:
+            try:
+                response, error = request.func(), None
+            except Exception as e:
+                response, error = None, e
+            (callback or self.callback)(request_id, response, error)
+
+
+class _Events:
+    def __init__(self, service):
+        self.service = service
+
+    def list(self, calendarId='primary', timeMin=None, timeMax=None, syncToken=None,
+             pageToken=None, maxResults=250, **_ignored):
+        return FakeRequest(self.service, lambda: self.service.list_events(
+            calendarId, timeMin, timeMax, syncToken, pageToken, maxResults))
+
+    def get(self, calendarId='primary', eventId=None, **_ignored):
+        return FakeRequest(self.service, lambda: self.service.get_event(calendarId, eventId))
+
+    def insert(self, calendarId='primary', body=None, **_ignored):
+        return FakeRequest(self.service, lambda: self.service.insert_event(calendarId, body))
+
+    def patch(self, calendarId='primary', eventId=None, body=None, **_ignored):
+        return FakeRequest(self.service, lambda: self.service.patch_event(calendarId, eventId, body))
+
+    def delete(self, calendarId='primary', eventId=None, **_ignored):
+        return FakeRequest(self.service, lambda: self.service.delete_event(calendarId, eventId))
+
+    def watch(self, calendarId='primary', body=None, **_ignored):
+        return FakeRequest(self.service, lambda: self.service.watch_events(calendarId, body))
+
+
+class _Channels:
+    def __init__(self, service):
+        self.service = service
+
+    def stop(self, body=None):
+        return FakeRequest(self.service, lambda: self.service.stop_channel(body))
+
+
+class _FreeBusy:
+    def __init__(self, service):
+        self.service = service
+
+    def query(self, body=None):
+        return FakeRequest(self.service, lambda: self.service.query_freebusy(body))
+
+
+class _CalendarList:
+    def __init__(self, service):
+        self.service = service
+
+    def list(self, **_ignored):
+        return FakeRequest(self.service, lambda: {
+            'items': [{'id': cid, 'summary': cid, 'primary': cid == 'primary'}
+                      for cid in self.service.calendars]
+        })
+
+
+class FakeCalendarService:
+    """
+    Generated calendars served from memory.
+
+    Args:
+        events_per_calendar: events generated per calendar
+        calendars: calendar ids (the first is treated as primary)
+        latency_ms: sleep added to every round trip (single call or batch)
+        seed: random seed so runs are comparable
+    """
+
+    def __init__(self, events_per_calendar=500, calendars=('primary',), latency_ms=0.0, seed=7):
+        self.latency = latency_ms / 1000
+        self.calendars = {cid: [] for cid in calendars}
+        self.calls = 0
+        self._ids = itertools.count()
+        self._changes = []
+        self._deleted = {}  # event id -> cancelled event; Google keeps ids of deleted events taken
+        self.watch_channels = {}  # channel id -> watch request body, resourceId and calendar
+        self.notifications = []  # (address, headers) waiting for LocalNotifier
+        self._lock = threading.Lock()
+        rng = random.Random(seed)
+
+        now = datetime.datetime.now(datetime.timezone.utc).replace(minute=0, second=0, microsecond=0)
+        for cid in calendars:
+            for _ in range(events_per_calendar):
+                start = now + datetime.timedelta(days=rng.randint(-30, 365), hours=rng.randint(-8, 8))
+                end = start + datetime.timedelta(minutes=rng.choice((15, 30, 45, 60, 90)))
+                self.calendars[cid].append(self._new_event(f"Event {rng.randint(1, 9999)}", start, end))
+            self.calendars[cid].sort(key=_start_ts)
+
+    # googleapiclient resource accessors
+    def events(self):
+        return _Events(self)
+
+    def channels(self):
+        return _Channels(self)
+
+    def freebusy(self):
+        return _FreeBusy(self)
+
+    def calendarList(self):
+        return _CalendarList(self)
+
+    def new_batch_http_request(self, callback=None):
+        return FakeBatch(self, callback)
+
+    def round_trip(self):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    # Data operations
+    def _new_event(self, summary, start, end):
+        return {
+            'id': f"evt{next(self._ids)}",
+            'status': 'confirmed',
+            'summary': summary,
+            'start': {'dateTime': start.isoformat()},
+            'end': {'dateTime': end.isoformat()},
+        }
+
+    def _store(self, cid, event):
+        events = self.calendars.setdefault(cid, [])
+        keys = [_start_ts(e) for e in events]
+        events.insert(bisect.bisect(keys, _start_ts(event)), event)
+
+    def _record_change(self, cid, event):
+        self._changes.append((cid, event))
+        for channel in self.watch_channels.values():
+            if channel['calendar_id'] == cid:
+                self._notify(channel, 'exists')
+
+    def _notify(self, channel, state):
+        channel['messages'] += 1
+        self.notifications.append((channel['address'], {
+            'X-Goog-Channel-ID': channel['id'],
+            'X-Goog-Channel-Token': channel.get('token') or '',
+            'X-Goog-Channel-Expiration': channel['expiration_text'],
+            'X-Goog-Resource-ID': channel['resourceId'],
+            'X-Goog-Resource-State': state,
+            'X-Goog-Message-Number': str(channel['messages']),
+        }))
+
+    def watch_events(self, cid, body):
+        with self._lock:
+            ttl = int((body.get('params') or {}).get('ttl', 604800))
+            expiration = int((time.time() + ttl) * 1000)
+            channel = dict(
+                body, calendar_id=cid, resourceId=f"res-{cid}", messages=0,
+                expiration=expiration, expiration_text=str(expiration)
+            )
+            self.watch_channels[body['id']] = channel
+            # Google confirms a new channel with a "sync" message
+            self._notify(channel, 'sync')
+            return {
+                'kind': 'api#channel', 'id': body['id'], 'resourceId': channel['resourceId'],
+                'resourceUri': f"https://www.googleapis.com/calendar/v3/calendars/{cid}/events",
+                'token': body.get('token'), 'expiration': str(expiration),
+            }
+
+    def stop_channel(self, body):
+        with self._lock:
+            channel = self.watch_channels.get(body['id'])
+            if channel is None or channel['resourceId'] != body.get('resourceId'):
+                raise KeyError(body['id'])
+            del self.watch_channels[body['id']]
+            return ''
+
+    def list_events(self, cid, time_min, time_max, sync_token, page_token, max_results):
+        with self._lock:
+            if sync_token is not None:
+                changed = [dict(e) for c, e in self._changes[int(sync_token):] if c == cid]
+                return {'items': changed, 'nextSyncToken': str(len(self._changes))}
+
+            events = self.calendars.get(cid, [])
+            lo = _parse(time_min).timestamp() if time_min else float('-inf')
+            hi = _parse(time_max).timestamp() if time_max else float('inf')
+            matching = [e for e in events if _start_ts(e) < hi and _end_ts(e) > lo]
+            offset = int(page_token or 0)
+            page = matching[offset:offset + max_results]
+            result = {'items': [dict(e) for e in page]}
+            if offset + max_results < len(matching):
+                result['nextPageToken'] = str(offset + max_results)
+            else:
+                result['nextSyncToken'] = str(len(self._changes))
+            return result
+
+    def get_event(self, cid, event_id):
+        with self._lock:
+            for event in self.calendars.get(cid, []):
+                if event['id'] == event_id:
+                    return dict(event)
+            if event_id in self._deleted:
+                return dict(self._deleted[event_id])
+        raise _http_error(404, "Not Found")
+
+    def insert_event(self, cid, body):
+        with self._lock:
+            event_id = body.get('id') or f"evt{next(self._ids)}"
+            if event_id in self._deleted or any(e['id'] == event_id for e in self.calendars.get(cid, [])):
+                raise _http_error(409, "The requested identifier already exists.")
+            event = dict(body, id=event_id, status='confirmed',
+                         htmlLink='https://calendar.google.com/event?eid=fake')
+            self._store(cid, event)
+            self._record_change(cid, event)
+            return dict(event)
+
+    def patch_event(self, cid, event_id, body):
+        with self._lock:
+            for event in self.calendars.get(cid, []):
+                if event['id'] == event_id:
+                    event.update(body)
+                    self._record_change(cid, event)
+                    return dict(event)
+        raise KeyError(event_id)
+
+    def delete_event(self, cid, event_id):
+        with self._lock:
+            events = self.calendars.get(cid, [])
+            for i, event in enumerate(events):
+                if event['id'] == event_id:
+                    del events[i]
+                    self._deleted[event_id] = dict(event, status='cancelled')
+                    self._record_change(cid, {'id': event_id, 'status': 'cancelled'})
+                    return ''
+        raise KeyError(event_id)
+
+    def query_freebusy(self, body):
+        lo, hi = _parse(body['timeMin']).timestamp(), _parse(body['timeMax']).timestamp()
+        calendars = {}
+        with self._lock:
+            for item in body['items']:
+                busy = [
+                    {'start': e['start']['dateTime'], 'end': e['end']['dateTime']}
+                    for e in self.calendars.get(item['id'], [])
+                    if 'dateTime' in e['start'] and _start_ts(e) < hi and _end_ts(e) > lo
+                ]
+                calendars[item['id']] = {'busy': busy}
+        return {'calendars': calendars}
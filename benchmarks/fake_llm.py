@@ -0,0 +1,46 @@
+"""Chat model stand-in for ChatGroq with configurable latency and token streaming."""
+import time
+import asyncio
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+REPLY = "I'm your scheduling assistant. I can book meetings, show your schedule and answer general questions."
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Returns a canned reply after latency_ms, streaming it word by word
+    with token_latency_ms between chunks. calls counts invocations.
+    """
+
+    latency_ms: float = 0.0
+    token_latency_ms: float = 0.0
+    reply: str = REPLY
+    calls: int = 0
+
+    @property
+    def _llm_type(self):
+        return "fake-groq"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency_ms / 1000)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.reply))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.latency_ms / 1000)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.reply))])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.latency_ms / 1000)
+        for i, word in enumerate(self.reply.split(" ")):
+            text = word if i == 0 else " " + word
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=text))
+            if run_manager:
+                await run_manager.on_llm_new_token(text, chunk=chunk)
+            yield chunk
+            if self.token_latency_ms:
+                await asyncio.sleep(self.token_latency_ms / 1000)
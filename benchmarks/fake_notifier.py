@@ -0,0 +1,116 @@
+"""
+Stand-in for Google's push service: delivers the notifications queued by
+FakeCalendarService to the app's /calendar/notifications webhook, so the
+watch -> notify -> incremental sync flow runs without Google.
+
+Running the module exercises that flow end to end against main.app and
+prints what each step cost in Calendar API calls.
+
+Usage:
+    python -m benchmarks.fake_notifier --events 2000
+"""
+import os
+import json
+import asyncio
+import argparse
+import datetime
+
+os.environ.setdefault("API_KEY", "benchmark")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import httpx
+
+from benchmarks.fake_calendar import FakeCalendarService
+from benchmarks.fake_llm import FakeChatModel
+
+WEBHOOK_ADDRESS = "https://tailortalk.test/calendar/notifications"
+
+
+class LocalNotifier:
+    """
+    Posts queued notifications to the webhook, in order, the way Google
+    does (empty body, X-Goog-* headers).
+
+    Args:
+        service: the FakeCalendarService whose notifications to deliver
+        app: ASGI app to deliver to in-process; None posts to each
+            channel's address over the network instead
+    """
+
+    def __init__(self, service, app=None):
+        self.service = service
+        self.app = app
+        self.delivered = 0
+
+    async def deliver(self):
+        """Deliver everything queued so far; returns the webhook's status codes."""
+        with self.service._lock:
+            pending, self.service.notifications = self.service.notifications, []
+        if not pending:
+            return []
+
+        transport = httpx.ASGITransport(app=self.app) if self.app is not None else None
+        statuses = []
+        async with httpx.AsyncClient(transport=transport) as client:
+            for address, headers in pending:
+                response = await client.post(address, headers=headers)
+                statuses.append(response.status_code)
+        self.delivered += len(statuses)
+        return statuses
+
+
+async def exercise(events=2000):
+    """Watch the fake calendar, change it behind the app's back, notify, and read again."""
+    import main
+    from benchmarks.run import install_fakes
+    from ai_agent.watch import watch_manager
+    from ai_agent.calendar_io import run_calendar_io
+
+    service = FakeCalendarService(events)
+    install_fakes(service, FakeChatModel())
+    watch_manager.address = WEBHOOK_ADDRESS
+    notifier = LocalNotifier(service, main.app)
+    report = {}
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench") as client:
+        async def read(step):
+            calls = service.calls
+            response = await client.get("/events", params={"limit": 2500})
+            report[step] = {"events": len(response.json()["events"]), "google_calls": service.calls - calls}
+
+        channel = await run_calendar_io(watch_manager.watch)
+        report["watch"] = {"channel": channel.id, "handshake": await notifier.deliver()}
+        await read("first read")
+        await read("repeat read")
+
+        # Someone else adds an event in Google Calendar
+        start = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(days=1)
+        service.insert_event("primary", {
+            "summary": "Added elsewhere",
+            "start": {"dateTime": start.isoformat()},
+            "end": {"dateTime": (start + datetime.timedelta(hours=1)).isoformat()},
+        })
+        calls = service.calls
+        statuses = await notifier.deliver()
+        # Background sync started by the webhook runs on the calendar I/O pool
+        for _ in range(100):
+            if service.calls > calls:
+                break
+            await asyncio.sleep(0.01)
+        report["notification"] = {"statuses": statuses, "google_calls": service.calls - calls}
+        await read("read after change")
+
+        await run_calendar_io(watch_manager.stop_all)
+        report["stopped"] = {"channels left": len(service.watch_channels)}
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=2000, help="events in the fake calendar")
+    args = parser.parse_args(argv)
+    print(json.dumps(asyncio.run(exercise(args.events)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
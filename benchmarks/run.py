@@ -0,0 +1,289 @@
+"""
+Offline benchmark for the TailorTalk API.
+
+Runs main.app in-process against FakeCalendarService and FakeChatModel,
+so no Google or Groq access is needed, and reports:
+
+- micro benchmarks for analyze_message, find_free_slots and one graph
+  turn per intent,
+- throughput and p50/p95/p99 latency for /chat, /events and /calendar
+  under concurrent load,
+- peak memory allocated per request for each endpoint,
+- cold-start cost (see benchmarks/startup.py).
+
+Usage:
+    python -m benchmarks.run --requests 200 --concurrency 20 --events 2000
+    python -m benchmarks.run --json results.json --compare baseline.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import datetime
+import statistics
+import tracemalloc
+
+os.environ.setdefault("API_KEY", "benchmark")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import httpx
+
+from benchmarks.corpus import ALL_MESSAGES, CORPUS
+from benchmarks.fake_calendar import FakeCalendarService
+from benchmarks.fake_llm import FakeChatModel
+from benchmarks import startup
+
+
+def install_fakes(service, llm):
+    """Point the app's calendar client and LLM at the stand-ins."""
+    from ai_agent import calendar_client
+    import ai_agent.ai_integration as ai_integration
+    from ai_agent.llm_gateway import LLMGateway
+
+    calendar_client.default_client.service = lambda: service
+    ai_integration.llm = llm
+    # The fake has no rate limits; keep pacing out of the measurements
+    ai_integration.llm_gateway = LLMGateway(ai_integration.get_llm, requests_per_minute=0, tokens_per_minute=0)
+
+
+def reset_caches():
+    from ai_agent.event_store import event_store
+    from ai_agent.freebusy import freebusy_engine
+    from ai_agent.response_cache import response_cache
+    from ai_agent.intent_detect import _parse_datetime
+
+    event_store.clear()
+    freebusy_engine.invalidate()
+    response_cache.clear()
+    _parse_datetime.cache_clear()
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def summarize(latencies, wall):
+    return {
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / wall, 1) if wall else 0.0,
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+def time_calls(func, inputs, repeat=1):
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for item in inputs:
+            t = time.perf_counter()
+            func(item)
+            latencies.append(time.perf_counter() - t)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def micro_benchmarks():
+    from ai_agent.intent_detect import analyze_message, _parse_datetime
+    from ai_agent.calendar_setup import find_free_slots
+    from ai_agent.freebusy import freebusy_engine
+    from ai_agent.ai_integration import get_graph
+
+    results = {}
+
+    def cold_analyze(message):
+        _parse_datetime.cache_clear()
+        analyze_message(message)
+
+    results["analyze_message (cold)"] = time_calls(cold_analyze, ALL_MESSAGES, repeat=3)
+    results["analyze_message (cached)"] = time_calls(analyze_message, ALL_MESSAGES, repeat=3)
+
+    today = datetime.date.today()
+    days = [today + datetime.timedelta(days=i) for i in range(14)]
+
+    def cold_free_slots(day):
+        freebusy_engine.invalidate()
+        find_free_slots(day)
+
+    results["find_free_slots (cold)"] = time_calls(cold_free_slots, days)
+    # The engine keeps coverage for the range it last fetched, so repeat one warmed day
+    find_free_slots(today)
+    results["find_free_slots (cached)"] = time_calls(find_free_slots, [today] * len(days))
+
+    for intent, messages in CORPUS.items():
+        results[f"graph turn: {intent}"] = time_calls(
+            lambda message: asyncio.run(get_graph().ainvoke({"input": message})), messages
+        )
+    return results
+
+
+async def load_endpoint(client, make_request, total, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one(i):
+        nonlocal errors
+        async with semaphore:
+            t = time.perf_counter()
+            response = await make_request(client, i)
+            latencies.append(time.perf_counter() - t)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    result = summarize(latencies, time.perf_counter() - started)
+    result["errors"] = errors
+    return result
+
+
+def endpoint_requests(seed=11):
+    rng = random.Random(seed)
+    today = datetime.date.today().replace(day=1)
+    months = [today + datetime.timedelta(days=31 * i) for i in range(-1, 12)]
+
+    async def chat(client, i):
+        return await client.post("/chat", json={"message": rng.choice(ALL_MESSAGES)})
+
+    async def events(client, i):
+        first = rng.choice(months).replace(day=1)
+        return await client.get("/events", params={
+            "start": (first - datetime.timedelta(days=7)).isoformat(),
+            "end": (first + datetime.timedelta(days=42)).isoformat(),
+        })
+
+    async def calendars(client, i):
+        return await client.get("/calendar")
+
+    return {"/chat": chat, "/events": events, "/calendar": calendars}
+
+
+async def load_benchmarks(app, total, concurrency):
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name, make_request in endpoint_requests().items():
+            results[name] = await load_endpoint(client, make_request, total, concurrency)
+    return results
+
+
+async def allocation_benchmarks(app, per_endpoint):
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    tracemalloc.start()
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for name, make_request in endpoint_requests(seed=13).items():
+                peaks = []
+                for i in range(per_endpoint):
+                    tracemalloc.reset_peak()
+                    before, _ = tracemalloc.get_traced_memory()
+                    await make_request(client, i)
+                    _, peak = tracemalloc.get_traced_memory()
+                    peaks.append(peak - before)
+                results[name] = {
+                    "mean_peak_kib": round(statistics.fmean(peaks) / 1024, 1),
+                    "max_peak_kib": round(max(peaks) / 1024, 1),
+                }
+    finally:
+        tracemalloc.stop()
+    return results
+
+
+def print_table(title, rows):
+    print(f"\n== {title} ==")
+    if not rows:
+        return
+    columns = list(next(iter(rows.values())).keys())
+    width = max(len(name) for name in rows) + 2
+    print("".ljust(width) + "".join(c.rjust(16) for c in columns))
+    for name, row in rows.items():
+        print(name.ljust(width) + "".join(str(row[c]).rjust(16) for c in columns))
+
+
+def compare(results, baseline_path, tolerance):
+    """Return regressions where p95 latency or startup time grew by more than tolerance (fraction)."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    regressions = []
+    for section in ("micro", "load"):
+        for name, row in results.get(section, {}).items():
+            before = baseline.get(section, {}).get(name)
+            if before and before.get("p95_ms") and row["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+                regressions.append(f"{section}/{name}: p95 {before['p95_ms']}ms -> {row['p95_ms']}ms")
+    for key in ("import_ms", "first_chat_ms", "warm_first_chat_ms"):
+        now, before = results.get("startup", {}).get(key), baseline.get("startup", {}).get(key)
+        if now and before and now > before * (1 + tolerance):
+            regressions.append(f"startup/{key}: {before}ms -> {now}ms")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint in the load phase")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--events", type=int, default=1000, help="events per fake calendar")
+    parser.add_argument("--calendars", type=int, default=1, help="number of fake calendars")
+    parser.add_argument("--calendar-latency-ms", type=float, default=20.0)
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0)
+    parser.add_argument("--token-latency-ms", type=float, default=5.0)
+    parser.add_argument("--alloc-requests", type=int, default=20, help="requests per endpoint under tracemalloc")
+    parser.add_argument("--startup-runs", type=int, default=3, help="fresh interpreters per startup measurement (0 skips)")
+    parser.add_argument("--skip-micro", action="store_true")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="baseline JSON from an earlier --json run")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 growth vs baseline")
+    args = parser.parse_args(argv)
+
+    calendar_ids = ["primary"] + [f"team{i}@example.com" for i in range(1, args.calendars)]
+    service = FakeCalendarService(args.events, calendar_ids, latency_ms=args.calendar_latency_ms)
+    llm = FakeChatModel(latency_ms=args.llm_latency_ms, token_latency_ms=args.token_latency_ms)
+    install_fakes(service, llm)
+
+    import main as app_module
+
+    results = {"config": vars(args)}
+    if args.startup_runs:
+        results["startup"] = startup.measure(args.startup_runs)
+        slowest = results["startup"]["slowest_imports"]
+        print_table("startup (ms)", {
+            key: {"ms": value} for key, value in results["startup"].items() if key != "slowest_imports"
+        })
+        print("slowest imports (ms): " + ", ".join(f"{name} {ms}" for name, ms in slowest.items()))
+
+    if not args.skip_micro:
+        reset_caches()
+        results["micro"] = micro_benchmarks()
+        print_table("micro benchmarks", results["micro"])
+
+    reset_caches()
+    calls_before, llm_before = service.calls, llm.calls
+    results["load"] = asyncio.run(load_benchmarks(app_module.app, args.requests, args.concurrency))
+    results["external_calls"] = {"google": service.calls - calls_before, "llm": llm.calls - llm_before}
+    print_table(f"load ({args.requests} requests/endpoint, concurrency {args.concurrency})", results["load"])
+    print(f"\nexternal calls during load: {results['external_calls']}")
+
+    results["allocations"] = asyncio.run(allocation_benchmarks(app_module.app, args.alloc_requests))
+    print_table("allocations per request", results["allocations"])
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        if regressions:
+            print("\n❌ Regressions:\n  " + "\n  ".join(regressions))
+            return 1
+        print("\n✅ No p95 regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Cold-start measurements, each taken in a fresh interpreter:
+
+- import_ms: time to import main (what every new worker pays),
+- first_chat_ms: import plus the first general and booking /chat turns
+  against the fakes, without warm-up,
+- warm_first_chat_ms: the same first turns after the WARMUP lifespan hook ran,
+- slowest_imports: largest cumulative entries from python -X importtime.
+
+Usage:
+    python -m benchmarks.startup --runs 5
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+_CHILD = """
+import json, time, asyncio
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+import httpx
+from benchmarks.run import install_fakes
+from benchmarks.fake_calendar import FakeCalendarService
+from benchmarks.fake_llm import FakeChatModel
+install_fakes(FakeCalendarService(200), FakeChatModel())
+
+async def first_turns():
+    async with main.app.router.lifespan_context(main.app):
+        ready = time.perf_counter()
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            await client.post("/chat", json={"message": "who are you"})
+            await client.post("/chat", json={"message": "book a meeting tomorrow at 3pm with rahul"})
+        return ready, time.perf_counter()
+
+ready, done = asyncio.run(first_turns())
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "first_chat_ms": (done - ready) * 1000,
+}))
+"""
+
+
+def _env(**extra):
+    env = dict(os.environ, API_KEY=os.environ.get("API_KEY", "benchmark"), LOG_LEVEL="WARNING")
+    env.update(extra)
+    return env
+
+
+def _child(warmup):
+    output = subprocess.run(
+        [sys.executable, "-c", _CHILD], env=_env(WARMUP="1" if warmup else "0"),
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def slowest_imports(limit=10):
+    """Top-level packages by cumulative import time (ms) when importing main."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"], env=_env(),
+        capture_output=True, text=True, check=True
+    ).stderr
+    # importtime prints children before their parent, so main's direct imports
+    # are the depth-1 entries between the previous top-level line and "main"
+    packages = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _self, cumulative, name = line[len("import time:"):].split("|")
+        name = name[1:]
+        if not name.startswith(" "):
+            if name.strip() == "main":
+                break
+            packages = {}
+        elif name.startswith("  ") and not name.startswith("   "):
+            try:
+                packages[name.strip()] = int(cumulative) / 1000
+            except ValueError:
+                continue
+    ranked = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:limit]
+    return {name: round(ms, 1) for name, ms in ranked}
+
+
+def measure(runs=3):
+    cold = [_child(warmup=False) for _ in range(runs)]
+    warm = [_child(warmup=True) for _ in range(runs)]
+    return {
+        "import_ms": round(statistics.median(r["import_ms"] for r in cold), 1),
+        "first_chat_ms": round(statistics.median(r["first_chat_ms"] for r in cold), 1),
+        "warm_first_chat_ms": round(statistics.median(r["first_chat_ms"] for r in warm), 1),
+        "slowest_imports": slowest_imports(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters per measurement (median reported)")
+    args = parser.parse_args(argv)
+    print(json.dumps(measure(args.runs), indent=2))
+
+
+if __name__ == "__main__":
+    main()
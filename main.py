@@ -1,41 +1,265 @@
-from fastapi import FastAPI
+from time import perf_counter
+_import_started = perf_counter()
+
+from fastapi import FastAPI, Depends, Header, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, BackgroundTasks
+from fastapi.responses import StreamingResponse, PlainTextResponse, JSONResponse, Response
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
-from ai_agent.ai_integration import compiled_graph
+from fastapi.middleware.gzip import GZipMiddleware
+from ai_agent.ai_integration import run_chat, stream_chat, warm_up
 from ai_agent.fetch_calendar import get_all_calendars
-from ai_agent.events import get_all_events
-import uvicorn
+from ai_agent.events import get_all_events, event_range, DEFAULT_EVENTS_LIMIT, MAX_EVENTS_LIMIT
+from ai_agent.calendar_io import run_calendar_io
+from ai_agent.watch import watch_manager, WATCH_CHECK_INTERVAL
+from ai_agent.booking_queue import BOOKING_QUEUE, booking_queue, booking_workers
 import os
+import json
+import asyncio
+import logging
+import hashlib
+from datetime import datetime
+from typing import Optional
+from contextlib import asynccontextmanager
 from ai_agent.calendar_setup import generate_token_from_credentials
+from ai_agent.credential_store import credential_store
+from ai_agent.memory import close_checkpointers
+from ai_agent.logging_setup import configure_logging
+from ai_agent.metrics import metrics, start_request_spans, server_timing_header, SERVER_TIMING
+
+import orjson
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson (several times faster for large event lists)."""
+
+    def render(self, content):
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+# WARMUP=1 builds the LLM client, graph, date parser and calendar service
+# before the worker accepts traffic instead of on the first requests
+WARMUP = os.getenv("WARMUP", "0") == "1"
+# Responses smaller than this are sent uncompressed
+GZIP_MIN_SIZE = int(os.getenv("GZIP_MIN_SIZE", "1000"))
+
+
+configure_logging()
+metrics.set("startup_import_seconds", perf_counter() - _import_started, "Time to import the API module")
+
+
+logger = logging.getLogger(__name__)
+
+
+async def maintain_watches():
+    """Keep calendar push channels registered and renewed (WATCH_WEBHOOK_URL)."""
+    while True:
+        try:
+            await run_calendar_io(watch_manager.maintain)
+        except Exception:
+            logger.exception("watch channel maintenance failed")
+        await asyncio.sleep(WATCH_CHECK_INTERVAL)
+
 
+@asynccontextmanager
+async def lifespan(app):
+    # Runs once in every worker process: clients, connection pools and
+    # in-memory caches are per process (the SharedCache is what they share)
+    if WARMUP:
+        started = perf_counter()
+        await warm_up()
+        metrics.set("startup_warmup_seconds", perf_counter() - started, "Time spent in warm-up")
+    watches = asyncio.create_task(maintain_watches()) if watch_manager.enabled else None
+    if BOOKING_QUEUE:
+        booking_workers.start()
+    yield
+    if BOOKING_QUEUE:
+        await booking_workers.stop()
+    if watches:
+        watches.cancel()
+        await run_calendar_io(watch_manager.stop_all)
+    await close_checkpointers()
 
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"]
 )
+# A year of events is ~10x smaller gzipped; SSE streams are left alone by Starlette
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_SIZE)
+
+@app.middleware("http")
+async def record_timing(request: Request, call_next):
+    """Per-route latency histogram, plus a Server-Timing header when SERVER_TIMING=1."""
+    spans = start_request_spans()
+    started = perf_counter()
+    response = await call_next(request)
+    elapsed = perf_counter() - started
+
+    route = request.scope.get("route")
+    metrics.observe(
+        "http_request_duration_seconds", elapsed, "HTTP handler latency",
+        route=route.path if route else "unmatched", method=request.method, status=response.status_code
+    )
+    if SERVER_TIMING:
+        spans.append(("total", elapsed))
+        response.headers["Server-Timing"] = server_timing_header(spans)
+    return response
+
+@app.get("/metrics")
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+async def user_for_authorization(authorization):
+    """
+    The user an "Authorization: Bearer <API key>" header acts for, or None
+    (the token.json account) without one. Keys come from
+    `python -m ai_agent.credential_store`; the user is never taken from the
+    request body or query, so one user cannot reach another's calendar.
+    """
+    if not authorization:
+        return None
+    scheme, _, api_key = authorization.partition(" ")
+    user_id = None
+    if scheme.lower() == "bearer" and api_key.strip():
+        user_id = await run_calendar_io(credential_store.user_for_api_key, api_key.strip())
+    if user_id is None:
+        raise HTTPException(status_code=401, detail="Invalid API key", headers={"WWW-Authenticate": "Bearer"})
+    return user_id
+
+async def current_user(authorization: Optional[str] = Header(None)):
+    return await user_for_authorization(authorization)
 
 class ChatRequest(BaseModel):
     message: str
+    session_id: Optional[str] = None  # remembers earlier turns of this conversation
 
 @app.post("/chat")
-def chat(req: ChatRequest):
-    result = compiled_graph.invoke({"input": req.message})
-    return {"reply": result["output"]}
+async def chat(req: ChatRequest, user_id: Optional[str] = Depends(current_user)):
+    result = await run_chat(req.message, user_id, req.session_id)
+    response = {"reply": result["output"]}
+    if (result.get("result") or {}).get("type") == "booking_pending":
+        # BOOKING_QUEUE: poll /bookings/{id} for the outcome
+        response["booking"] = {"id": result["result"]["booking_id"], "status": result["result"]["status"]}
+    return response
+
+@app.post("/chat/stream")
+async def chat_stream(req: ChatRequest, user_id: Optional[str] = Depends(current_user)):
+    """Server-Sent Events: tokens as the LLM produces them, then result/reply/done."""
+    async def events():
+        async for event, data in stream_chat(req.message, user_id, req.session_id):
+            yield f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.websocket("/ws/chat")
+async def chat_socket(websocket: WebSocket):
+    """WebSocket chat: send {"message": ..., "session_id": ...}, receive {"event": ..., "data": ...} frames."""
+    try:
+        user_id = await user_for_authorization(websocket.headers.get("authorization"))
+    except HTTPException:
+        # Closing before accept() rejects the handshake
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+    try:
+        while True:
+            req = await websocket.receive_json()
+            async for event, data in stream_chat(req["message"], user_id, req.get("session_id")):
+                await websocket.send_text(json.dumps({"event": event, "data": data}, default=str))
+    except WebSocketDisconnect:
+        pass
+
+def conditional_json(request: Request, data):
+    """
+    JSON response with an ETag of its body. A client that already holds
+    this body (If-None-Match) gets 304 with no body instead. Errors are
+    never tagged so they are not kept by clients.
+    """
+    response = FastJSONResponse(data)
+    if isinstance(data, dict) and "error" in data:
+        return response
+    etag = '"' + hashlib.blake2b(response.body, digest_size=16).hexdigest() + '"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag in request.headers.get("if-none-match", ""):
+        metrics.inc("http_not_modified_total", help_text="Conditional requests answered with 304",
+                    route=request.url.path)
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return response
 
 @app.get("/calendar")
-def fetch_calendar():
-    return get_all_calendars()
+async def fetch_calendar(request: Request, user_id: Optional[str] = Depends(current_user)):
+    return conditional_json(request, await run_calendar_io(get_all_calendars, user_id))
+
+@app.get("/bookings/{booking_id}")
+async def booking_status(booking_id: str, user_id: Optional[str] = Depends(current_user)):
+    """Status of a queued booking: pending, running, done (with the event) or failed (with the error)."""
+    booking = await run_calendar_io(booking_queue.get, booking_id)
+    if booking is None or booking.pop("user_id") != user_id:
+        return FastJSONResponse({"error": "❌ Unknown booking."}, status_code=404)
+    return booking
+
+@app.post("/calendar/notifications")
+async def calendar_notification(request: Request, background_tasks: BackgroundTasks):
+    """
+    Webhook for Calendar push notifications. Answers at once (Google retries
+    slow or failed deliveries) and syncs the changed calendar afterwards.
+    """
+    channel = await run_calendar_io(watch_manager.notification, request.headers)
+    if channel is not None:
+        background_tasks.add_task(run_calendar_io, watch_manager.apply, channel)
+    return Response(status_code=200)
 
 @app.get("/events")
-def fetch_calendar():
-    return get_all_events()
+async def fetch_events(
+    request: Request,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = Query(DEFAULT_EVENTS_LIMIT, ge=1, le=MAX_EVENTS_LIMIT),
+    cursor: Optional[str] = Query(None, pattern=r"^\d{0,9}$"),  # next_cursor of the previous page
+    user_id: Optional[str] = Depends(current_user)
+):
+    try:
+        start, end = event_range(start, end)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return conditional_json(request, await run_calendar_io(get_all_events, start, end, limit, cursor, user_id))
+
+
+def default_workers():
+    """One worker process per core this process may run on."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS/Windows
+        return os.cpu_count() or 1
 
 
 if __name__ == "__main__":
+    import uvicorn
+
     generate_token_from_credentials()
     port = int(os.environ.get("PORT", 8000))  # Use PORT env variable or fallback to 8000
-    uvicorn.run("main:app", host="0.0.0.0", port=port, reload=True)
+    if os.getenv("RELOAD", "0") == "1":
+        # Development: one process, restarted on code changes
+        uvicorn.run("main:app", host="0.0.0.0", port=port, reload=True)
+    else:
+        # Worker processes inherit these and read them on import
+        workers = int(os.getenv("WEB_CONCURRENCY", str(default_workers())))
+        os.environ["WEB_CONCURRENCY"] = str(workers)  # LLM limits are split between the workers
+        os.environ.setdefault("WARMUP", "1")
+        os.environ.setdefault("SHARED_CACHE_PATH", "shared_cache.db")
+        # A session's turns land on any worker, so conversation state has to be shared too
+        os.environ.setdefault("CHAT_MEMORY", "sqlite")
+        if workers > 1 and os.environ["CHAT_MEMORY"] == "memory":
+            logger.warning("CHAT_MEMORY=memory keeps each session in one of %d workers; follow-ups will be missed", workers)
+        uvicorn.run(
+            "main:app", host="0.0.0.0", port=port, workers=workers,
+            proxy_headers=True, forwarded_allow_ips="*"
+        )
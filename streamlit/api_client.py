@@ -0,0 +1,128 @@
+"""
+Backend access shared by the Streamlit pages.
+
+One pooled requests.Session per Streamlit server (keep-alive, timeouts and
+retries for idempotent requests), /events cached per visible range for
+EVENTS_CACHE_TTL seconds, and conditional GETs so a refetch of an unchanged
+calendar comes back as an empty 304.
+"""
+import os
+import json
+import threading
+import streamlit as st
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+BACKEND_URL = os.getenv("BACKEND_URL", "https://tailortalk2.onrender.com").rstrip("/")
+# (connect, read) seconds; a chat reply can take a while to start streaming
+REQUEST_TIMEOUT = (5, 30)
+STREAM_TIMEOUT = (5, 120)
+EVENTS_CACHE_TTL = int(os.getenv("EVENTS_CACHE_TTL", "60"))
+# Bodies kept for If-None-Match, across all sessions of this server
+MAX_CONDITIONAL_ENTRIES = 256
+
+
+class BackendError(Exception):
+    """The backend could not be reached or returned an error message."""
+
+
+@st.cache_resource
+def get_session():
+    session = requests.Session()
+    retries = Retry(
+        total=3, backoff_factor=0.5, status_forcelist=(502, 503, 504),
+        allowed_methods=("GET",), respect_retry_after_header=True
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retries)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+@st.cache_resource
+def _conditional_cache():
+    # url -> (etag, decoded body)
+    return {}, threading.Lock()
+
+
+def get_json(path, params=None):
+    """GET a backend path, revalidating with the last ETag seen for the same URL."""
+    session = get_session()
+    request = session.prepare_request(requests.Request("GET", BACKEND_URL + path, params=params))
+    cache, lock = _conditional_cache()
+    with lock:
+        cached = cache.get(request.url)
+    if cached:
+        request.headers["If-None-Match"] = cached[0]
+
+    try:
+        response = session.send(request, timeout=REQUEST_TIMEOUT)
+    except requests.RequestException as e:
+        raise BackendError(f"❌ Could not reach the backend: {e}") from e
+
+    if response.status_code == 304 and cached:
+        return cached[1]
+    try:
+        data = response.json()
+    except ValueError:
+        raise BackendError(f"❌ Backend returned {response.status_code}")
+    if isinstance(data, dict) and "error" in data:
+        raise BackendError(data["error"])
+
+    etag = response.headers.get("ETag")
+    if etag:
+        with lock:
+            cache[request.url] = (etag, data)
+            while len(cache) > MAX_CONDITIONAL_ENTRIES:
+                cache.pop(next(iter(cache)))
+    return data
+
+
+@st.cache_data(ttl=EVENTS_CACHE_TTL, show_spinner=False)
+def fetch_events(start, end):
+    """Every page of compact events for [start, end). Errors raise and are not cached."""
+    events = []
+    cursor = None
+    while True:
+        params = {"start": start.isoformat(), "end": end.isoformat(), "limit": 500}
+        if cursor:
+            params["cursor"] = cursor
+        data = get_json("/events", params)
+        events.extend(data["events"])
+        cursor = data.get("next_cursor")
+        if not cursor:
+            return events
+
+
+def stream_reply(message, session_id):
+    """Yield reply text from the backend's SSE stream as it arrives."""
+    try:
+        response = get_session().post(
+            BACKEND_URL + "/chat/stream",
+            json={"message": message, "session_id": session_id},
+            stream=True, timeout=STREAM_TIMEOUT,
+        )
+        response.raise_for_status()
+    except requests.RequestException as e:
+        yield f"❌ Could not reach the backend: {e}"
+        return
+
+    event = None
+    streamed = False
+    with response:
+        for line in response.iter_lines(decode_unicode=True):
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                data = json.loads(line[len("data: "):])
+                if event == "token":
+                    streamed = True
+                    yield data["text"]
+                elif event == "reset":
+                    # The streamed text was cut short; the reply that follows replaces it
+                    streamed = False
+                    yield "\n\n"
+                elif event == "reply" and not streamed:
+                    # Booking, fetch and cached answers arrive in one piece
+                    yield data["reply"]
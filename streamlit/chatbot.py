@@ -1,21 +1,27 @@
 import streamlit as st
-import requests
+import uuid
+from api_client import stream_reply
 
 st.title("🗓️ AI Appointment Scheduler")
 
 if "chat_history" not in st.session_state:
     st.session_state.chat_history = []
+if "session_id" not in st.session_state:
+    # Lets the backend remember earlier turns ("book it with Rahul")
+    st.session_state.session_id = uuid.uuid4().hex
 
 user_input = st.text_input("You:", key="input")
 
 if user_input:
     st.session_state.chat_history.append(("user", user_input))
-    response = requests.post("https://tailortalk2.onrender.com/chat", json={"message": user_input})
-    reply = response.json()["reply"]
-    st.session_state.chat_history.append(("bot", reply))
 
 for sender, msg in st.session_state.chat_history:
     if sender == "user":
         st.markdown(f"**You**: {msg}")
     else:
         st.markdown(f"**Assistant**: {msg}")
+
+if user_input:
+    st.markdown("**Assistant**:")
+    reply = st.write_stream(stream_reply(user_input, st.session_state.session_id))
+    st.session_state.chat_history.append(("bot", reply))
@@ -1,38 +1,50 @@
 import streamlit as st
 from streamlit_calendar import calendar
-import requests
+import datetime
+from api_client import fetch_events, BackendError
 
 st.set_page_config(layout="wide")
 st.title("📅 Google Calendar View")
 
-# Fetch events from your FastAPI backend
-response = requests.get("https://tailortalk2.onrender.com/events")
-data = response.json()
-print("Response status:", response.status_code)
-print("Response text:", response.text)
 
+# Only the visible month grid is requested (a month view spans up to 6 weeks)
+if "visible_range" not in st.session_state:
+    first_of_month = datetime.date.today().replace(day=1)
+    st.session_state.visible_range = (
+        first_of_month - datetime.timedelta(days=7),
+        first_of_month + datetime.timedelta(days=42),
+    )
+range_start, range_end = st.session_state.visible_range
 
-if "error" in data:
-    st.error(data["error"])
+try:
+    # Cached per visible range, so widget interactions do not refetch
+    data = fetch_events(range_start, range_end)
+except BackendError as e:
+    st.error(str(e))
 else:
     # Convert events to FullCalendar format
-    events = []
-    for event in data:
-        start = event.get("start", {}).get("dateTime") or event.get("start", {}).get("date")
-        end = event.get("end", {}).get("dateTime") or event.get("end", {}).get("date")
-        summary = event.get("summary", "No Title")
-
-        events.append({
-            "title": summary,
-            "start": start,
-            "end": end
-        })
+    events = [
+        {"title": event["summary"], "start": event["start"], "end": event["end"], "allDay": event["all_day"]}
+        for event in data
+    ]
 
     calendar_options = {
         "initialView": "dayGridMonth",  # month / timeGridWeek / timeGridDay
+        "initialDate": (range_start + (range_end - range_start) / 2).isoformat(),
         "editable": False,
         "selectable": True,
         "height": "auto"
     }
 
-    calendar(events=events, options=calendar_options)
+    state = calendar(events=events, options=calendar_options, callbacks=["datesSet"], key="calendar")
+
+    # Navigating months reports the new visible range; fetch just that
+    if state and state.get("callback") == "datesSet":
+        dates = state["datesSet"]
+        visible = (
+            datetime.date.fromisoformat(dates["start"][:10]),
+            datetime.date.fromisoformat(dates["end"][:10]),
+        )
+        if visible != st.session_state.visible_range:
+            st.session_state.visible_range = visible
+            st.rerun()
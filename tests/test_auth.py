@@ -0,0 +1,56 @@
+import asyncio
+
+import httpx
+import pytest
+
+from ai_agent.booking_queue import BookingQueue
+from ai_agent.credential_store import CredentialStore
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    import main
+
+    store = CredentialStore(str(tmp_path / "credentials.db"))
+    queue = BookingQueue(str(tmp_path / "bookings.db"))
+    monkeypatch.setattr(main, "credential_store", store)
+    monkeypatch.setattr(main, "booking_queue", queue)
+    queue.enqueue("k1", "alice", {"start": "2030-01-07T16:00:00+05:30", "end": "2030-01-07T16:30:00+05:30",
+                                  "summary": "Meeting with Rahul"})
+    keys = {user: store.issue_api_key(user) for user in ("alice", "bob")}
+
+    def get(path, **kwargs):
+        async def request():
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await client.get(path, **kwargs)
+        return asyncio.run(request())
+
+    return get, keys
+
+
+def test_api_key_selects_the_user(api):
+    get, keys = api
+    response = get("/bookings/k1", headers={"Authorization": f"Bearer {keys['alice']}"})
+    assert response.status_code == 200 and response.json()["id"] == "k1"
+
+
+def test_user_id_from_the_request_is_ignored(api):
+    get, keys = api
+    assert get("/bookings/k1", params={"user_id": "alice"}).status_code == 404
+    assert get("/bookings/k1", params={"user_id": "alice"},
+               headers={"Authorization": f"Bearer {keys['bob']}"}).status_code == 404
+
+
+@pytest.mark.parametrize("authorization", ["Bearer not-a-key", "Basic abc", "Bearer "])
+def test_unknown_api_key_is_rejected(api, authorization):
+    get, _ = api
+    response = get("/bookings/k1", headers={"Authorization": authorization})
+    assert response.status_code == 401
+
+
+def test_revoked_key_stops_working(api):
+    get, keys = api
+    import main
+    main.credential_store.revoke_api_keys("alice")
+    assert get("/bookings/k1", headers={"Authorization": f"Bearer {keys['alice']}"}).status_code == 401
@@ -0,0 +1,47 @@
+import datetime
+
+import pytz
+
+from ai_agent import batch as batch_module
+from benchmarks.fake_calendar import FakeBatch, FakeCalendarService, _http_error
+
+
+class CommittedThenFailedBatch(FakeBatch):
+    """Each request is carried out by Google, but its first answer is a 503."""
+
+    failed = set()
+
+    def execute(self, http=None):
+        for request_id, request, callback in self.requests:
+            try:
+                response, error = request.func(), None
+            except Exception as e:
+                response, error = None, e
+            if error is None and request_id not in self.failed:
+                self.failed.add(request_id)
+                response, error = None, _http_error(503, "Backend Error")
+            (callback or self.callback)(request_id, response, error)
+
+
+def test_retried_batch_insert_does_not_duplicate(monkeypatch):
+    from ai_agent import calendar_client
+    from ai_agent.calendar_setup import book_meetings
+
+    service = FakeCalendarService(events_per_calendar=0)
+    monkeypatch.setattr(service, "new_batch_http_request", lambda callback=None: CommittedThenFailedBatch(service, callback))
+    monkeypatch.setattr(calendar_client.default_client, "service", lambda: service)
+    monkeypatch.setattr(batch_module.time, "sleep", lambda seconds: None)
+
+    start = pytz.timezone("Asia/Kolkata").localize(datetime.datetime(2030, 1, 7, 10))
+    meetings = [
+        {"start_datetime": start + datetime.timedelta(hours=i),
+         "end_datetime": start + datetime.timedelta(hours=i, minutes=30),
+         "summary": f"Meeting {i}"}
+        for i in range(3)
+    ]
+    results = book_meetings(meetings)
+
+    assert [result["success"] for result in results] == [True] * 3
+    events = service.calendars["primary"]
+    assert len(events) == 3
+    assert sorted(result["event_id"] for result in results) == sorted(event["id"] for event in events)
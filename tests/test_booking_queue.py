@@ -0,0 +1,142 @@
+import time
+import asyncio
+import datetime
+
+import pytest
+
+from ai_agent import booking_queue as bq
+from ai_agent.booking_queue import BookingQueue, BookingWorkers, booking_key
+
+REQUEST = {
+    "start": "2030-01-07T16:00:00+05:30",
+    "end": "2030-01-07T16:30:00+05:30",
+    "summary": "Meeting with Rahul",
+    "timezone": "Asia/Kolkata",
+}
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return BookingQueue(str(tmp_path / "bookings.db"), max_attempts=3)
+
+
+def test_booking_key_ignores_case_and_spacing_of_person():
+    start = datetime.datetime(2030, 1, 7, 16)
+    end = start + datetime.timedelta(minutes=30)
+    assert booking_key("u1", start, end, "Rahul") == booking_key("u1", start, end, " rahul ")
+    assert booking_key("u1", start, end, "Rahul") != booking_key("u2", start, end, "Rahul")
+
+
+def test_enqueue_is_idempotent(queue):
+    booking, created = queue.enqueue("k1", "u1", REQUEST)
+    assert created and booking["status"] == "pending" and booking["attempts"] == 0
+
+    again, created = queue.enqueue("k1", "u1", REQUEST)
+    assert not created and again["id"] == "k1"
+    assert queue.pending() == 1
+
+
+def test_claim_success_is_done(queue):
+    queue.enqueue("k1", "u1", REQUEST)
+    assert queue.claim() == ("k1", "u1", REQUEST)
+    assert queue.get("k1")["status"] == "running"
+    assert queue.claim() is None  # nothing else is due
+
+    assert queue.finish("k1", {"success": True, "event_id": "k1"}) == "done"
+    booking = queue.get("k1")
+    assert booking["status"] == "done" and booking["booking"] == {"success": True, "event_id": "k1"}
+    assert queue.pending() == 0
+
+
+def test_retryable_error_is_retried_later(queue):
+    queue.enqueue("k1", "u1", REQUEST)
+    queue.claim()
+    assert queue.finish("k1", {"success": False, "error": "backend", "status": 503}) == "pending"
+    assert queue.get("k1")["error"] == "backend"
+    # Backoff: not due again straight away
+    assert queue.claim() is None
+
+
+def test_attempts_run_out_then_failed(queue, monkeypatch):
+    monkeypatch.setattr(bq, "BOOKING_RETRY_BASE", 0.0)
+    queue.enqueue("k1", "u1", REQUEST)
+    statuses = []
+    for _ in range(3):
+        assert queue.claim() is not None
+        statuses.append(queue.finish("k1", {"success": False, "error": "timeout"}))
+    assert statuses == ["pending", "pending", "failed"]
+    assert queue.get("k1")["attempts"] == 3
+
+
+def test_client_error_fails_at_once(queue):
+    queue.enqueue("k1", "u1", REQUEST)
+    queue.claim()
+    assert queue.finish("k1", {"success": False, "error": "bad request", "status": 400}) == "failed"
+
+
+def test_failed_booking_can_be_queued_again(queue):
+    queue.enqueue("k1", "u1", REQUEST)
+    queue.claim()
+    queue.finish("k1", {"success": False, "error": "forbidden", "status": 403})
+
+    booking, created = queue.enqueue("k1", "u1", REQUEST)
+    assert created
+    assert booking["status"] == "pending" and booking["attempts"] == 0 and booking["error"] is None
+
+
+def test_stale_running_booking_is_reclaimed(queue, monkeypatch):
+    queue.enqueue("k1", "u1", REQUEST)
+    assert queue.claim() is not None
+    # Still within BOOKING_STALE_AFTER: another worker must leave it alone
+    assert queue.claim() is None
+
+    queue._connection().execute("UPDATE bookings SET updated_at = ?", (time.time() - bq.BOOKING_STALE_AFTER - 1,))
+    assert queue.claim() == ("k1", "u1", REQUEST)
+    assert queue.get("k1")["attempts"] == 2
+
+
+def _run_workers(queue, until):
+    async def main():
+        workers = BookingWorkers(queue, workers=1)
+        workers.start()
+        try:
+            for _ in range(200):
+                if until():
+                    return
+                await asyncio.sleep(0.02)
+            raise AssertionError("booking was not processed")
+        finally:
+            await workers.stop()
+
+    asyncio.run(main())
+
+
+@pytest.fixture
+def calendar(monkeypatch):
+    from benchmarks.fake_calendar import FakeCalendarService
+    from ai_agent import calendar_client
+
+    service = FakeCalendarService(events_per_calendar=0)
+    # monkeypatch puts the real client back after each test
+    monkeypatch.setattr(calendar_client.default_client, "service", lambda: service)
+    return service
+
+
+def test_worker_books_once_with_key_as_event_id(queue, calendar):
+    queue.enqueue("a" * 32, None, REQUEST)
+    _run_workers(queue, lambda: queue.get("a" * 32)["status"] == "done")
+
+    assert [event["id"] for event in calendar.calendars["primary"]] == ["a" * 32]
+    assert queue.get("a" * 32)["booking"]["event_id"] == "a" * 32
+
+
+def test_worker_treats_existing_event_as_booked(queue, calendar):
+    # A previous attempt reached Google but crashed before recording it
+    calendar.insert_event("primary", {
+        "id": "b" * 32, "summary": REQUEST["summary"],
+        "start": {"dateTime": REQUEST["start"]}, "end": {"dateTime": REQUEST["end"]},
+    })
+    queue.enqueue("b" * 32, None, REQUEST)
+    _run_workers(queue, lambda: queue.get("b" * 32)["status"] == "done")
+
+    assert len(calendar.calendars["primary"]) == 1
@@ -0,0 +1,49 @@
+import asyncio
+import datetime
+
+import httpx
+import pytest
+
+from ai_agent.events import MAX_EVENTS_RANGE, event_range
+
+
+def test_naive_and_date_only_bounds_are_in_the_calendar_timezone():
+    start, end = event_range(datetime.datetime(2030, 1, 1), datetime.datetime(2030, 2, 1), timezone="Asia/Kolkata")
+    assert start.isoformat() == "2030-01-01T00:00:00+05:30"
+    assert end.isoformat() == "2030-02-01T00:00:00+05:30"
+
+
+def test_aware_bounds_are_kept():
+    start = datetime.datetime(2030, 1, 1, tzinfo=datetime.timezone.utc)
+    assert event_range(start, start + datetime.timedelta(days=1))[0] == start
+
+
+def test_missing_end_is_a_year_after_start():
+    start, end = event_range(datetime.datetime(2030, 1, 1))
+    assert end - start == datetime.timedelta(days=365)
+
+
+@pytest.mark.parametrize("start, end", [
+    (datetime.datetime(2030, 1, 2), datetime.datetime(2030, 1, 1)),
+    (datetime.datetime(2030, 1, 1), datetime.datetime(2030, 1, 1)),
+    (datetime.datetime(2000, 1, 1), datetime.datetime(2100, 1, 1)),
+    (datetime.datetime(2030, 1, 1), datetime.datetime(2030, 1, 1) + MAX_EVENTS_RANGE + datetime.timedelta(days=1)),
+])
+def test_bad_ranges_are_rejected(start, end):
+    with pytest.raises(ValueError):
+        event_range(start, end)
+
+
+@pytest.mark.parametrize("params", [
+    {"start": "2030-01-02", "end": "2030-01-01"},
+    {"start": "2000-01-01", "end": "2100-01-01"},
+])
+def test_events_endpoint_answers_bad_ranges_with_422(params):
+    import main
+
+    async def request():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/events", params=params)
+
+    assert asyncio.run(request()).status_code == 422
@@ -0,0 +1,107 @@
+import datetime
+
+import pytest
+
+from ai_agent.freebusy import BusyIndex, FreeBusyEngine, FreeBusyUnavailable
+
+
+def intervals(index):
+    return list(zip(index.starts, index.ends))
+
+
+def test_add_keeps_intervals_sorted():
+    index = BusyIndex()
+    index.add(50, 60)
+    index.add(10, 20)
+    index.add(30, 40)
+    assert intervals(index) == [(10, 20), (30, 40), (50, 60)]
+
+
+def test_add_merges_overlapping_and_touching():
+    index = BusyIndex()
+    index.add(10, 20)
+    index.add(30, 40)
+    index.add(15, 30)  # overlaps the first, touches the second
+    assert intervals(index) == [(10, 40)]
+
+    index.add(40, 50)
+    assert intervals(index) == [(10, 50)]
+
+
+def test_add_ignores_empty_interval():
+    index = BusyIndex()
+    index.add(10, 10)
+    index.add(20, 15)
+    assert intervals(index) == []
+
+
+def test_clear_range_trims_partial_overlaps():
+    index = BusyIndex()
+    index.add(0, 10)
+    index.add(20, 30)
+    index.add(40, 50)
+    index.clear_range(5, 45)
+    assert intervals(index) == [(0, 5), (45, 50)]
+
+
+def test_clear_range_splits_interval_around_range():
+    index = BusyIndex()
+    index.add(0, 100)
+    index.clear_range(40, 60)
+    assert intervals(index) == [(0, 40), (60, 100)]
+
+
+def test_overlapping_excludes_touching_intervals():
+    index = BusyIndex()
+    index.add(0, 10)
+    index.add(20, 30)
+    assert index.overlapping(10, 20) == []
+    assert index.overlapping(5, 25) == [(0, 10), (20, 30)]
+
+
+class _FreeBusyService:
+    """Minimal service whose freebusy().query returns canned results or raises."""
+
+    def __init__(self, result):
+        self.result = result
+        self.queries = 0
+
+    def freebusy(self):
+        return self
+
+    def query(self, body=None):
+        return self
+
+    def execute(self):
+        self.queries += 1
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+DAY_START = datetime.datetime(2030, 1, 7, tzinfo=datetime.timezone.utc)
+DAY_END = DAY_START + datetime.timedelta(days=1)
+
+
+def test_calendar_with_errors_is_unavailable_and_not_cached():
+    service = _FreeBusyService({"calendars": {"primary": {"errors": [{"reason": "backendError"}], "busy": []}}})
+    engine = FreeBusyEngine()
+    for _ in range(2):
+        with pytest.raises(FreeBusyUnavailable):
+            engine.busy(service, DAY_START, DAY_END)
+    assert service.queries == 2
+
+
+@pytest.mark.parametrize("result", [
+    {"calendars": {"primary": {"errors": [{"reason": "notFound"}], "busy": []}}},
+    TimeoutError("timed out"),
+])
+def test_check_conflict_reports_unverified_slot(monkeypatch, result):
+    from ai_agent import calendar_client
+    from ai_agent.calendar_setup import check_conflict
+
+    service = _FreeBusyService(result)
+    monkeypatch.setattr(calendar_client.default_client, "service", lambda: service)
+    monkeypatch.setattr(calendar_client.default_client, "freebusy", FreeBusyEngine())
+    conflict = check_conflict(DAY_START, DAY_START + datetime.timedelta(minutes=30))
+    assert conflict["conflict"] is None and conflict["error"]
@@ -0,0 +1,82 @@
+import datetime
+
+import pytest
+
+from ai_agent.intent_detect import LOCAL_TIMEZONE, KeywordMatcher, analyze_message, detect_intent
+
+
+@pytest.mark.parametrize("message, intent, has_time, has_day", [
+    # Whole-message dates; a question about a day is not a booking
+    ("tomorrow 4pm", "none", True, True),
+    ("friday", "none", False, True),
+    ("4pm", "none", True, False),
+    ("at 10:30", "none", True, False),
+    # Dates inside booking and slot requests are found by search
+    ("book a meeting friday 4pm with rahul", "book", True, True),
+    ("book a meeting with rahul on friday", "book", False, True),
+    ("book a meeting in 2 hours", "book", True, True),
+])
+def test_date_and_time_flags(message, intent, has_time, has_day):
+    analysis = analyze_message(message)
+    assert (analysis.intent, analysis.has_time, analysis.has_day) == (intent, has_time, has_day)
+    assert analysis.dt.tzinfo.zone == LOCAL_TIMEZONE
+
+
+@pytest.mark.parametrize("message", [
+    "do i have a meeting tomorrow",
+    "what's on my calendar on friday",
+    "how was your weekend",
+])
+def test_questions_are_not_searched_for_dates(message):
+    analysis = analyze_message(message)
+    assert analysis.dt is None and analysis.intent != "book"
+
+
+def test_day_without_time_is_local_midnight():
+    dt = analyze_message("book a meeting friday with rahul").dt
+    assert dt.weekday() == 4 and dt.time() == datetime.time(0, 0)
+    assert dt.utcoffset() == dt.tzinfo.localize(dt.replace(tzinfo=None)).utcoffset()
+
+
+def test_times_are_in_the_future_of_the_local_clock():
+    now = datetime.datetime.now(datetime.timezone.utc)
+    assert analyze_message("1am").dt > now
+    in_two_hours = analyze_message("book a meeting in 2 hours").dt
+    assert abs((in_two_hours - now) - datetime.timedelta(hours=2)) < datetime.timedelta(minutes=2)
+
+
+def test_person_and_duration_exclude_the_date_phrase():
+    analysis = analyze_message("book a meeting for 45 minutes friday 4pm with rahul")
+    assert analysis.person == "Rahul" and analysis.duration_minutes == 45
+
+
+VOCABULARY = {
+    "greeting": ["hi", "hello"],
+    "book": ["fix", "meeting", "book karo"],
+    "fetch": ["meeting list"],
+}
+
+
+@pytest.mark.parametrize("message, scores", [
+    ("hi there", {"greeting": 1}),
+    ("this is a thing", {}),  # "hi" inside "this"
+    ("fix the meeting", {"book": 2}),
+    ("add the prefix", {}),  # "fix" inside "prefix"
+    ("Meeting, LIST!", {"book": 1, "fetch": 2}),  # overlapping phrases both count
+    ("book karo", {"book": 2}),
+    ("book", {}),  # a prefix of a phrase is not the phrase
+    ("", {}),
+])
+def test_keyword_matcher_matches_whole_words(message, scores):
+    assert KeywordMatcher(VOCABULARY).match(message) == scores
+
+
+@pytest.mark.parametrize("message, intent", [
+    ("show my meetings", "fetch"),
+    ("suggest a time tomorrow", "suggest"),
+    ("book a meeting tomorrow at 3pm", "book"),
+    ("who are you", "general"),
+    ("what is the prefix of this word", "none"),
+])
+def test_detect_intent(message, intent):
+    assert detect_intent(message) == intent
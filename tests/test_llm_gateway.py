@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from ai_agent import llm_gateway
+from ai_agent.llm_gateway import LLMGateway, TokenBucket
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(llm_gateway.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_reserve_within_capacity_does_not_wait(clock):
+    bucket = TokenBucket(60)
+    assert bucket.reserve(60) == 0.0
+
+
+def test_reserve_beyond_capacity_waits_for_refill(clock):
+    bucket = TokenBucket(60)  # one per second
+    bucket.reserve(60)
+    assert bucket.reserve(1) == pytest.approx(1.0)
+    # Later callers queue behind earlier reservations
+    assert bucket.reserve(2) == pytest.approx(3.0)
+
+
+def test_refill_is_capped_at_one_minute(clock):
+    bucket = TokenBucket(60)
+    bucket.reserve(60)
+    clock[0] += 3600
+    assert bucket.reserve(60) == 0.0
+    assert bucket.reserve(1) == pytest.approx(1.0)
+
+
+def test_refund_returns_unused_estimate(clock):
+    bucket = TokenBucket(60)
+    bucket.reserve(60)
+    bucket.refund(30)
+    assert bucket.reserve(30) == 0.0
+
+
+def test_negative_refund_charges_more(clock):
+    bucket = TokenBucket(60)
+    bucket.reserve(30)
+    bucket.refund(-30)  # the call used 30 more than estimated
+    assert bucket.reserve(1) == pytest.approx(1.0)
+
+
+def test_zero_rate_disables_pacing(clock):
+    bucket = TokenBucket(0)
+    assert bucket.reserve(10 ** 6) == 0.0
+
+
+def test_oversize_reserve_waits_only_for_a_full_bucket(clock):
+    bucket = TokenBucket(60)
+    # Larger than the bucket: goes at once when it is full...
+    assert bucket.reserve(90) == 0.0
+    # ...and later callers pay off the excess
+    assert bucket.reserve(1) == pytest.approx(31.0)
+
+    clock[0] += 91  # refilled, capped at capacity
+    bucket.reserve(30)
+    assert bucket.reserve(90) == pytest.approx(30.0)
+
+
+def test_gateway_accepts_prompt_larger_than_token_budget():
+    from langchain_core.messages import HumanMessage
+    from benchmarks.fake_llm import FakeChatModel
+
+    model = FakeChatModel(latency_ms=0, token_latency_ms=0)
+    # A 750 tokens/minute share, as with 8 workers, and a ~1.1k token prompt
+    gateway = LLMGateway(lambda: model, requests_per_minute=0, tokens_per_minute=750, max_wait=15)
+    prompt = HumanMessage(content="word " * 900)
+
+    response = asyncio.run(gateway.ainvoke([prompt]))
+    assert response.content
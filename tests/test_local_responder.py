@@ -0,0 +1,49 @@
+import datetime
+
+import pytest
+import pytz
+
+from ai_agent.local_responder import detect_language, local_reply, match
+
+NOW = pytz.timezone("Asia/Kolkata").localize(datetime.datetime(2030, 1, 7, 16, 5))  # a Monday
+
+
+@pytest.mark.parametrize("message, kind", [
+    ("what time is it", "time"),
+    ("hey, what's the time now please", "time"),
+    ("abhi kitne baje hain", "time"),
+    ("what day is it today", "date"),
+    ("aaj kya hai", "date"),
+    ("आज कौन सा दिन है", "date"),
+    ("who are you", "identity"),
+    ("hi", "greeting"),
+    ("hello there", None),  # "there" is not filler
+    ("what time is my meeting with rahul", None),
+    ("book a meeting tomorrow at 3pm", None),
+    ("who are you and can you book a meeting tomorrow", None),
+    ("", None),
+])
+def test_match_only_whole_message_questions(message, kind):
+    found = match(message)
+    assert (found[0] if found else None) == kind
+
+
+@pytest.mark.parametrize("message, language", [
+    ("what day is it", "en"),
+    ("aaj kya hai", "hinglish"),
+    ("आज क्या है", "hi"),
+])
+def test_detect_language(message, language):
+    assert detect_language(message.split()) == language
+
+
+@pytest.mark.parametrize("message, reply", [
+    ("what day is it today", "📅 Today is Monday, 07 January 2030."),
+    ("what's tomorrow's date", "📅 Tomorrow is Tuesday, 08 January 2030."),
+    ("what day was yesterday", "📅 Yesterday was Sunday, 06 January 2030."),
+    ("kal kya hai", "📅 Kal Mangalvaar, 8 January 2030 hai."),
+    ("what time is it", "🕐 It's 4:05 PM (IST)."),
+    ("please tell me my schedule", None),
+])
+def test_local_reply(message, reply):
+    assert local_reply(message, now=NOW) == reply
@@ -0,0 +1,62 @@
+import sys
+import types
+import importlib.machinery
+
+import pytest
+
+from ai_agent import response_cache as rc
+from ai_agent.response_cache import ResponseCache, load_local_embedder
+
+
+class FakeSentenceTransformer:
+    loads = 0
+
+    def __init__(self, model_name):
+        FakeSentenceTransformer.loads += 1
+
+    def encode(self, text, normalize_embeddings=True):
+        # "cat" questions point one way, everything else another
+        return [1.0, 0.0] if "cat" in text else [0.0, 1.0]
+
+
+@pytest.fixture
+def sentence_transformers(monkeypatch):
+    module = types.ModuleType("sentence_transformers")
+    module.__spec__ = importlib.machinery.ModuleSpec("sentence_transformers", None)
+    module.SentenceTransformer = FakeSentenceTransformer
+    monkeypatch.setitem(sys.modules, "sentence_transformers", module)
+    FakeSentenceTransformer.loads = 0
+    rc._sentence_model.cache_clear()
+    yield
+    rc._sentence_model.cache_clear()
+
+
+def test_embedder_loads_model_on_first_use(sentence_transformers):
+    embed = load_local_embedder("fake-model")
+    assert FakeSentenceTransformer.loads == 0
+
+    embed("one")
+    embed("two")
+    assert FakeSentenceTransformer.loads == 1
+
+
+def test_semantic_lookup(sentence_transformers):
+    np = pytest.importorskip("numpy")  # installed with sentence-transformers
+    embed = load_local_embedder("fake-model")
+    cache = ResponseCache(embed=lambda text: np.array(embed(text)), similarity=0.9)
+    cache.put("tell me about cats", "Cats are great.")
+    assert cache.get("tell me something about my cat") == "Cats are great."
+    assert cache.get("tell me about dogs") is None
+
+
+def test_exact_lookup_ignores_case_and_punctuation():
+    cache = ResponseCache()
+    cache.put("Who won the match?", "India.")
+    assert cache.get("who won the match") == "India."
+    assert cache.stats()["hits"] == 1
+
+
+def test_time_sensitive_questions_are_not_cached():
+    cache = ResponseCache()
+    cache.put("what is happening now", "Nothing.")
+    assert cache.get("what is happening now") is None